@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark: extractive context compression
+
+Splits the sample financial statements into CHUNK_SIZE chunks, retrieves the
+top RETRIEVAL_K chunks for each sample question with the BM25 index, and
+compresses them at several keep ratios. Reports per configuration:
+
+- ratio: compressed / original context characters
+- context tokens (estimated) before and after
+- compression time per question
+- answer retention: share of questions whose answer line survives compression
+
+The prompt token budget is lifted so the numbers reflect compression alone.
+With --embeddings the configured embedding model also scores segments (needs
+the model or API to be reachable). With --llm and GOOGLE_API_KEY set, each
+question is answered from the full and the compressed context and generation
+latency is compared; otherwise answer latency is reported as null.
+
+Usage:
+    python benchmarks/compression_benchmark.py [--keep-ratios 0.2 0.3 0.5] [--embeddings] [--llm]
+                                               [--output benchmarks/results/compression.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from config import settings
+from reset_vector_store import create_comprehensive_financial_documents, SAMPLE_QUESTIONS
+from services.context_compressor import ContextCompressor
+from services.lexical_index import BM25Index
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Line of the sample statements that answers each sample question
+ANSWER_LINES = {
+    "What is the total revenue?": "Total Revenue: $1,200,000,000",
+    "What is the year-over-year operating profit growth rate?": "Operating Profit Growth Rate: 20%",
+    "What are the main cost items?": "Cost of Goods Sold (COGS): $600,000,000",
+    "How is the cash flow situation?": "Net Cash from Operating Activities: $350,000,000",
+    "What is the debt ratio?": "Debt-to-Equity Ratio: 0.57",
+    "What is the net profit margin?": "Net Profit Margin: 20.8%",
+    "What is the return on equity?": "Return on Equity (ROE): 23.8%",
+}
+
+
+def build_chunks():
+    """The sample statements as one document, split like uploaded PDFs are"""
+    text = "\n".join(
+        "\n".join(line.strip() for line in doc.page_content.strip().splitlines())
+        for doc in create_comprehensive_financial_documents()
+    )
+    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap)
+    return [
+        Document(page_content=chunk, metadata={"page": i + 1, "chunk_id": f"chunk_{i}"})
+        for i, chunk in enumerate(splitter.split_text(text))
+    ]
+
+
+def context_of(rag_pipeline, question, documents):
+    context, _, report = rag_pipeline._generate_context(question, documents, None)
+    return context, report["sources"]
+
+
+def timed_answer(rag_pipeline, question, context):
+    start = time.perf_counter()
+    rag_pipeline._generate_llm_response(question, context, "No previous conversation.")
+    return time.perf_counter() - start
+
+
+def p95(values):
+    return sorted(values)[max(0, int(round(0.95 * len(values))) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-ratios", type=float, nargs="+", default=[0.2, 0.3, 0.5])
+    parser.add_argument("--embeddings", action="store_true", help="also score segments with the embedding model")
+    parser.add_argument("--llm", action="store_true", help="measure generation latency with the configured LLM")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "results", "compression.json"))
+    args = parser.parse_args()
+
+    settings.vector_db_path = tempfile.mkdtemp()
+    settings.embedding_cache_path = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3")
+    settings.prompt_token_budget = 10 ** 6
+    if not args.llm:
+        settings.google_api_key = ""
+    from services.rag_pipeline import RAGPipeline
+    rag_pipeline = RAGPipeline(None)
+
+    embed_query = embed_documents = None
+    if args.embeddings:
+        from services.vector_store import VectorStoreService
+        vector_store = VectorStoreService()
+        embed_query, embed_documents = vector_store.embed_query, vector_store.embed_segments
+
+    chunks = build_chunks()
+    index = BM25Index(os.path.join(settings.vector_db_path, "lexical_index.jsonl"))
+    index.add([doc.metadata["chunk_id"] for doc in chunks], [doc.page_content for doc in chunks],
+              [doc.metadata for doc in chunks])
+    retrieved = {question: index.search(question, settings.retrieval_k) for question in SAMPLE_QUESTIONS}
+    baseline = {question: context_of(rag_pipeline, question, docs) for question, docs in retrieved.items()}
+
+    configs = [(ratio, 0.0) for ratio in args.keep_ratios]
+    if args.embeddings:
+        configs += [(ratio, settings.compression_embedding_weight) for ratio in args.keep_ratios]
+
+    results = []
+    for keep_ratio, embedding_weight in configs:
+        compressor = ContextCompressor(keep_ratio, settings.compression_neighbors, embedding_weight,
+                                       settings.compression_min_chunk_chars)
+        ratios, tokens_before, tokens_after, seconds, retained = [], [], [], [], 0
+        latency_full, latency_compressed = [], []
+        for question, docs in retrieved.items():
+            start = time.perf_counter()
+            compressed, stats = compressor.compress(question, docs, embed_query, embed_documents)
+            seconds.append(time.perf_counter() - start)
+
+            full_context, full_tokens = baseline[question]
+            context, context_tokens = context_of(rag_pipeline, question, compressed)
+            ratios.append(stats["ratio"])
+            tokens_before.append(full_tokens)
+            tokens_after.append(context_tokens)
+            retained += ANSWER_LINES[question] in context
+
+            if rag_pipeline.use_chat_model:
+                latency_full.append(timed_answer(rag_pipeline, question, full_context))
+                latency_compressed.append(timed_answer(rag_pipeline, question, context))
+
+        results.append({
+            "keep_ratio": keep_ratio,
+            "embedding_weight": embedding_weight,
+            "ratio": statistics.mean(ratios),
+            "context_tokens_before": statistics.mean(tokens_before),
+            "context_tokens_after": statistics.mean(tokens_after),
+            "compression_ms": statistics.mean(seconds) * 1000,
+            "answer_retention": retained / len(retrieved),
+            "answer_latency": {
+                "full_mean_s": statistics.mean(latency_full),
+                "full_p95_s": p95(latency_full),
+                "compressed_mean_s": statistics.mean(latency_compressed),
+                "compressed_p95_s": p95(latency_compressed)
+            } if latency_full else None
+        })
+
+    report = {
+        "chunk_size": settings.chunk_size,
+        "chunks": len(chunks),
+        "retrieval_k": settings.retrieval_k,
+        "questions": len(SAMPLE_QUESTIONS),
+        "neighbors": settings.compression_neighbors,
+        "llm": settings.llm_model if rag_pipeline.use_chat_model else None,
+        "results": results
+    }
+
+    print(f"{len(chunks)} chunks, k={settings.retrieval_k}, neighbors={settings.compression_neighbors}")
+    print(f"{'keep':>5} {'emb w':>6} {'ratio':>6} {'tokens':>13} {'ms':>6} {'retained':>9} {'gen p95 full/comp':>18}")
+    for row in results:
+        latency = row["answer_latency"]
+        latency_text = f"{latency['full_p95_s']:.2f}/{latency['compressed_p95_s']:.2f}s" if latency else "n/a"
+        print(f"{row['keep_ratio']:>5.2f} {row['embedding_weight']:>6.2f} {row['ratio']:>6.0%} "
+              f"{row['context_tokens_before']:>6.0f}->{row['context_tokens_after']:<5.0f} "
+              f"{row['compression_ms']:>6.2f} {row['answer_retention']:>9.0%} {latency_text:>18}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
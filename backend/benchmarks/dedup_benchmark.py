@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: SequenceMatcher vs MinHash source deduplication
+
+Builds candidate source lists of ~1000-character chunks (the default chunk
+size) in which roughly a third are lightly edited copies of earlier chunks,
+then times the greedy duplicate check both ways:
+
+- sequence_matcher: RAGPipeline._calculate_content_similarity against every kept source
+- minhash: signature comparison, with signatures precomputed as they are at ingest
+
+Also reports the one-off ingest cost of computing a signature and how often
+the two methods agree on keep/drop at CONTENT_SIMILARITY_THRESHOLD.
+
+Usage:
+    python benchmarks/dedup_benchmark.py [--sizes 5 10 20 40] [--repeat 5]
+                                         [--output benchmarks/results/dedup.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from reset_vector_store import create_comprehensive_financial_documents
+from services.rag_pipeline import RAGPipeline
+from services.minhash import compute_signature, find_duplicates
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+EDIT_WORDS = ["revenue", "2023", "2024", "margin", "$1.2B", "increased", "decreased", "note"]
+
+
+def build_candidates(count: int, rng: random.Random):
+    """Chunks of ~1000 chars from the sample documents, about a third near-duplicates"""
+    words = " ".join(doc.page_content for doc in create_comprehensive_financial_documents()).split()
+    candidates = []
+    for _ in range(count):
+        if candidates and rng.random() < 0.35:
+            edited = rng.choice(candidates).split()
+            for _ in range(rng.randint(1, 15)):
+                edited[rng.randrange(len(edited))] = rng.choice(EDIT_WORDS)
+            candidates.append(" ".join(edited))
+        else:
+            start = rng.randrange(len(words))
+            chunk = []
+            while len(" ".join(chunk)) < settings.chunk_size:
+                chunk.append(words[(start + len(chunk)) % len(words)])
+            candidates.append(" ".join(chunk))
+    return candidates
+
+
+def sequence_matcher_duplicates(rag_pipeline, candidates, threshold):
+    kept, duplicates = [], []
+    for content in candidates:
+        is_duplicate = any(
+            rag_pipeline._calculate_content_similarity(content, other) >= threshold for other in kept
+        )
+        duplicates.append(is_duplicate)
+        if not is_duplicate:
+            kept.append(content)
+    return duplicates
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "results", "dedup.json"))
+    args = parser.parse_args()
+
+    # Only the similarity method is exercised, so skip LLM / vector store setup
+    rag_pipeline = RAGPipeline.__new__(RAGPipeline)
+    threshold = settings.content_similarity_threshold
+    rng = random.Random(42)
+
+    results = []
+    for size in args.sizes:
+        candidates = build_candidates(size, rng)
+
+        signature_seconds, signatures = best_time(lambda: [compute_signature(c) for c in candidates], args.repeat)
+        sequence_seconds, sequence_duplicates = best_time(
+            lambda: sequence_matcher_duplicates(rag_pipeline, candidates, threshold), args.repeat
+        )
+        minhash_seconds, minhash_duplicates = best_time(lambda: find_duplicates(signatures, threshold), args.repeat)
+
+        agreement = sum(a == b for a, b in zip(sequence_duplicates, minhash_duplicates)) / size
+        results.append({
+            "candidates": size,
+            "sequence_matcher_ms": sequence_seconds * 1000,
+            "minhash_ms": minhash_seconds * 1000,
+            "speedup": sequence_seconds / max(minhash_seconds, 1e-9),
+            "signature_ms_per_chunk": signature_seconds * 1000 / size,
+            "sequence_matcher_duplicates": sum(sequence_duplicates),
+            "minhash_duplicates": sum(minhash_duplicates),
+            "agreement": agreement
+        })
+
+    report = {
+        "chunk_size": settings.chunk_size,
+        "threshold": threshold,
+        "num_perm": settings.minhash_num_perm,
+        "shingle_size": settings.minhash_shingle_size,
+        "results": results
+    }
+
+    print(f"threshold={threshold}, num_perm={settings.minhash_num_perm}, shingle={settings.minhash_shingle_size}")
+    print(f"{'n':>4} {'seqmatch ms':>12} {'minhash ms':>11} {'speedup':>8} {'sig ms/chunk':>13} "
+          f"{'dups (sm/mh)':>13} {'agree':>6}")
+    for row in results:
+        print(f"{row['candidates']:>4} {row['sequence_matcher_ms']:>12.2f} {row['minhash_ms']:>11.3f} "
+              f"{row['speedup']:>7.0f}x {row['signature_ms_per_chunk']:>13.3f} "
+              f"{row['sequence_matcher_duplicates']:>6}/{row['minhash_duplicates']:<6} {row['agreement']:>6.0%}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
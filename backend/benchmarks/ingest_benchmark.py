@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: upload path throughput on synthetic financial statement PDFs
+
+For each page count, generates a PDF with benchmarks/synthetic_pdf.py (text
+and table pages) and measures, in a fresh process so peak RSS is per run:
+
+- extract: PDFProcessor.extract_text_from_pdf, pages/sec
+- split: PDFProcessor.split_into_chunks, chunks/sec
+- embed / upsert: VectorStoreService.add_documents in INGEST_BATCH_SIZE
+  batches, embeddings/sec and upserts/sec (from its embed/upsert stats)
+- peak RSS of the benchmark process (and of extraction worker processes)
+
+By default chunks are embedded with the hashing embedder of
+services/fake_providers.py, so the numbers reflect this code (batching,
+indexing, persistence) rather than a provider;
+--embeddings configured uses the service's embedding model instead (Gemini or
+local MiniLM; needs the API or model to be reachable). The embedding cache is
+disabled so every run embeds cold. Results are JSON keyed by the git commit;
+pass --baseline with an earlier result file to print relative changes.
+
+Usage:
+    python benchmarks/ingest_benchmark.py [--pages 10 50 200] [--table-ratio 0.4]
+                                          [--embeddings hashing|configured] [--backend numpy|chromadb]
+                                          [--baseline old.json] [--output benchmarks/results/ingest.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_pdf import write_pdf
+from config import settings
+from services.fake_providers import HashEmbeddings
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_KEYS = ("pages_per_second", "chunks_per_second", "embeddings_per_second", "upserts_per_second")
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def per_second(count, seconds):
+    return count / seconds if seconds > 0 else None
+
+
+def run_once(pages, table_ratio, embeddings_mode, backend):
+    """One measured ingest of a fresh synthetic PDF; runs in its own process"""
+    workdir = tempfile.mkdtemp()
+    settings.vector_db_path = os.path.join(workdir, "vector_store")
+    settings.vector_db_type = backend
+    settings.embedding_cache_enabled = False
+
+    from services.pdf_processor import PDFProcessor
+    from services.vector_store import VectorStoreService
+
+    pdf_path = write_pdf(os.path.join(workdir, f"synthetic_{pages}.pdf"), pages, table_ratio)
+    pdf_processor = PDFProcessor()
+
+    start = time.perf_counter()
+    pages_content = pdf_processor.extract_text_from_pdf(pdf_path)
+    extract_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = pdf_processor.split_into_chunks(pages_content)
+    split_seconds = time.perf_counter() - start
+
+    if embeddings_mode == "hashing":
+        # No provider quota to respect, so the request rate limiter would only cap the measurement
+        settings.embedding_requests_per_second = 0
+        vector_store = VectorStoreService(embeddings=HashEmbeddings(), embedding_model_name="hashing-384")
+    else:
+        vector_store = VectorStoreService()
+
+    embed_seconds = upsert_seconds = 0.0
+    start = time.perf_counter()
+    for i in range(0, len(chunks), settings.ingest_batch_size):
+        stats = vector_store.add_documents(chunks[i:i + settings.ingest_batch_size])
+        embed_seconds += stats["embed_seconds"]
+        upsert_seconds += stats["upsert_seconds"]
+    store_seconds = time.perf_counter() - start
+
+    return {
+        "pages": pages,
+        "pages_extracted": len(pages_content),
+        "pdf_bytes": os.path.getsize(pdf_path),
+        "chunks": len(chunks),
+        "extract_seconds": extract_seconds,
+        "split_seconds": split_seconds,
+        "embed_seconds": embed_seconds,
+        "upsert_seconds": upsert_seconds,
+        "store_seconds": store_seconds,
+        "pages_per_second": per_second(len(pages_content), extract_seconds),
+        "chunks_per_second": per_second(len(chunks), split_seconds),
+        "embeddings_per_second": per_second(len(chunks), embed_seconds),
+        "upserts_per_second": per_second(len(chunks), upsert_seconds),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_children_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "embedding_model": vector_store.embedding_model_name
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {row["pages"]: row for row in json.load(f)["results"]}
+    print(f"\nChange vs {baseline_path}:")
+    for row in results:
+        old = baseline.get(row["pages"])
+        if not old:
+            continue
+        changes = []
+        for key in THROUGHPUT_KEYS + ("peak_rss_mb",):
+            if row.get(key) and old.get(key):
+                changes.append(f"{key.replace('_per_second', '/s')} {row[key] / old[key] - 1:+.1%}")
+        print(f"{row['pages']:>6} pages: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--table-ratio", type=float, default=0.4, help="share of statement table pages")
+    parser.add_argument("--embeddings", choices=["hashing", "configured"], default="hashing")
+    parser.add_argument("--backend", choices=["numpy", "chromadb"], default=settings.vector_db_type.lower())
+    parser.add_argument("--baseline", help="earlier ingest benchmark JSON to compare against")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "results", "ingest.json"))
+    args = parser.parse_args()
+
+    results = []
+    for pages in args.pages:
+        # A fresh process per run: peak RSS is per run and no caches carry over
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results.append(executor.submit(run_once, pages, args.table_ratio, args.embeddings, args.backend).result())
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "embeddings": args.embeddings,
+        "table_ratio": args.table_ratio,
+        "chunk_size": settings.chunk_size,
+        "chunk_overlap": settings.chunk_overlap,
+        "ingest_batch_size": settings.ingest_batch_size,
+        "embedding_batch_size": settings.embedding_batch_size,
+        "pdf_extraction_workers": settings.pdf_extraction_workers,
+        "results": results
+    }
+
+    print(f"commit {report['commit']}, {args.backend} backend, {args.embeddings} embeddings "
+          f"({results[0]['embedding_model'] if results else '-'})")
+    print(f"{'pages':>6} {'chunks':>7} {'pages/s':>9} {'chunks/s':>10} {'embed/s':>9} {'upsert/s':>10} {'rss MB':>8}")
+    for row in results:
+        print(f"{row['pages']:>6} {row['chunks']:>7} {row['pages_per_second'] or 0:>9.1f} "
+              f"{row['chunks_per_second'] or 0:>10.1f} {row['embeddings_per_second'] or 0:>9.1f} "
+              f"{row['upserts_per_second'] or 0:>10.1f} {row['peak_rss_mb']:>8.1f}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
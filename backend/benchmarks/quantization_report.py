@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Report search bytes saved vs recall@k lost for quantized / PCA-reduced search codes
+
+Embeds the sample financial documents from reset_vector_store.py (plus every
+line of them as an extra chunk, so PCA has enough vectors to fit) with the
+configured embeddings, then compares each NumPy backend codec against exact
+float32 search. "scan saved" is the reduction in bytes scanned per query. The
+float32 segment is kept for re-scoring, so the on-disk footprint ("disk") does
+not shrink. Results are printed and written as JSON.
+
+Usage:
+    python benchmarks/quantization_report.py [--k 5] [--output benchmarks/results/quantization.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from reset_vector_store import create_comprehensive_financial_documents, SAMPLE_QUESTIONS
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (storage dtype, PCA dims, rescore factor); rescore factor 1 shows recall without re-scoring
+CODEC_CONFIGS = [
+    ("float16", 0, 1),
+    ("float16", 0, 4),
+    ("int8", 0, 1),
+    ("int8", 0, 4),
+    ("float32", 32, 4),
+    ("int8", 32, 1),
+    ("int8", 32, 4),
+]
+
+
+def build_corpus():
+    """Sample documents plus each of their lines as a separate chunk"""
+    texts = []
+    for doc in create_comprehensive_financial_documents():
+        texts.append(doc.page_content.strip())
+        texts.extend(line.strip() for line in doc.page_content.splitlines() if line.strip())
+    return texts
+
+
+def recall_at_k(index, exact_index, query_vectors, k):
+    """Mean overlap between the index's top-k and exact float32 top-k"""
+    total = 0.0
+    for query in query_vectors:
+        expected = {doc.metadata["row"] for doc, _ in exact_index.query(query, k)}
+        found = {doc.metadata["row"] for doc, _ in index.query(query, k)}
+        total += len(expected & found) / max(len(expected), 1)
+    return total / len(query_vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=settings.retrieval_k)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "results", "quantization.json"))
+    args = parser.parse_args()
+
+    # Build the embeddings exactly as the service does, against a throwaway store
+    settings.vector_db_path = tempfile.mkdtemp()
+    settings.embedding_cache_path = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3")
+    from services.vector_store import VectorStoreService
+    from services.numpy_index import NumpyVectorIndex
+    from services.vector_quantization import VectorCodec
+    embeddings = VectorStoreService().embeddings
+
+    texts = build_corpus()
+    vectors = embeddings.embed_documents(texts)
+    queries = SAMPLE_QUESTIONS + texts[::3]
+    query_vectors = [embeddings.embed_query(question) for question in queries]
+
+    def build_index(codec, rescore_factor):
+        index = NumpyVectorIndex(tempfile.mkdtemp(), codec=codec, rescore_factor=rescore_factor)
+        index.add([str(i) for i in range(len(texts))], vectors, texts, [{"row": i} for i in range(len(texts))])
+        return index
+
+    exact_index = build_index(VectorCodec("float32", 0), 1)
+    baseline = exact_index.storage_stats()
+    baseline_bytes = baseline["search_bytes"]
+
+    results = []
+    for dtype, pca_dims, rescore_factor in CODEC_CONFIGS:
+        if pca_dims >= len(vectors[0]):
+            continue
+        index = build_index(VectorCodec(dtype, pca_dims), rescore_factor)
+        stats = index.storage_stats()
+        results.append({
+            "dtype": dtype,
+            "pca_dims": pca_dims,
+            "rescore_factor": rescore_factor,
+            "search_bytes": stats["search_bytes"],
+            "search_bytes_saved": 1 - stats["search_bytes"] / baseline_bytes,
+            "disk_bytes": stats["disk_bytes"],
+            f"recall@{args.k}": recall_at_k(index, exact_index, query_vectors, args.k)
+        })
+
+    report = {
+        "embedding_dim": len(vectors[0]),
+        "vectors": len(vectors),
+        "queries": len(queries),
+        "k": args.k,
+        "float32_bytes": baseline_bytes,
+        "float32_disk_bytes": baseline["disk_bytes"],
+        "results": results
+    }
+
+    print(f"{len(vectors)} vectors x {len(vectors[0])} dims, {len(queries)} queries, "
+          f"float32 = {baseline_bytes} bytes scanned, {baseline['disk_bytes']} bytes on disk")
+    print(f"{'dtype':<8} {'pca':>4} {'rescore':>7} {'scanned':>10} {'scan saved':>10} {'disk':>10} "
+          f"{'recall@' + str(args.k):>9}")
+    for row in results:
+        print(f"{row['dtype']:<8} {row['pca_dims']:>4} {row['rescore_factor']:>7} {row['search_bytes']:>10} "
+              f"{row['search_bytes_saved']:>10.1%} {row['disk_bytes']:>10} {row[f'recall@{args.k}']:>9.3f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark: retrieval recall and latency over a sweep of settings
+
+Builds an index from the sample financial statements in reset_vector_store.py
+plus a generated distractor corpus (benchmarks/synthetic_pdf.py pages full
+of similar line items and figures), for each CHUNK_SIZE x CHUNK_OVERLAP, and
+runs a labeled question set against it for each RETRIEVAL_K x
+SIMILARITY_THRESHOLD (x RETRIEVAL_MODE). Reports per configuration:
+
+- recall@k: share of a question's expected chunks in the top k (mean)
+- hit rate@k and MRR (reciprocal rank of the first expected chunk)
+- p50/p95/p99 similarity_search latency, query embedding included (the
+  retrieval and query embedding caches are cleared before every call)
+- index size: chunks and bytes on disk (vector + lexical index)
+
+Questions are SAMPLE_QUESTIONS plus "What is the <label>?" for every
+"<label>: <value>" line of the sample statements. Each is labeled with the
+statement line that answers it; its expected chunk IDs are the chunks that
+contain that line under the chunking being measured. Distractor chunks are
+never expected.
+
+Embeddings default to the local MiniLM model (sentence-transformers/all-MiniLM-L6-v2,
+downloaded once and then used offline, e.g. with HF_HUB_OFFLINE=1);
+--embeddings hashing uses a model-free hashing embedder instead.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py [--chunk-sizes 500 1000] [--chunk-overlaps 100 200]
+                                             [--k-values 3 5 10] [--thresholds 0.0 0.3 0.5 0.7]
+                                             [--modes hybrid] [--distractor-pages 100] [--repeat 3]
+                                             [--embeddings minilm|hashing] [--backend numpy|chromadb]
+                                             [--output benchmarks/results/retrieval.json]
+"""
+
+import sys
+import os
+import argparse
+import itertools
+import json
+import math
+import re
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from reset_vector_store import create_comprehensive_financial_documents, SAMPLE_QUESTIONS
+from benchmarks.compression_benchmark import ANSWER_LINES
+from benchmarks.synthetic_pdf import build_page_texts
+from services.fake_providers import HashEmbeddings
+import logging
+
+# Configure logging (force: reset_vector_store configures INFO on import)
+logging.basicConfig(level=logging.WARNING, force=True)
+logger = logging.getLogger(__name__)
+
+SAMPLE_SOURCE = "financial_statement_2024.pdf"
+DISTRACTOR_SOURCE = "synthetic_statements.pdf"
+LABEL_LINE = re.compile(r"^([A-Za-z][A-Za-z0-9 ()&'/-]+):\s+\S")
+
+
+def sample_pages():
+    """Sample statements as extracted pages (one per sample document)"""
+    documents = create_comprehensive_financial_documents()
+    return [
+        {
+            "page_number": i,
+            "content": "\n".join(line.strip() for line in doc.page_content.strip().splitlines()),
+            "metadata": {"source": SAMPLE_SOURCE, "page": i, "total_pages": len(documents)}
+        }
+        for i, doc in enumerate(documents, 1)
+    ]
+
+
+def distractor_pages(count):
+    texts = build_page_texts(count, seed=7) if count else []
+    return [
+        {"page_number": i, "content": text, "metadata": {"source": DISTRACTOR_SOURCE, "page": i, "total_pages": count}}
+        for i, text in enumerate(texts, 1)
+    ]
+
+
+def labeled_questions(pages):
+    """(question, answer line) pairs: the hand-labeled sample questions plus one per unique statement label"""
+    questions = [(question, ANSWER_LINES[question]) for question in SAMPLE_QUESTIONS]
+    lines = [line for page in pages for line in page["content"].splitlines()]
+    labels = {}
+    for line in lines:
+        match = LABEL_LINE.match(line)
+        if match:
+            labels.setdefault(match.group(1).strip(), []).append(line)
+    answered = {answer for _, answer in questions}
+    for label, label_lines in labels.items():
+        # Labels repeated under different headings (e.g. "Total") have no single right chunk
+        if len(label_lines) == 1 and label_lines[0] not in answered:
+            questions.append((f"What is the {label.lower()}?", label_lines[0]))
+    return questions
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def build_index(base_embeddings, model_name, pages, chunk_size, chunk_overlap):
+    """A fresh vector store holding the pages chunked at chunk_size / chunk_overlap"""
+    settings.chunk_size, settings.chunk_overlap = chunk_size, chunk_overlap
+    settings.vector_db_path = tempfile.mkdtemp()
+    from services.pdf_processor import PDFProcessor
+    from services.vector_store import VectorStoreService
+
+    chunks = PDFProcessor().split_into_chunks(pages)
+    vector_store = VectorStoreService(embeddings=base_embeddings, embedding_model_name=model_name)
+    for i in range(0, len(chunks), settings.ingest_batch_size):
+        vector_store.add_documents(chunks[i:i + settings.ingest_batch_size])
+    return vector_store, chunks
+
+
+def evaluate(vector_store, questions, expected, k, repeat):
+    """recall@k, hit rate, MRR and per-call latencies for one retrieval configuration"""
+    recalls, hits, reciprocal_ranks, latencies = [], [], [], []
+    # Untimed warm-up so one-off costs (model and index loading) stay out of the percentiles
+    vector_store.similarity_search(questions[0][0], k=k)
+    for question, answer in questions:
+        for _ in range(repeat):
+            vector_store.retrieval_cache.clear()
+            vector_store.query_embedding_cache.clear()
+            start = time.perf_counter()
+            results = vector_store.similarity_search(question, k=k)
+            latencies.append(time.perf_counter() - start)
+
+        relevant = expected[answer]
+        if not relevant:
+            continue
+        retrieved = [doc.metadata.get("chunk_id") for doc, _ in results]
+        ranks = [rank for rank, chunk_id in enumerate(retrieved, 1) if chunk_id in relevant]
+        recalls.append(len(set(retrieved) & relevant) / len(relevant))
+        hits.append(1.0 if ranks else 0.0)
+        reciprocal_ranks.append(1 / ranks[0] if ranks else 0.0)
+
+    return {
+        "recall@k": statistics.mean(recalls) if recalls else None,
+        "hit_rate@k": statistics.mean(hits) if hits else None,
+        "mrr": statistics.mean(reciprocal_ranks) if reciprocal_ranks else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "mean": statistics.mean(latencies) * 1000
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, 1000])
+    parser.add_argument("--chunk-overlaps", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--k-values", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.0, 0.3, 0.5, 0.7])
+    parser.add_argument("--modes", nargs="+", choices=["hybrid", "vector", "lexical"],
+                        default=[settings.retrieval_mode.lower()])
+    parser.add_argument("--distractor-pages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3, help="timed searches per question")
+    parser.add_argument("--embeddings", choices=["minilm", "hashing"], default="minilm")
+    parser.add_argument("--backend", choices=["numpy", "chromadb"], default=settings.vector_db_type.lower())
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "results", "retrieval.json"))
+    args = parser.parse_args()
+
+    settings.vector_db_type = args.backend
+    # Both embedders run locally; the provider quota limiter would dominate query latency
+    settings.embedding_requests_per_second = 0
+    # Shared across index builds so re-chunked text that did not change is embedded once
+    settings.embedding_cache_path = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3")
+
+    if args.embeddings == "hashing":
+        base_embeddings, model_name = HashEmbeddings(), "hashing-384"
+    else:
+        settings.google_api_key = ""
+        from services.vector_store import VectorStoreService
+        base_embeddings, model_name = VectorStoreService._create_embeddings()
+
+    pages = sample_pages()
+    corpus = pages + distractor_pages(args.distractor_pages)
+    questions = labeled_questions(pages)
+
+    results = []
+    for chunk_size, chunk_overlap in itertools.product(args.chunk_sizes, args.chunk_overlaps):
+        if chunk_overlap >= chunk_size:
+            continue
+        vector_store, chunks = build_index(base_embeddings, model_name, corpus, chunk_size, chunk_overlap)
+        expected = {
+            answer: {doc.metadata["chunk_id"] for doc in chunks
+                     if doc.metadata["source"] == SAMPLE_SOURCE and answer in doc.page_content}
+            for _, answer in questions
+        }
+        index_size = {
+            "chunks": len(chunks),
+            "bytes": directory_bytes(settings.vector_db_path),
+            "unanswerable_questions": sum(1 for relevant in expected.values() if not relevant)
+        }
+
+        for mode, k, threshold in itertools.product(args.modes, args.k_values, args.thresholds):
+            if mode == "lexical" and threshold != args.thresholds[0]:
+                continue  # The threshold only filters vector results
+            settings.retrieval_mode, settings.similarity_threshold = mode, threshold
+            results.append({
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "mode": mode,
+                "k": k,
+                "similarity_threshold": threshold,
+                "index": index_size,
+                **evaluate(vector_store, questions, expected, k, args.repeat)
+            })
+
+    report = {
+        "embeddings": model_name,
+        "backend": args.backend,
+        "questions": len(questions),
+        "distractor_pages": args.distractor_pages,
+        "repeat": args.repeat,
+        "source_deduplication": settings.enable_source_deduplication,
+        "diversification": settings.retrieval_diversification,
+        "reranking": settings.enable_reranking,
+        "results": results
+    }
+
+    print(f"{len(questions)} questions, {args.distractor_pages} distractor pages, {model_name}, {args.backend}")
+    print(f"{'size':>5} {'ovlp':>5} {'mode':>7} {'k':>3} {'thresh':>6} {'chunks':>7} {'MB':>6} "
+          f"{'recall':>7} {'hit':>6} {'mrr':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for row in results:
+        latency = row["latency_ms"]
+        print(f"{row['chunk_size']:>5} {row['chunk_overlap']:>5} {row['mode']:>7} {row['k']:>3} "
+              f"{row['similarity_threshold']:>6.2f} {row['index']['chunks']:>7} {row['index']['bytes'] / 2 ** 20:>6.1f} "
+              f"{row['recall@k'] or 0:>7.3f} {row['hit_rate@k'] or 0:>6.3f} {row['mrr'] or 0:>6.3f} "
+              f"{latency['p50']:>7.2f} {latency['p95']:>7.2f} {latency['p99']:>7.2f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
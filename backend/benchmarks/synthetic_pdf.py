@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Synthetic financial statement PDFs for benchmarks (standard library only)
+
+Writes uncompressed PDF 1.4 files with the standard Helvetica font, which
+pdfplumber and PyPDF2 extract like real statements. Two page kinds:
+
+- text pages: management discussion paragraphs full of figures and years
+- table pages: a statement title, a column header and ~40 line-item rows
+  laid out in columns (income statement, balance sheet, cash flow)
+
+Content is seeded, so the same arguments always produce the same file.
+
+Usage:
+    python benchmarks/synthetic_pdf.py --pages 50 [--table-ratio 0.4] [--seed 42]
+                                       [--output benchmarks/results/synthetic_50.pdf]
+"""
+
+import os
+import argparse
+import random
+from typing import Dict, List, Tuple
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 50
+LINE_HEIGHT = 12
+FONT_SIZE = 9
+# Helvetica at 9pt averages ~4.5pt per character; keeps lines inside the margins
+CHARS_PER_LINE = 110
+
+STATEMENTS = {
+    "Consolidated Income Statement": [
+        "Total Revenue", "Product Revenue", "Service Revenue", "Cost of Goods Sold", "Gross Profit",
+        "Research and Development", "Sales and Marketing", "General and Administrative", "Depreciation",
+        "Amortization of Intangibles", "Operating Expenses", "Operating Profit", "Interest Income",
+        "Interest Expense", "Other Income", "Profit Before Tax", "Income Tax Expense", "Net Income",
+    ],
+    "Consolidated Balance Sheet": [
+        "Cash and Cash Equivalents", "Short-term Investments", "Accounts Receivable", "Inventories",
+        "Prepaid Expenses", "Total Current Assets", "Property, Plant and Equipment", "Goodwill",
+        "Intangible Assets", "Total Assets", "Accounts Payable", "Accrued Liabilities", "Short-term Debt",
+        "Total Current Liabilities", "Long-term Debt", "Deferred Tax Liabilities", "Total Liabilities",
+        "Share Capital", "Retained Earnings", "Total Equity",
+    ],
+    "Consolidated Cash Flow Statement": [
+        "Net Income", "Depreciation and Amortization", "Changes in Working Capital",
+        "Net Cash from Operating Activities", "Capital Expenditures", "Acquisitions",
+        "Net Cash used in Investing Activities", "Dividends Paid", "Share Repurchases", "Debt Issued",
+        "Debt Repaid", "Net Cash used in Financing Activities", "Net Change in Cash", "Cash at End of Year",
+    ],
+}
+
+SENTENCES = [
+    "{item} was ${value:,} million in {year}, compared with ${previous:,} million in {prior}.",
+    "{item} {direction} {change}% year over year, driven by {driver}.",
+    "Management expects {item_lower} to remain stable through {next_year} as {driver} continues.",
+    "The {item_lower} margin was {margin}% in {year}, {direction} from {previous_margin}% in {prior}.",
+    "As disclosed in Note {note}, {item_lower} includes ${value:,} million related to {driver}.",
+    "Segment results show {item_lower} of ${value:,} million for the fiscal year ended December 31, {year}.",
+]
+DRIVERS = [
+    "higher cloud subscription volumes", "pricing actions in the enterprise segment", "lower freight costs",
+    "the integration of acquired businesses", "foreign exchange headwinds", "improved collection of receivables",
+    "restructuring of the retail network", "growth in emerging markets", "supply chain normalization",
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _text_page(rng: random.Random, page_number: int, year: int) -> List[Tuple[float, float, str]]:
+    """Positioned (x, y, text) runs of a narrative page"""
+    runs = [(MARGIN, PAGE_HEIGHT - MARGIN, f"Management Discussion and Analysis - Fiscal Year {year} (page {page_number})")]
+    y = PAGE_HEIGHT - MARGIN - 2 * LINE_HEIGHT
+    items = [item for rows in STATEMENTS.values() for item in rows]
+    while y > MARGIN + 4 * LINE_HEIGHT:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            item = rng.choice(items)
+            value = rng.randint(5, 2000)
+            sentences.append(rng.choice(SENTENCES).format(
+                item=item, item_lower=item.lower(), value=value * 10, previous=value * rng.randint(7, 12),
+                year=year, prior=year - 1, next_year=year + 1, change=rng.randint(1, 35),
+                direction=rng.choice(["increased", "decreased"]), driver=rng.choice(DRIVERS),
+                margin=rng.randint(5, 45), previous_margin=rng.randint(5, 45), note=rng.randint(1, 24)
+            ))
+        for line in _wrap(" ".join(sentences), CHARS_PER_LINE):
+            if y <= MARGIN:
+                break
+            runs.append((MARGIN, y, line))
+            y -= LINE_HEIGHT
+        y -= LINE_HEIGHT
+    return runs
+
+
+def _table_page(rng: random.Random, page_number: int, year: int) -> List[Tuple[float, float, str]]:
+    """Positioned (x, y, text) runs of a statement table page"""
+    title, items = rng.choice(list(STATEMENTS.items()))
+    columns = (MARGIN, 320, 400, 480)
+    runs = [(MARGIN, PAGE_HEIGHT - MARGIN, f"{title} (in thousands of USD) - page {page_number}")]
+    y = PAGE_HEIGHT - MARGIN - 2 * LINE_HEIGHT
+    for x, header in zip(columns, ("Line item", str(year), str(year - 1), "Change")):
+        runs.append((x, y, header))
+    y -= LINE_HEIGHT * 1.5
+
+    row = 0
+    while y > MARGIN:
+        item = items[row % len(items)]
+        if row >= len(items):
+            item = f"{item} - Segment {row // len(items) + 1}"
+        current, previous = rng.randint(1000, 9_000_000), rng.randint(1000, 9_000_000)
+        cells = (item, f"{current:,}", f"{previous:,}", f"{(current - previous) / previous:+.1%}")
+        for x, cell in zip(columns, cells):
+            runs.append((x, y, cell))
+        y -= LINE_HEIGHT
+        row += 1
+    return runs
+
+
+def _content_stream(runs: List[Tuple[float, float, str]]) -> bytes:
+    commands = [f"BT /F1 {FONT_SIZE} Tf 1 0 0 1 {x:.1f} {y:.1f} Tm ({_escape(text)}) Tj ET" for x, y, text in runs]
+    return "\n".join(commands).encode("latin-1", "replace")
+
+
+def _page_runs(pages: int, table_ratio: float, seed: int, year: int) -> List[List[Tuple[float, float, str]]]:
+    rng = random.Random(seed)
+    return [
+        (_table_page if rng.random() < table_ratio else _text_page)(rng, page_number, year)
+        for page_number in range(1, pages + 1)
+    ]
+
+
+def build_page_texts(pages: int, table_ratio: float = 0.4, seed: int = 42, year: int = 2024) -> List[str]:
+    """Plain text of the pages build_pdf would write (table cells joined by spaces), without a PDF round trip"""
+    texts = []
+    for runs in _page_runs(pages, table_ratio, seed, year):
+        lines: Dict[float, List[str]] = {}
+        for _, y, text in runs:
+            lines.setdefault(y, []).append(text)
+        texts.append("\n".join(" ".join(cells) for _, cells in sorted(lines.items(), reverse=True)))
+    return texts
+
+
+def build_pdf(pages: int, table_ratio: float = 0.4, seed: int = 42, year: int = 2024) -> bytes:
+    """PDF bytes with `pages` pages, about `table_ratio` of them statement tables"""
+    streams = [_content_stream(runs) for runs in _page_runs(pages, table_ratio, seed, year)]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for page_id, stream in zip(page_ids, streams):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def write_pdf(path: str, pages: int, table_ratio: float = 0.4, seed: int = 42) -> str:
+    """Write a synthetic statement PDF to path and return the path"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(build_pdf(pages, table_ratio, seed))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--table-ratio", type=float, default=0.4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"synthetic_{args.pages}.pdf")
+    write_pdf(output, args.pages, args.table_ratio, args.seed)
+    print(f"Wrote {args.pages} pages to {output}")
+
+
+if __name__ == "__main__":
+    main()
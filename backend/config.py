@@ -9,31 +9,134 @@ class Settings(BaseSettings):
 
     # Vector database configuration
     vector_db_path: str = os.getenv("VECTOR_DB_PATH", "./vector_store")
-    vector_db_type: str = os.getenv("VECTOR_DB_TYPE", "chromadb")
+    vector_db_type: str = os.getenv("VECTOR_DB_TYPE", "chromadb")  # "chromadb" or "numpy"
+    # NumPy backend: compact the segment once this fraction of rows is tombstoned
+    numpy_compaction_ratio: float = float(os.getenv("NUMPY_COMPACTION_RATIO", "0.3"))
+    # NumPy backend: in-memory search codes ("float32", "float16" or "int8"), optional PCA
+    # dimensions (0 = off), and how many candidates per result are re-scored at full precision.
+    # Codes reduce the bytes scanned per query; the float32 segment stays on disk for re-scoring
+    vector_storage_dtype: str = os.getenv("VECTOR_STORAGE_DTYPE", "float32")
+    vector_pca_dims: int = int(os.getenv("VECTOR_PCA_DIMS", "0"))
+    vector_rescore_factor: int = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
 
     # PDF upload path
     pdf_upload_path: str = os.getenv("PDF_UPLOAD_PATH", "../data")
 
     # Embedding model configuration
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+    # "gemini" (local MiniLM when no API key) or "fake" (deterministic hashed vectors, offline)
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "gemini")
+    fake_embedding_dimensions: int = int(os.getenv("FAKE_EMBEDDING_DIMENSIONS", "384"))
+
+    # Embedding cache configuration (kept outside vector_db_path so it survives rebuilds)
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+    embedding_cache_max_entries: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+
+    # Embedding batching and rate limiting (requests_per_second 0 = unlimited)
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    embedding_max_concurrency: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    embedding_requests_per_second: float = float(os.getenv("EMBEDDING_REQUESTS_PER_SECOND", "10"))
+    embedding_max_retries: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+    embedding_retry_backoff: float = float(os.getenv("EMBEDDING_RETRY_BACKOFF", "1.0"))
+    chroma_upsert_batch_size: int = int(os.getenv("CHROMA_UPSERT_BATCH_SIZE", "5000"))
 
     # LLM configuration
     llm_model: str = os.getenv("LLM_MODEL", "gemini-1.5-flash")
     llm_temperature: float = float(os.getenv("LLM_TEMPERATURE", "0.1"))
     max_tokens: int = int(os.getenv("MAX_TOKENS", "1000"))
+    # "gemini" (keyword fallback when unavailable) or "fake" (canned streamed answers for load tests):
+    # tokens in the answer, delay before the first and each further token, and +/- jitter fraction
+    llm_provider: str = os.getenv("LLM_PROVIDER", "gemini")
+    fake_llm_output_tokens: int = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "80"))
+    fake_llm_first_token_ms: float = float(os.getenv("FAKE_LLM_FIRST_TOKEN_MS", "200"))
+    fake_llm_token_ms: float = float(os.getenv("FAKE_LLM_TOKEN_MS", "20"))
+    fake_llm_jitter: float = float(os.getenv("FAKE_LLM_JITTER", "0.2"))
+    fake_llm_seed: int = int(os.getenv("FAKE_LLM_SEED", "42"))
+
+    # Prompt packing: estimated-token budget for the whole prompt, the share of it chat history
+    # may use, history turns kept and tokens per turn, and the smallest useful trimmed source
+    prompt_token_budget: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+    history_token_share: float = float(os.getenv("HISTORY_TOKEN_SHARE", "0.25"))
+    max_history_turns: int = int(os.getenv("MAX_HISTORY_TURNS", "5"))
+    history_turn_tokens: int = int(os.getenv("HISTORY_TURN_TOKENS", "300"))
+    min_source_tokens: int = int(os.getenv("MIN_SOURCE_TOKENS", "50"))
+
+    # Extractive context compression: keep the share of each chunk's lines/sentences most relevant
+    # to the question (plus neighbors); relevance blends term overlap with embedding similarity
+    enable_context_compression: bool = os.getenv("ENABLE_CONTEXT_COMPRESSION", "False").lower() == "true"
+    compression_keep_ratio: float = float(os.getenv("COMPRESSION_KEEP_RATIO", "0.3"))
+    compression_neighbors: int = int(os.getenv("COMPRESSION_NEIGHBORS", "1"))
+    compression_embedding_weight: float = float(os.getenv("COMPRESSION_EMBEDDING_WEIGHT", "0.5"))
+    compression_min_chunk_chars: int = int(os.getenv("COMPRESSION_MIN_CHUNK_CHARS", "300"))
+    # Segment embeddings are throwaway: kept in memory only, never in the persistent embedding cache
+    compression_embedding_cache_size: int = int(os.getenv("COMPRESSION_EMBEDDING_CACHE_SIZE", "4096"))
+    compression_embedding_cache_ttl: float = float(os.getenv("COMPRESSION_EMBEDDING_CACHE_TTL", "3600"))
+
+    # PDF extraction configuration
+    # 0 = use all available CPU cores, 1 = disable parallel extraction
+    pdf_extraction_workers: int = int(os.getenv("PDF_EXTRACTION_WORKERS", "0"))
+    parallel_extraction_min_pages: int = int(os.getenv("PARALLEL_EXTRACTION_MIN_PAGES", "20"))
 
     # Chunking configuration
     chunk_size: int = int(os.getenv("CHUNK_SIZE", "1000"))
     chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "200"))
 
+    # Streaming ingest configuration
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+    ingest_queue_size: int = int(os.getenv("INGEST_QUEUE_SIZE", "256"))
+
     # Retrieval configuration
     retrieval_k: int = int(os.getenv("RETRIEVAL_K", "5"))
-    similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+    # Minimum cosine similarity between question and chunk embeddings (vector results only)
+    similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.3"))
+    # "vector", "hybrid" (BM25 + vector, reciprocal-rank fusion) or "lexical"
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "vector")
+    bm25_k1: float = float(os.getenv("BM25_K1", "1.5"))
+    bm25_b: float = float(os.getenv("BM25_B", "0.75"))
+    rrf_k: int = int(os.getenv("RRF_K", "60"))
+
+    # Query caching configuration (entries; 0 disables) and TTL in seconds
+    query_embedding_cache_size: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+    query_embedding_cache_ttl: float = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+    retrieval_cache_size: int = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+    retrieval_cache_ttl: float = float(os.getenv("RETRIEVAL_CACHE_TTL", "600"))
+
+    # Semantic answer cache: entries (0 disables), TTL in seconds, and the question-embedding
+    # cosine similarity at which a cached answer over the same retrieved chunks is reused
+    answer_cache_size: int = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+    answer_cache_ttl: float = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    answer_cache_similarity: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+    # Threads running blocking vector store calls for async request handlers
+    vector_store_workers: int = int(os.getenv("VECTOR_STORE_WORKERS", "8"))
+
+    # Share one pipeline execution among concurrent identical chat requests
+    enable_request_coalescing: bool = os.getenv("ENABLE_REQUEST_COALESCING", "True").lower() == "true"
 
     # Source deduplication configuration
     enable_source_deduplication: bool = os.getenv("ENABLE_SOURCE_DEDUPLICATION", "True").lower() == "true"
     content_similarity_threshold: float = float(os.getenv("CONTENT_SIMILARITY_THRESHOLD", "0.75"))
+    # MinHash signatures (computed per chunk at ingest) used to compare source content
+    minhash_num_perm: int = int(os.getenv("MINHASH_NUM_PERM", "128"))
+    minhash_shingle_size: int = int(os.getenv("MINHASH_SHINGLE_SIZE", "4"))
     max_sources_per_page: int = int(os.getenv("MAX_SOURCES_PER_PAGE", "2"))
+    # "page_cap" (MAX_SOURCES_PER_PAGE) or "mmr" (maximal marginal relevance over candidate embeddings)
+    retrieval_diversification: str = os.getenv("RETRIEVAL_DIVERSIFICATION", "page_cap")
+    # 1.0 = pure relevance, 0.0 = pure diversity
+    mmr_lambda: float = float(os.getenv("MMR_LAMBDA", "0.5"))
+    mmr_fetch_factor: int = int(os.getenv("MMR_FETCH_FACTOR", "4"))
+
+    # Cross-encoder reranking of k * RERANK_FETCH_FACTOR candidates down to k; retrieval order
+    # is kept when scoring exceeds RERANK_BUDGET_MS. (question, chunk) scores are cached
+    enable_reranking: bool = os.getenv("ENABLE_RERANKING", "False").lower() == "true"
+    reranker_model: str = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_fetch_factor: int = int(os.getenv("RERANK_FETCH_FACTOR", "3"))
+    rerank_budget_ms: float = float(os.getenv("RERANK_BUDGET_MS", "250"))
+    rerank_cache_size: int = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+    rerank_cache_ttl: float = float(os.getenv("RERANK_CACHE_TTL", "3600"))
+    # Concurrent scoring passes; size to the expected concurrent chat requests
+    rerank_workers: int = int(os.getenv("RERANK_WORKERS", "4"))
 
     # Server configuration
     host: str = os.getenv("HOST", "0.0.0.0")
@@ -45,11 +148,30 @@ class Settings(BaseSettings):
 
     # Logging configuration
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    # Include per-stage timings and token counts in chat and upload responses
+    enable_stage_timings: bool = os.getenv("ENABLE_STAGE_TIMINGS", "False").lower() == "true"
+    # Serve in-process Prometheus metrics at /metrics and record per-route request metrics
+    enable_metrics: bool = os.getenv("ENABLE_METRICS", "True").lower() == "true"
+    # On-demand request profiling: requests carrying PROFILING_HEADER and a matching X-Admin-Token
+    # are profiled ("sampling" collapsed stacks or "cprofile" pstats) into a ring of PROFILE_MAX_COUNT
+    # files under PROFILE_DIR; an empty admin token disables profiling and the admin endpoints
+    profiling_admin_token: str = os.getenv("PROFILING_ADMIN_TOKEN", "")
+    profiling_header: str = os.getenv("PROFILING_HEADER", "X-Profile")
+    profiling_mode: str = os.getenv("PROFILING_MODE", "sampling")
+    profiling_interval_ms: float = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+    profile_dir: str = os.getenv("PROFILE_DIR", "./profiles")
+    profile_max_count: int = int(os.getenv("PROFILE_MAX_COUNT", "20"))
 
     def validate_settings(self):
         """Validate critical settings"""
-        if not self.google_api_key:
-            raise ValueError("GOOGLE_API_KEY is required. Please set it in the .env file.")
+        for name, provider in (("LLM_PROVIDER", self.llm_provider), ("EMBEDDING_PROVIDER", self.embedding_provider)):
+            if provider.lower() not in ("gemini", "fake"):
+                raise ValueError(f"{name} must be 'gemini' or 'fake', got '{provider}'")
+        # The key is only needed while a real provider is in use
+        uses_gemini = "gemini" in (self.llm_provider.lower(), self.embedding_provider.lower())
+        if uses_gemini and not self.google_api_key:
+            raise ValueError("GOOGLE_API_KEY is required. Please set it in the .env file "
+                             "(or set LLM_PROVIDER=fake and EMBEDDING_PROVIDER=fake for offline load testing).")
 
     class Config:
         env_file = ".env"
@@ -1,14 +1,26 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
 from models.schemas import ChatRequest, ChatResponse, DocumentsResponse, UploadResponse
 from services.pdf_processor import PDFProcessor
 from services.vector_store import VectorStoreService
 from services.rag_pipeline import RAGPipeline
+from services.ingest_pipeline import IngestPipeline
+from services.request_coalescer import RequestCoalescer, chat_request_key
+from services.metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, registry
+from services.request_profiler import PROFILE_MODES, ProfileStore, create_profiler
 from config import settings
+import asyncio
+import hmac
+import json
 import logging
+import threading
 import time
 import os
+import shutil
+import tempfile
 import aiofiles
 
 # Configure logging
@@ -34,12 +46,192 @@ app.add_middleware(
 pdf_processor = None
 vector_store = None
 rag_pipeline = None
+ingest_pipeline = None
+chat_coalescer = RequestCoalescer()
+
+
+def _route_path(scope) -> str:
+    """Route template for metric labels, so path parameters and unknown URLs do not add series"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "other")
+    return "other"
+
+
+class MetricsMiddleware:
+    """Count requests and time them per route (until the response starts, for streams).
+
+    A pure ASGI middleware, so streamed bodies are not buffered through an extra task
+    and in-flight gauges cover the request until its last body chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.enable_metrics:
+            await self.app(scope, receive, send)
+            return
+
+        path = _route_path(scope)
+        method = scope["method"]
+        status = {"code": None}
+        start = time.perf_counter()
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, path=path, method=method)
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(path=path)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            HTTP_IN_FLIGHT.dec(path=path)
+            if status["code"] is None:
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, path=path, method=method)
+            HTTP_REQUESTS.inc(path=path, method=method, status=str(status["code"] or 500))
+
+
+app.add_middleware(MetricsMiddleware)
+
+
+def collect_service_metrics():
+    """Scrape-time metrics read from the services' own counters"""
+    yield ("rag_coalesced_requests_total", "counter", "Chat requests served by an identical in-flight request",
+           [({}, chat_coalescer.coalesced)])
+    yield ("rag_coalescer_in_flight", "gauge", "Distinct chat requests currently executing",
+           [({}, chat_coalescer.stats()["in_flight"])])
+
+    if ingest_pipeline is not None:
+        yield ("rag_ingest_queue_depth", "gauge", "Chunks waiting in the ingest queue to be embedded",
+               [({}, ingest_pipeline.queue_depth())])
+
+    if vector_store is not None:
+        yield ("rag_vector_store_documents", "gauge", "Chunks in the vector store",
+               [({}, vector_store.get_document_count())])
+        caches = {
+            "retrieval": vector_store.retrieval_cache.stats(),
+            "query_embedding": vector_store.query_embedding_cache.stats()
+        }
+        if hasattr(vector_store, "segment_embedding_cache"):
+            caches["compression_embedding"] = vector_store.segment_embedding_cache.stats()
+        if hasattr(vector_store.embeddings, "stats"):
+            caches["embedding"] = vector_store.embeddings.stats()
+        if vector_store.reranker is not None:
+            reranker_stats = vector_store.reranker.stats()
+            caches["rerank_score"] = reranker_stats.pop("score_cache")
+            yield ("rag_rerank_total", "counter", "Rerank attempts by outcome (reranked, timeouts, failures)",
+                   [({"outcome": outcome}, count) for outcome, count in reranker_stats.items()])
+        if rag_pipeline is not None:
+            caches["answer"] = rag_pipeline.answer_cache.stats()
+
+        yield ("rag_cache_hits_total", "counter", "Cache hits by cache",
+               [({"cache": name}, stats["hits"]) for name, stats in caches.items()])
+        yield ("rag_cache_misses_total", "counter", "Cache misses by cache",
+               [({"cache": name}, stats["misses"]) for name, stats in caches.items()])
+
+
+registry.register_collector(collect_service_metrics)
+
+profile_store = ProfileStore(settings.profile_dir, settings.profile_max_count)
+# One profiled request at a time: profilers are process-wide and would record each other
+_profiling_lock = threading.Lock()
+
+
+def _is_admin(request: Request) -> bool:
+    token = settings.profiling_admin_token
+    return bool(token) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token)
+
+
+def _require_admin(request: Request) -> None:
+    """404 while profiling is disabled (no admin token configured), 403 for a wrong token"""
+    if not settings.profiling_admin_token:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not _is_admin(request):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+class ProfilingMiddleware:
+    """Profile a request carrying the profiling header and admin token, until its body is sent.
+
+    A pure ASGI middleware, so requests without the header pass straight through
+    without wrapping the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiling_admin_token:
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if settings.profiling_header not in request.headers:
+            await self.app(scope, receive, send)
+            return
+        if not _is_admin(request):
+            await JSONResponse(status_code=403, content={"detail": "Invalid admin token"})(scope, receive, send)
+            return
+        if not _profiling_lock.acquire(blocking=False):
+            await self.app(scope, receive, _with_header(send, "X-Profile-Status", "busy"))
+            return
+
+        requested = request.headers[settings.profiling_header].lower()
+        mode = requested if requested in PROFILE_MODES else settings.profiling_mode
+        profile_id = profile_store.new_id()
+        status = {"code": 500}
+        start = time.perf_counter()
+        try:
+            profiler = create_profiler(mode, settings.profiling_interval_ms)
+            profiler.start()
+        except Exception:
+            _profiling_lock.release()
+            raise
+
+        async def send_profiled(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _with_header(send_profiled, "X-Profile-Id", profile_id))
+        finally:
+            try:
+                duration = time.perf_counter() - start
+                # Stop on the profiled thread, but write the profile off the event loop
+                await asyncio.to_thread(profile_store.save, profile_id, profiler.stop(), {
+                    "mode": mode,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": status["code"],
+                    "duration": duration,
+                    "samples": getattr(profiler, "samples", None)
+                })
+            except Exception as e:
+                logger.error(f"Error saving profile {profile_id}: {str(e)}")
+            finally:
+                _profiling_lock.release()
+
+
+def _with_header(send, name: str, value: str):
+    """ASGI send callable adding a header to the response start message"""
+    async def send_with_header(message):
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message)[name] = value
+        await send(message)
+    return send_with_header
+
+
+app.add_middleware(ProfilingMiddleware)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    global pdf_processor, vector_store, rag_pipeline
+    global pdf_processor, vector_store, rag_pipeline, ingest_pipeline
 
     try:
         logger.info("Starting RAG Q&A System...")
@@ -60,6 +252,10 @@ async def startup_event():
         rag_pipeline = RAGPipeline(vector_store)
         logger.info("RAG pipeline initialized")
 
+        # Initialize streaming ingest pipeline
+        ingest_pipeline = IngestPipeline(pdf_processor, vector_store)
+        logger.info("Ingest pipeline initialized")
+
         logger.info("All services initialized successfully")
 
     except Exception as e:
@@ -74,6 +270,33 @@ async def root():
     return {"message": "RAG-based Financial Statement Q&A System is running"}
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics in the text exposition format (runs in a worker thread; collectors may block)"""
+    if not settings.enable_metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Recent request profiles, newest first (requires X-Admin-Token)"""
+    _require_admin(request)
+    return {"profiles": await asyncio.to_thread(profile_store.list)}
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """Download one profile: collapsed stacks (text) or a pstats file (requires X-Admin-Token)"""
+    _require_admin(request)
+    found = await asyncio.to_thread(profile_store.get, profile_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    metadata, path = found
+    media_type = "text/plain; charset=utf-8" if metadata["mode"] == "sampling" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=metadata["file"])
+
+
 @app.post("/api/upload")
 async def upload_pdf(file: UploadFile = File(...)):
     """Upload and process PDF file"""
@@ -91,34 +314,54 @@ async def upload_pdf(file: UploadFile = File(...)):
         upload_dir = settings.pdf_upload_path
         os.makedirs(upload_dir, exist_ok=True)
 
-        # Save uploaded file
+        # Stage the upload under its own name in a private directory, so a duplicate never
+        # lands in the upload folder and a failed ingest never overwrites the previous copy
         file_path = os.path.join(upload_dir, file.filename)
+        staging_dir = tempfile.mkdtemp(prefix=".upload-", dir=upload_dir)
+        staged_path = os.path.join(staging_dir, file.filename)
 
-        # Read and save file content
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-
-        logger.info(f"File saved to: {file_path}")
+        try:
+            content = await file.read()
+            async with aiofiles.open(staged_path, "wb") as f:
+                await f.write(content)
 
-        # Process PDF and extract documents
-        documents = pdf_processor.process_pdf(file_path)
+            # Stream changed chunks into the vector database in bounded batches; PDF parsing,
+            # chunking and embedding are blocking, so the whole ingest runs in a worker thread
+            result = await asyncio.to_thread(ingest_pipeline.run, staged_path)
 
-        if not documents:
-            raise HTTPException(status_code=400, detail="No text content could be extracted from the PDF")
+            if not result["chunks_count"]:
+                raise HTTPException(status_code=400, detail="No text content could be extracted from the PDF")
 
-        # Store documents in vector database
-        vector_store.add_documents(documents)
+            if result["status"] == "duplicate":
+                logger.info(f"Not saving {file.filename}: duplicate of {result['source']}")
+            else:
+                os.replace(staged_path, file_path)
+                logger.info(f"File saved to: {file_path}")
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
         processing_time = time.time() - start_time
 
-        logger.info(f"Successfully processed {file.filename}: {len(documents)} chunks in {processing_time:.2f}s")
+        logger.info(f"Successfully processed {file.filename}: {result['chunks_count']} chunks in {processing_time:.2f}s")
+
+        if result["status"] == "duplicate":
+            message = f"PDF content is identical to already processed {result['source']}; skipped processing"
+        elif result["status"] == "unchanged":
+            message = "PDF is unchanged since it was last processed; skipped processing"
+        else:
+            message = "PDF uploaded and processed successfully"
 
         return UploadResponse(
-            message="PDF uploaded and processed successfully",
+            message=message,
             filename=file.filename,
-            chunks_count=len(documents),
-            processing_time=processing_time
+            chunks_count=result["chunks_count"],
+            processing_time=processing_time,
+            status=result["status"],
+            new_chunks=result["new_chunks"],
+            skipped_chunks=result["skipped_chunks"],
+            deleted_chunks=result["deleted_chunks"],
+            timings=result.get("timings") if settings.enable_stage_timings else None,
+            tokens=result.get("tokens") if settings.enable_stage_timings else None
         )
 
     except HTTPException:
@@ -137,7 +380,7 @@ async def chat(request: ChatRequest):
             raise HTTPException(status_code=400, detail="Question cannot be empty")
 
         # Check if vector store has documents
-        doc_count = vector_store.get_document_count()
+        doc_count = await vector_store.run(vector_store.get_document_count)
         if doc_count == 0:
             raise HTTPException(
                 status_code=400,
@@ -146,16 +389,29 @@ async def chat(request: ChatRequest):
 
         logger.info(f"Processing chat request: '{request.question[:100]}...'")
 
-        # Use RAG pipeline to generate answer
-        result = rag_pipeline.generate_answer(
-            question=request.question,
-            chat_history=request.chat_history
-        )
+        # Use RAG pipeline to generate answer; identical in-flight requests share one execution
+        filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+
+        async def generate():
+            return await rag_pipeline.agenerate_answer(
+                question=request.question,
+                chat_history=request.chat_history,
+                filters=filters
+            )
+
+        if settings.enable_request_coalescing:
+            key = chat_request_key(request.question, request.chat_history, filters)
+            result = await chat_coalescer.run(key, generate)
+        else:
+            result = await generate()
 
         return ChatResponse(
             answer=result["answer"],
             sources=result["sources"],
-            processing_time=result["processing_time"]
+            processing_time=result["processing_time"],
+            cached=result.get("cached", False),
+            timings=result.get("timings") if settings.enable_stage_timings else None,
+            tokens=result.get("tokens") if settings.enable_stage_timings else None
         )
 
     except HTTPException:
@@ -165,12 +421,51 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Process chat request and stream the AI response as Server-Sent Events.
+
+    Events: ``sources`` once retrieval finishes, ``token`` for each answer
+    chunk, then ``done`` with processing_time and stage timings (or ``error``).
+    """
+    # Validate request
+    if not request.question or not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    # Check if vector store has documents
+    if await vector_store.run(vector_store.get_document_count) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="No documents have been uploaded yet. Please upload a PDF document first."
+        )
+
+    logger.info(f"Processing streaming chat request: '{request.question[:100]}...'")
+
+    events = rag_pipeline.stream_answer(
+        question=request.question,
+        chat_history=request.chat_history,
+        filters=request.filters.model_dump(exclude_none=True) if request.filters else None
+    )
+
+    def format_events():
+        for event in events:
+            name = event.pop("event")
+            yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+    # The generator is synchronous, so Starlette iterates it in a worker thread
+    return StreamingResponse(
+        format_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/documents")
 async def get_documents():
     """Get list of processed documents"""
     try:
         # Get document count from vector store
-        doc_count = vector_store.get_document_count()
+        doc_count = await vector_store.run(vector_store.get_document_count)
 
         # For now, we'll return basic info about processed documents
         # In a production system, you might want to store document metadata separately
@@ -204,7 +499,7 @@ async def get_chunks():
     try:
         # This is a simplified implementation
         # In a production system, you might want to implement pagination
-        doc_count = vector_store.get_document_count()
+        doc_count = await vector_store.run(vector_store.get_document_count)
 
         # Return basic chunk information
         return {
@@ -3,9 +3,17 @@ from pydantic import BaseModel
 from datetime import datetime
 
 
+class RetrievalFilters(BaseModel):
+    sources: Optional[List[str]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    fiscal_years: Optional[List[int]] = None
+
+
 class ChatRequest(BaseModel):
     question: str
     chat_history: Optional[List[Dict[str, str]]] = []
+    filters: Optional[RetrievalFilters] = None
 
 
 class DocumentSource(BaseModel):
@@ -19,6 +27,10 @@ class ChatResponse(BaseModel):
     answer: str
     sources: List[DocumentSource]
     processing_time: float
+    cached: bool = False
+    # Seconds per stage and LLM token counts, when ENABLE_STAGE_TIMINGS is on
+    timings: Optional[Dict[str, float]] = None
+    tokens: Optional[Dict[str, int]] = None
 
 
 class DocumentInfo(BaseModel):
@@ -37,6 +49,13 @@ class UploadResponse(BaseModel):
     filename: str
     chunks_count: int
     processing_time: float
+    status: str = "processed"
+    new_chunks: int = 0
+    skipped_chunks: int = 0
+    deleted_chunks: int = 0
+    # Seconds per ingest stage and tokens embedded, when ENABLE_STAGE_TIMINGS is on
+    timings: Optional[Dict[str, float]] = None
+    tokens: Optional[Dict[str, int]] = None
 
 
 class ChunkInfo(BaseModel):
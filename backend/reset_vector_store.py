@@ -17,6 +17,17 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Questions the sample financial documents can answer
+SAMPLE_QUESTIONS = [
+    "What is the total revenue?",
+    "What is the year-over-year operating profit growth rate?",
+    "What are the main cost items?",
+    "How is the cash flow situation?",
+    "What is the debt ratio?",
+    "What is the net profit margin?",
+    "What is the return on equity?",
+]
+
 def clear_vector_store():
     """Clear the existing vector store"""
     try:
@@ -175,13 +186,8 @@ def main():
     
     # Show what questions can now be answered
     logger.info("\n📋 You can now ask questions like:")
-    logger.info("• 'What is the total revenue?'")
-    logger.info("• 'What is the year-over-year operating profit growth rate?'")
-    logger.info("• 'What are the main cost items?'")
-    logger.info("• 'How is the cash flow situation?'")
-    logger.info("• 'What is the debt ratio?'")
-    logger.info("• 'What is the net profit margin?'")
-    logger.info("• 'What is the return on equity?'")
+    for question in SAMPLE_QUESTIONS:
+        logger.info(f"• '{question}'")
 
 if __name__ == "__main__":
     main()
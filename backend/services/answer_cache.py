@@ -0,0 +1,81 @@
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+
+# Paraphrases kept per scope; a scope rarely sees more than a handful
+_MAX_ENTRIES_PER_SCOPE = 16
+
+
+class SemanticAnswerCache:
+    """In-memory cache of generated answers looked up by question-embedding similarity.
+
+    Entries are grouped by a scope key (retrieved chunk IDs, index version,
+    chat history hash) and a question hits when its embedding has cosine
+    similarity >= ``similarity_threshold`` with a cached question in the same
+    scope. Scopes are evicted least recently used beyond ``max_entries``
+    and entries expire after ``ttl_seconds``. A max_entries of 0 disables it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self._scopes: "OrderedDict[Hashable, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: List[float], scope: Hashable) -> Optional[Any]:
+        """Return the cached value for the most similar question in scope, if similar enough"""
+        with self._lock:
+            now = time.monotonic()
+            entries = [entry for entry in self._scopes.get(scope, []) if entry[2] > now]
+            if entries:
+                self._scopes[scope] = entries
+                self._scopes.move_to_end(scope)
+                similarities = np.stack([vector for vector, _, _ in entries]) @ self._normalize(embedding)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self.hits += 1
+                    return entries[best][1]
+            elif scope in self._scopes:
+                del self._scopes[scope]
+
+            self.misses += 1
+            return None
+
+    def set(self, embedding: List[float], scope: Hashable, value: Any) -> None:
+        """Store a value for a question within a scope"""
+        if not self.max_entries:
+            return
+
+        with self._lock:
+            entries = self._scopes.setdefault(scope, [])
+            entries.append((self._normalize(embedding), value, time.monotonic() + self.ttl_seconds))
+            del entries[:-_MAX_ENTRIES_PER_SCOPE]
+            self._scopes.move_to_end(scope)
+            while len(self._scopes) > self.max_entries:
+                self._scopes.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters for logging and monitoring"""
+        total = self.hits + self.misses
+        return {
+            "scopes": len(self._scopes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else None
+        }
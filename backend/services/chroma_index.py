@@ -0,0 +1,144 @@
+from typing import List, Dict, Any, Optional, Tuple
+from langchain.schema import Document
+from config import settings
+import logging
+import os
+import chromadb
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+
+logger = logging.getLogger(__name__)
+
+
+class ChromaVectorIndex:
+    """ChromaDB collection behind the low-level index surface used by VectorStoreService.
+
+    Vectors are supplied by the caller (already embedded). query() converts
+    Chroma distances into cosine similarities, so scores are "higher is
+    better" like the NumPy backend's and share its similarity threshold.
+    """
+
+    def __init__(self, path: str, collection_name: str = "financial_documents"):
+        # Ensure vector store directory exists
+        os.makedirs(path, exist_ok=True)
+
+        # Initialize ChromaDB client
+        self.chroma_client = chromadb.PersistentClient(
+            path=path,
+            settings=ChromaSettings(
+                anonymized_telemetry=False,
+                allow_reset=True
+            )
+        )
+
+        # Initialize or get collection
+        self.collection_name = collection_name
+        try:
+            self.collection = self.chroma_client.get_collection(self.collection_name)
+            logger.info(f"Loaded existing collection: {self.collection_name}")
+        except Exception:
+            self._create_collection()
+            logger.info(f"Created new collection: {self.collection_name}")
+
+    def _create_collection(self) -> None:
+        self.collection = self.chroma_client.create_collection(
+            name=self.collection_name,
+            metadata={"description": "Financial statement documents", "hnsw:space": "cosine"}
+        )
+
+    def _similarity(self, distance: float) -> float:
+        """Cosine similarity from a Chroma distance in the collection's space"""
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "l2":
+            # Squared L2 between unit vectors is 2 - 2 * cos (collections created before cosine space)
+            return 1.0 - distance / 2.0
+        # cosine and ip distances are 1 - similarity
+        return 1.0 - distance
+
+    def _upsert_batch_size(self) -> int:
+        """Largest upsert Chroma accepts, capped by the configured batch size"""
+        client_max = None
+        try:
+            if hasattr(self.chroma_client, "get_max_batch_size"):
+                client_max = self.chroma_client.get_max_batch_size()
+            else:
+                client_max = getattr(self.chroma_client, "max_batch_size", None)
+        except Exception as e:
+            logger.debug(f"Could not read Chroma max batch size: {str(e)}")
+
+        if client_max:
+            return max(1, min(settings.chroma_upsert_batch_size, client_max))
+        return max(1, settings.chroma_upsert_batch_size)
+
+    def add(self, ids: List[str], embeddings: List[List[float]], texts: List[str],
+            metadatas: List[Dict[str, Any]]) -> None:
+        """Upsert pre-embedded documents in groups of Chroma's max batch size"""
+        batch_size = self._upsert_batch_size()
+        for i in range(0, len(ids), batch_size):
+            self.collection.upsert(
+                ids=ids[i:i + batch_size],
+                embeddings=embeddings[i:i + batch_size],
+                documents=texts[i:i + batch_size],
+                metadatas=metadatas[i:i + batch_size]
+            )
+
+    def query(self, embedding: List[float], k: int,
+              where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Return the k nearest documents with their similarities, restricted by a metadata where clause"""
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        return self._documents_with_scores(results)
+
+    def query_with_embeddings(self, embedding: List[float], k: int, where: Optional[Dict[str, Any]] = None
+                              ) -> Tuple[List[Tuple[Document, float]], np.ndarray]:
+        """Like query(), plus the stored embedding of each result (one row per result)"""
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances", "embeddings"]
+        )
+        return self._documents_with_scores(results), np.asarray(results["embeddings"][0], dtype=np.float32)
+
+    def _documents_with_scores(self, results: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        return [
+            (Document(page_content=text, metadata=metadata or {}), self._similarity(distance))
+            for text, metadata, distance in zip(
+                results["documents"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Stored embeddings by document ID; unknown IDs are omitted"""
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(results["ids"], results["embeddings"]))
+
+    def documents(self, batch_size: int = 1000) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """All stored (ids, texts, metadatas), read page by page"""
+        ids, texts, metadatas = [], [], []
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            texts.extend(page["documents"])
+            metadatas.extend(metadata or {} for metadata in page["metadatas"])
+            offset += len(page["ids"])
+        return ids, texts, metadatas
+
+    def delete(self, ids: List[str]) -> None:
+        self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def clear(self) -> None:
+        self.chroma_client.delete_collection(self.collection_name)
+        self._create_collection()
@@ -0,0 +1,23 @@
+import hashlib
+
+# Read files in 1 MiB blocks when hashing so large PDFs are never fully loaded
+_FILE_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a text string"""
+    return hash_bytes(text.encode("utf-8"))
+
+
+def hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(_FILE_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
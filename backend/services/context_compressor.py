@@ -0,0 +1,141 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langchain.schema import Document
+from services.lexical_index import tokenize
+import logging
+import math
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends followed by the start of a new sentence; decimals like "28.3" are not split
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"'$])")
+
+GAP_MARKER = "…"
+
+
+def split_segments(text: str) -> List[str]:
+    """Split a chunk into lines (table rows), and long lines into sentences"""
+    segments = []
+    for line in text.splitlines():
+        segments.extend(part.strip() for part in _SENTENCE_BOUNDARY.split(line.strip()) if part.strip())
+    return segments
+
+
+class ContextCompressor:
+    """Extractive compression of retrieved chunks to the segments relevant to a question.
+
+    Every segment of the chunks is scored against the question: IDF-weighted
+    query-term overlap, blended with ``embedding_weight`` of cosine similarity
+    between segment and question embeddings when an embedder is given. Each
+    chunk keeps its top ``keep_ratio`` segments plus ``neighbors`` segments on
+    either side, in their original order, with gaps marked. Chunks shorter than
+    ``min_chunk_chars``, and chunks where no segment relates to the question,
+    are kept whole.
+    """
+
+    def __init__(self, keep_ratio: float, neighbors: int, embedding_weight: float, min_chunk_chars: int):
+        self.keep_ratio = keep_ratio
+        self.neighbors = neighbors
+        self.embedding_weight = embedding_weight
+        self.min_chunk_chars = min_chunk_chars
+
+    def compress(self, question: str, documents: List[Tuple[Document, float]],
+                 embed_query: Optional[Callable[[str], List[float]]] = None,
+                 embed_documents: Optional[Callable[[List[str]], List[List[float]]]] = None
+                 ) -> Tuple[List[Tuple[Document, float]], Dict[str, Any]]:
+        """Return compressed (document, score) pairs and compression stats"""
+        chunk_segments = [
+            split_segments(doc.page_content) if len(doc.page_content) >= self.min_chunk_chars else []
+            for doc, _ in documents
+        ]
+        segments = [segment for chunk in chunk_segments for segment in chunk]
+        scores = self._score(question, segments, embed_query, embed_documents) if segments else np.zeros(0)
+
+        compressed = []
+        kept_segments = 0
+        offset = 0
+        for (doc, score), chunk in zip(documents, chunk_segments):
+            chunk_scores = scores[offset:offset + len(chunk)]
+            offset += len(chunk)
+            if len(chunk) < 2 or not chunk_scores.any():
+                compressed.append((doc, score))
+                kept_segments += len(chunk)
+                continue
+
+            keep = self._keep_mask(chunk_scores)
+            kept_segments += int(keep.sum())
+            compressed.append((Document(page_content=self._join(chunk, keep), metadata=doc.metadata), score))
+
+        chars_before = sum(len(doc.page_content) for doc, _ in documents)
+        chars_after = sum(len(doc.page_content) for doc, _ in compressed)
+        stats = {
+            "chunks": len(documents),
+            "segments": len(segments),
+            "kept_segments": kept_segments,
+            "chars_before": chars_before,
+            "chars_after": chars_after,
+            "ratio": chars_after / chars_before if chars_before else 1.0
+        }
+        return compressed, stats
+
+    def _score(self, question: str, segments: List[str],
+               embed_query: Optional[Callable[[str], List[float]]],
+               embed_documents: Optional[Callable[[List[str]], List[List[float]]]]) -> np.ndarray:
+        """Relevance of each segment to the question, in [0, 1]"""
+        scores = self._lexical_scores(question, segments)
+
+        if self.embedding_weight > 0 and embed_query is not None and embed_documents is not None:
+            try:
+                semantic = self._embedding_scores(embed_query(question), embed_documents(segments))
+                scores = (1 - self.embedding_weight) * scores + self.embedding_weight * semantic
+            except Exception as e:
+                logger.warning(f"Embedding scores unavailable for context compression, using lexical only: {str(e)}")
+
+        return scores
+
+    @staticmethod
+    def _lexical_scores(question: str, segments: List[str]) -> np.ndarray:
+        """Share of the question's IDF weight found in each segment"""
+        terms = sorted(set(tokenize(question)))
+        if not terms:
+            return np.zeros(len(segments), dtype=np.float32)
+
+        segment_tokens = [set(tokenize(segment)) for segment in segments]
+        presence = np.array([[term in tokens for term in terms] for tokens in segment_tokens], dtype=np.float32)
+        # Terms found in many segments (e.g. the fiscal year) say little about relevance
+        idf = np.log((len(segments) + 1) / (presence.sum(axis=0) + 0.5))
+        return presence @ idf / idf.sum()
+
+    @staticmethod
+    def _embedding_scores(question_embedding: List[float], segment_embeddings: List[List[float]]) -> np.ndarray:
+        """Cosine similarity to the question, min-max scaled to [0, 1]"""
+        matrix = np.asarray(segment_embeddings, dtype=np.float32)
+        query = np.asarray(question_embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        similarities = matrix @ query / np.where(norms == 0, 1, norms)
+        spread = similarities.max() - similarities.min()
+        return (similarities - similarities.min()) / spread if spread > 0 else np.zeros_like(similarities)
+
+    def _keep_mask(self, scores: np.ndarray) -> np.ndarray:
+        """Top segments with a positive score, widened by their neighbors"""
+        top = np.argsort(-scores, kind="stable")[:max(1, math.ceil(self.keep_ratio * len(scores)))]
+        selected = np.zeros(len(scores), dtype=bool)
+        selected[top] = scores[top] > 0
+
+        keep = selected.copy()
+        for shift in range(1, self.neighbors + 1):
+            keep[shift:] |= selected[:-shift]
+            keep[:-shift] |= selected[shift:]
+        return keep
+
+    @staticmethod
+    def _join(segments: List[str], keep: np.ndarray) -> str:
+        """Kept segments one per line, with a marker where segments were left out"""
+        lines = []
+        for index, segment in enumerate(segments):
+            if keep[index]:
+                lines.append(segment)
+            elif index == 0 or keep[index - 1]:
+                lines.append(GAP_MARKER)
+        return "\n".join(lines)
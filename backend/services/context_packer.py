@@ -0,0 +1,113 @@
+from typing import Dict, List, Tuple
+import math
+
+# Gemini and most BPE tokenizers average about four characters per English token
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " …"
+
+
+def estimate_tokens(text: str) -> int:
+    """Heuristic token count: about four characters per token, at least one per word"""
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / CHARS_PER_TOKEN), len(text.split()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens (estimated), at a word boundary, marking the cut"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    limit = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER)
+    while limit > 0:
+        cut = text[:limit]
+        space = cut.rfind(" ")
+        if space > limit // 2:
+            cut = cut[:space]
+        truncated = cut.rstrip() + TRUNCATION_MARKER
+        if estimate_tokens(truncated) <= max_tokens:
+            return truncated
+        limit = int(limit * 0.9)
+    return ""
+
+
+class ContextPacker:
+    """Fits retrieved sources and chat history into a prompt token budget.
+
+    The budget left after the fixed part of the prompt (templates and question)
+    goes to chat history first, at most ``history_share`` of it: the newest
+    ``max_history_turns`` turns, each cut to ``max_turn_tokens``. Sources get
+    the rest in retrieval rank order (scores are not comparable across
+    backends and retrieval modes, the ranking is). A source that does not fit
+    is trimmed when at least ``min_source_tokens`` are left, and dropped otherwise.
+    """
+
+    def __init__(self, max_prompt_tokens: int, history_share: float, max_history_turns: int,
+                 max_turn_tokens: int, min_source_tokens: int):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.history_share = history_share
+        self.max_history_turns = max_history_turns
+        self.max_turn_tokens = max_turn_tokens
+        self.min_source_tokens = min_source_tokens
+
+    def pack(self, sources: List[str], history: List[str],
+             fixed_tokens: int) -> Tuple[List[str], List[str], Dict[str, int]]:
+        """Select sources (texts, best ranked first) and history turns (oldest first).
+
+        Returns the kept source texts in rank order, the kept history
+        turns oldest first, and a report of tokens used per prompt section.
+        """
+        available = max(0, self.max_prompt_tokens - fixed_tokens)
+
+        packed_history = self._pack_history(history, int(available * self.history_share))
+        history_tokens = sum(estimate_tokens(turn) for turn in packed_history)
+
+        packed_sources, trimmed = self._pack_sources(sources, available - history_tokens)
+        source_tokens = sum(estimate_tokens(text) for text in packed_sources)
+
+        report = {
+            "budget": self.max_prompt_tokens,
+            "fixed": fixed_tokens,
+            "history": history_tokens,
+            "sources": source_tokens,
+            "total": fixed_tokens + history_tokens + source_tokens,
+            "history_turns": len(packed_history),
+            "history_turns_dropped": len(history) - len(packed_history),
+            "sources_used": len(packed_sources),
+            "sources_trimmed": trimmed,
+            "sources_dropped": len(sources) - len(packed_sources)
+        }
+        return packed_sources, packed_history, report
+
+    def _pack_history(self, history: List[str], budget: int) -> List[str]:
+        """Newest turns first until the budget runs out; returned oldest first"""
+        packed = []
+        remaining = budget
+        for turn in reversed(history[-self.max_history_turns:] if self.max_history_turns > 0 else []):
+            turn = truncate_to_tokens(turn, min(self.max_turn_tokens, remaining))
+            if not turn:
+                break
+            packed.append(turn)
+            remaining -= estimate_tokens(turn)
+        packed.reverse()
+        return packed
+
+    def _pack_sources(self, sources: List[str], budget: int) -> Tuple[List[str], int]:
+        """Greedy in rank order: keep, trim or drop each source; returns kept texts in rank order"""
+        kept = []
+        trimmed = 0
+        remaining = budget
+        for text in sources:
+            tokens = estimate_tokens(text)
+            if tokens > remaining:
+                if remaining < self.min_source_tokens:
+                    # A smaller, lower-ranked source may still fit in full
+                    continue
+                text = truncate_to_tokens(text, remaining)
+                tokens = estimate_tokens(text)
+                trimmed += 1
+            kept.append(text)
+            remaining -= tokens
+        return kept, trimmed
@@ -0,0 +1,153 @@
+from typing import List, Dict, Optional
+from array import array
+from langchain.embeddings.base import Embeddings
+from config import settings
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH_SIZE = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper backed by a persistent, size-bounded LRU cache on disk.
+
+    Vectors are keyed by (model name, document/query, SHA-256 of the text), so
+    repeated boilerplate, re-uploads and collection rebuilds never re-embed the
+    same text, and duplicate texts within one batch are embedded once.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, path: str = None, max_entries: int = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = path or settings.embedding_cache_path
+        self.max_entries = max_entries if max_entries is not None else settings.embedding_cache_max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.batch_duplicates = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+        logger.info(f"Embedding cache at {self.path} for {model_name} (max_entries={self.max_entries})")
+
+    def _key(self, kind: str, text: str) -> str:
+        # Query and document embeddings differ for some providers (e.g. Gemini task types)
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for keys and mark them as recently used"""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _SQL_BATCH_SIZE):
+                batch = keys[i:i + _SQL_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, entries: Dict[str, List[float]]) -> None:
+        """Persist new vectors and evict least recently used entries over the size bound"""
+        if not entries:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in entries.items()]
+            )
+
+            overflow = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                logger.debug(f"Evicted {overflow} embeddings from cache")
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only sending uncached unique texts to the wrapped model"""
+        if not texts:
+            return []
+
+        keys = [self._key("document", text) for text in texts]
+        unique = dict(zip(keys, texts))
+        cached = self._lookup(list(unique))
+
+        missing_keys = [key for key in unique if key not in cached]
+        if missing_keys:
+            vectors = self.embeddings.embed_documents([unique[key] for key in missing_keys])
+            new_entries = dict(zip(missing_keys, vectors))
+            self._store(new_entries)
+            cached.update(new_entries)
+
+        self.hits += len(unique) - len(missing_keys)
+        self.misses += len(missing_keys)
+        self.batch_duplicates += len(texts) - len(unique)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, serving repeated queries from the cache"""
+        key = self._key("query", text)
+        cached = self._lookup([key])
+        if key in cached:
+            self.hits += 1
+            return cached[key]
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query; SQLite access runs in a worker thread"""
+        key = self._key("query", text)
+        cached = await asyncio.to_thread(self._lookup, [key])
+        if key in cached:
+            self.hits += 1
+            return cached[key]
+
+        self.misses += 1
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self._store, {key: vector})
+        return vector
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters for logging and monitoring"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "batch_duplicates": self.batch_duplicates,
+            "hit_ratio": self.hits / total if total else None
+        }
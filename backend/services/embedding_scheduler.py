@@ -0,0 +1,144 @@
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from langchain.embeddings.base import Embeddings
+from services.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_CALLS
+from config import settings
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Substrings identifying quota / rate-limit errors across providers (Gemini raises ResourceExhausted / 429)
+_RATE_LIMIT_MARKERS = ("429", "quota", "rate limit", "ratelimit", "resource exhausted", "resourceexhausted", "too many requests")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if an exception looks like a provider quota / rate-limit error"""
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _RATE_LIMIT_MARKERS)
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting request rate; a rate of 0 disables limiting"""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: float) -> float:
+        """Take `tokens` if available and return 0, otherwise return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        """Wait without blocking the event loop until `tokens` are available"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class BatchEmbedder(Embeddings):
+    """Embeddings wrapper that embeds documents in fixed-size batches over a bounded thread pool.
+
+    Each batch request goes through a token-bucket limiter and is retried with
+    exponential backoff when the provider reports a quota / rate-limit error.
+    Results are returned in input order.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = None, max_concurrency: int = None,
+                 requests_per_second: float = None, max_retries: int = None, retry_backoff: float = None):
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size or settings.embedding_batch_size)
+        self.max_concurrency = max(1, max_concurrency or settings.embedding_max_concurrency)
+        self.max_retries = max_retries if max_retries is not None else settings.embedding_max_retries
+        self.retry_backoff = retry_backoff if retry_backoff is not None else settings.embedding_retry_backoff
+        self.limiter = TokenBucket(
+            requests_per_second if requests_per_second is not None else settings.embedding_requests_per_second
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding")
+
+        logger.info(
+            f"BatchEmbedder initialized with batch_size={self.batch_size}, "
+            f"max_concurrency={self.max_concurrency}, requests_per_second={self.limiter.rate}"
+        )
+
+    def _call_with_retry(self, func, *args):
+        """Rate-limit a provider call and retry it with backoff on quota errors"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return func(*args)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                logger.warning(f"Embedding rate limited ({str(e)[:100]}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in concurrent batches, preserving input order"""
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        for batch in batches:
+            EMBEDDING_CALLS.inc(kind="documents")
+            EMBEDDING_BATCH_SIZE.observe(len(batch))
+
+        if len(batches) == 1:
+            return self._call_with_retry(self.embeddings.embed_documents, batches[0])
+
+        vectors = []
+        for batch_vectors in self._executor.map(
+            lambda batch: self._call_with_retry(self.embeddings.embed_documents, batch), batches
+        ):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query through the same limiter"""
+        EMBEDDING_CALLS.inc(kind="query")
+        return self._call_with_retry(self.embeddings.embed_query, text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query with the same rate limiting and quota retries"""
+        EMBEDDING_CALLS.inc(kind="query")
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async()
+            try:
+                return await self.embeddings.aembed_query(text)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                logger.warning(f"Embedding rate limited ({str(e)[:100]}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
@@ -0,0 +1,124 @@
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+import asyncio
+import logging
+import random
+import time
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words vectors (signed feature hashing); no model, key or network needed.
+
+    Texts sharing words get similar vectors, so retrieval still behaves
+    plausibly under load tests, and the same text always maps to the same vector.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in text.lower().split():
+            digest = zlib.crc32(token.encode("utf-8"))
+            vector[digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that streams a canned answer with simulated provider latency.
+
+    The answer is built from the prompt (an acknowledgement of the question
+    followed by words of the context), so it is the same for the same prompt.
+    Timing is ``first_token_ms`` before the first token and ``token_ms`` per
+    following token, each scaled by a random factor in [1 - jitter, 1 + jitter]
+    from a generator seeded with ``seed`` and the prompt. Usage metadata is
+    reported like a real provider's (whitespace tokens).
+    """
+
+    output_tokens: int = 80
+    first_token_ms: float = 200.0
+    token_ms: float = 20.0
+    jitter: float = 0.2
+    seed: int = 42
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _prompt(self, messages: List[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _answer_tokens(self, prompt: str) -> List[str]:
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+        questions = [line[len("Question:"):].strip() for line in lines if line.startswith("Question:")]
+        question = questions[-1] if questions else (lines[-1] if lines else "")
+        # Quote the retrieved context when there is one, like a grounded answer would
+        context = prompt[prompt.find("Source 1"):] if "Source 1" in prompt else prompt
+        filler = context.split() or ["No", "context."]
+
+        tokens = f"Simulated answer to '{question[:200]}':".split()
+        while len(tokens) < self.output_tokens:
+            tokens.extend(filler[:self.output_tokens - len(tokens)])
+        return [token + " " for token in tokens[:self.output_tokens]]
+
+    def _delays(self, prompt: str, count: int) -> List[float]:
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+        base = [self.first_token_ms] + [self.token_ms] * (count - 1)
+        return [ms / 1000 * (1 + rng.uniform(-self.jitter, self.jitter)) for ms in base]
+
+    def _usage(self, prompt: str, tokens: List[str]) -> dict:
+        input_tokens = len(prompt.split())
+        return {"input_tokens": input_tokens, "output_tokens": len(tokens),
+                "total_tokens": input_tokens + len(tokens)}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt(messages)
+        tokens = self._answer_tokens(prompt)
+        time.sleep(sum(self._delays(prompt, len(tokens))))
+        message = AIMessage(content="".join(tokens).strip(), usage_metadata=self._usage(prompt, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt(messages)
+        tokens = self._answer_tokens(prompt)
+        await asyncio.sleep(sum(self._delays(prompt, len(tokens))))
+        message = AIMessage(content="".join(tokens).strip(), usage_metadata=self._usage(prompt, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        prompt = self._prompt(messages)
+        tokens = self._answer_tokens(prompt)
+        for token, delay in zip(tokens, self._delays(prompt, len(tokens))):
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = self._prompt(messages)
+        tokens = self._answer_tokens(prompt)
+        for token, delay in zip(tokens, self._delays(prompt, len(tokens))):
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
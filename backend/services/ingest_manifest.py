@@ -0,0 +1,100 @@
+from typing import Dict, Any, Optional
+from config import settings
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "ingest_manifest.json"
+
+# Version of the chunking and chunk metadata the pipeline produces. Bump it whenever
+# chunks gain or change metadata (e.g. fiscal-year flags, MinHash signatures), so files
+# recorded under an older version are re-processed instead of reported as unchanged.
+# Records written before versioning have no "version" and count as 1.
+INGEST_VERSION = 2
+
+
+class IngestManifest:
+    """Persistent record of the file, page and chunk hashes of every ingested PDF.
+
+    Layout::
+
+        {"files": {"<source>": {"file_hash": "...", "version": INGEST_VERSION,
+                                "pages": {"<page>": {"hash": "...",
+                                                     "chunks": {"<chunk_id>": "<chunk_hash>"}}}}}}
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(settings.vector_db_path, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """(Re)load the manifest from disk; a missing or corrupt file yields an empty manifest"""
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._files = json.load(f).get("files", {})
+            except FileNotFoundError:
+                self._files = {}
+            except Exception as e:
+                logger.warning(f"Could not read ingest manifest {self.path}: {str(e)}, starting empty")
+                self._files = {}
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk"""
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"files": self._files}, f)
+            os.replace(tmp_path, self.path)
+
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        """Return the record for a source filename, if it was ingested before"""
+        with self._lock:
+            return self._files.get(source)
+
+    def set(self, source: str, record: Dict[str, Any]) -> None:
+        """Replace the record for a source filename"""
+        with self._lock:
+            self._files[source] = record
+
+    def remove(self, source: str) -> None:
+        """Forget a source filename"""
+        with self._lock:
+            self._files.pop(source, None)
+
+    def find_source_by_hash(self, file_hash: str) -> Optional[str]:
+        """Return the source already ingested with identical file content, if any"""
+        with self._lock:
+            for source, record in self._files.items():
+                if record.get("file_hash") == file_hash:
+                    return source
+        return None
+
+    def clear(self) -> None:
+        """Forget every source and remove the manifest file"""
+        with self._lock:
+            self._files = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    @staticmethod
+    def is_current(record: Optional[Dict[str, Any]]) -> bool:
+        """Whether a source record was written by the current INGEST_VERSION"""
+        return bool(record) and record.get("version", 1) == INGEST_VERSION
+
+    @staticmethod
+    def chunk_ids(record: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Flatten a source record into {chunk_id: chunk_hash}"""
+        if not record:
+            return {}
+
+        chunks = {}
+        for page in record.get("pages", {}).values():
+            chunks.update(page.get("chunks", {}))
+        return chunks
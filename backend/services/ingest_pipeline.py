@@ -0,0 +1,229 @@
+from typing import List, Dict, Any, Optional, Set
+from queue import Queue, Full
+from langchain.schema import Document
+from services.pdf_processor import PDFProcessor
+from services.vector_store import VectorStoreService
+from services.ingest_manifest import INGEST_VERSION, IngestManifest
+from services.content_hash import hash_file
+from services.stage_timer import StageTimer, span, use_timer
+from services.metrics import UPLOAD_SECONDS, UPLOAD_STAGE_SECONDS, observe_stages
+from config import settings
+import contextvars
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the chunk stream on the queue
+_END_OF_STREAM = object()
+
+
+class IngestPipeline:
+    def __init__(self, pdf_processor: PDFProcessor, vector_store_service: VectorStoreService):
+        """Initialize streaming ingest pipeline (extract -> chunk -> embed/upsert)"""
+        self.pdf_processor = pdf_processor
+        self.vector_store = vector_store_service
+        self.batch_size = max(1, settings.ingest_batch_size)
+        self.queue_size = max(1, settings.ingest_queue_size)
+        self.manifest = IngestManifest()
+        # Ingests run one at a time: each diffs against the shared manifest from load() to save(),
+        # so a concurrent run could reload over its unsaved record or diff against the same old one
+        self._ingest_lock = threading.Lock()
+        # Queue of the running ingest, read by the metrics scrape
+        self._chunk_queue: Optional[Queue] = None
+        logger.info(f"IngestPipeline initialized with batch_size={self.batch_size}, queue_size={self.queue_size}")
+
+    def run(self, file_path: str) -> Dict[str, Any]:
+        """Incrementally stream a PDF into the vector store and return an ingest summary.
+
+        Extraction and chunking run in a producer thread feeding a bounded queue;
+        the calling thread drains it and embeds/upserts fixed-size batches, so
+        peak memory is bounded by the queue and batch sizes rather than the PDF
+        size, and early chunks are searchable before the last page is read.
+
+        File, page and chunk hashes recorded in the ingest manifest let a re-upload
+        skip identical files (under any name), skip extraction of unchanged pages,
+        skip embedding of unchanged chunks and delete chunks that disappeared.
+        Files recorded by an older INGEST_VERSION are re-processed in full.
+        Concurrent calls are serialized.
+
+        The summary includes seconds per stage (hash, extract, split, embed,
+        upsert) and the number of tokens embedded.
+        """
+        start = time.perf_counter()
+        timer = StageTimer()
+        with use_timer(timer), self._ingest_lock:
+            summary = self._ingest(file_path)
+        summary["timings"] = timer.timings()
+        summary["tokens"] = timer.token_counts()
+        UPLOAD_SECONDS.observe(time.perf_counter() - start, status=summary["status"])
+        observe_stages(UPLOAD_STAGE_SECONDS, summary["timings"])
+        return summary
+
+    def queue_depth(self) -> int:
+        """Chunks produced but not yet embedded by the running ingest (0 when idle)"""
+        chunk_queue = self._chunk_queue
+        return chunk_queue.qsize() if chunk_queue is not None else 0
+
+    def _ingest(self, file_path: str) -> Dict[str, Any]:
+        """Body of run(), reporting stage timings into the active StageTimer"""
+        start_time = time.time()
+        source = os.path.basename(file_path)
+
+        # Re-read so changes made elsewhere (e.g. clear_collection) are seen
+        self.manifest.load()
+        with span("hash"):
+            file_hash = hash_file(file_path)
+
+        existing_source = self.manifest.find_source_by_hash(file_hash)
+        # The same file ingested by an older pipeline version lacks newer chunk metadata
+        if existing_source == source and not IngestManifest.is_current(self.manifest.get(source)):
+            logger.info(f"Re-processing {source}: ingested by an older pipeline version")
+            existing_source = None
+        if existing_source:
+            chunks_count = len(IngestManifest.chunk_ids(self.manifest.get(existing_source)))
+            status = "unchanged" if existing_source == source else "duplicate"
+            logger.info(f"Skipping {source}: identical content already ingested as {existing_source}")
+            return self._summary(status, existing_source, chunks_count, skipped=chunks_count)
+
+        previous = self.manifest.get(source)
+        previous_chunks = IngestManifest.chunk_ids(previous)
+        # Only pages and chunks from the current version can be reused; older ones are rebuilt
+        # and upserted over their previous IDs, and previous_chunks still finds the stale ones
+        reusable = previous if IngestManifest.is_current(previous) else None
+        previous_pages = reusable.get("pages", {}) if reusable else {}
+        reusable_chunks = IngestManifest.chunk_ids(reusable)
+
+        # Pages whose raw content stream is unchanged keep their chunks without re-extraction
+        with span("hash"):
+            page_hashes = self.pdf_processor.hash_pages(file_path)
+        new_pages: Dict[str, Dict[str, Any]] = {}
+        for page_num, page_hash in page_hashes.items():
+            previous_page = previous_pages.get(str(page_num))
+            if previous_page and previous_page.get("hash") == page_hash:
+                new_pages[str(page_num)] = previous_page
+        unchanged_pages = {int(page_num) for page_num in new_pages}
+        skipped_chunks = sum(len(page["chunks"]) for page in new_pages.values())
+
+        for page_num, page_hash in page_hashes.items():
+            new_pages.setdefault(str(page_num), {"hash": page_hash, "chunks": {}})
+
+        if unchanged_pages:
+            logger.info(f"{len(unchanged_pages)} of {len(page_hashes)} pages unchanged in {source}, skipping extraction")
+
+        chunk_queue: Queue = Queue(maxsize=self.queue_size)
+        self._chunk_queue = chunk_queue
+        stop_event = threading.Event()
+        producer_errors: List[Exception] = []
+        producer_stats = {"skipped_chunks": 0}
+
+        # The producer runs in a copy of this context so its extract/split spans reach the same timer
+        producer = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._produce_chunks, file_path, unchanged_pages, new_pages, reusable_chunks, producer_stats,
+                  chunk_queue, stop_event, producer_errors),
+            name="ingest-producer",
+            daemon=True
+        )
+        producer.start()
+
+        new_chunks = 0
+        batch: List[Document] = []
+
+        try:
+            while True:
+                item = chunk_queue.get()
+                if item is _END_OF_STREAM:
+                    break
+
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self.vector_store.add_documents(batch)
+                    new_chunks += len(batch)
+                    batch = []
+
+            if producer_errors:
+                raise producer_errors[0]
+
+            if batch:
+                self.vector_store.add_documents(batch)
+                new_chunks += len(batch)
+
+        finally:
+            # Unblock the producer if we are bailing out early
+            stop_event.set()
+            producer.join()
+            self._chunk_queue = None
+
+        skipped_chunks += producer_stats["skipped_chunks"]
+        record = {"file_hash": file_hash, "version": INGEST_VERSION, "pages": new_pages}
+        current_chunks = IngestManifest.chunk_ids(record)
+
+        # Chunks from the previous version that no longer exist
+        stale_ids = [chunk_id for chunk_id in previous_chunks if chunk_id not in current_chunks]
+        if stale_ids:
+            self.vector_store.delete_documents(stale_ids)
+
+        if current_chunks:
+            self.manifest.set(source, record)
+        else:
+            self.manifest.remove(source)
+        self.manifest.save()
+
+        logger.info(
+            f"Ingested {source} in {time.time() - start_time:.2f}s: {new_chunks} chunks embedded, "
+            f"{skipped_chunks} unchanged, {len(stale_ids)} deleted"
+        )
+        status = "updated" if previous else "processed"
+        return self._summary(status, source, len(current_chunks), new=new_chunks,
+                             skipped=skipped_chunks, deleted=len(stale_ids))
+
+    @staticmethod
+    def _summary(status: str, source: str, chunks_count: int, new: int = 0,
+                 skipped: int = 0, deleted: int = 0) -> Dict[str, Any]:
+        """Build the ingest summary returned to the upload endpoint"""
+        return {
+            "status": status,
+            "source": source,
+            "chunks_count": chunks_count,
+            "new_chunks": new,
+            "skipped_chunks": skipped,
+            "deleted_chunks": deleted
+        }
+
+    def _produce_chunks(self, file_path: str, unchanged_pages: Set[int], new_pages: Dict[str, Dict[str, Any]],
+                        previous_chunks: Dict[str, str], stats: Dict[str, int], chunk_queue: Queue,
+                        stop_event: threading.Event, errors: List[Exception]) -> None:
+        """Producer thread: extract changed pages, split them and queue chunks whose content changed"""
+        try:
+            pages = self.pdf_processor.iter_pages(file_path, skip_pages=unchanged_pages)
+            for document in self.pdf_processor.iter_chunks(pages):
+                metadata = document.metadata
+                page_record = new_pages.setdefault(str(metadata["page"]), {"hash": None, "chunks": {}})
+                page_record["chunks"][metadata["chunk_id"]] = metadata["content_hash"]
+
+                # Same chunk_id with the same content is already stored
+                if previous_chunks.get(metadata["chunk_id"]) == metadata["content_hash"]:
+                    stats["skipped_chunks"] += 1
+                    continue
+
+                if not self._put(chunk_queue, document, stop_event):
+                    return
+        except Exception as e:
+            logger.error(f"Error streaming chunks from {file_path}: {str(e)}")
+            errors.append(e)
+        finally:
+            self._put(chunk_queue, _END_OF_STREAM, stop_event)
+
+    @staticmethod
+    def _put(chunk_queue: Queue, item, stop_event: threading.Event) -> bool:
+        """Put with back-pressure; returns False if the consumer has stopped"""
+        while not stop_event.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
@@ -0,0 +1,177 @@
+from typing import List, Dict, Any, Optional, Tuple
+from collections import Counter
+from langchain.schema import Document
+from services.retrieval_filters import matches_where
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Words, and numbers with thousands separators / decimals kept whole ("1,200,000", "28.3", "2024")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what "
+    "which with how".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word / number tokens used for both indexing and querying"""
+    return [
+        token.replace(",", "") for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+class BM25Index:
+    """Persistent in-process inverted index scored with Okapi BM25.
+
+    Mutations are appended to a JSONL operation log that is replayed on load
+    and rewritten as a snapshot once it grows to twice the live document count.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._log_entries = 0
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        with self._lock, open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted write
+                    logger.warning(f"Skipping corrupt entry in lexical index log {self.path}")
+                self._log_entries += 1
+        logger.info(f"Loaded lexical index with {len(self._docs)} documents from {self.path}")
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        op = entry["op"]
+        if op == "add":
+            self._index(entry["id"], entry["text"], entry["metadata"])
+        elif op == "delete":
+            self._unindex(entry["id"])
+        elif op == "clear":
+            self._reset()
+
+    def _index(self, doc_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        self._unindex(doc_id)
+        term_counts = Counter(tokenize(text))
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        length = sum(term_counts.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        self._docs[doc_id] = {"text": text, "metadata": metadata}
+
+    def _unindex(self, doc_id: str) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+
+        for term in set(tokenize(doc["text"])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+
+    def _append_log(self, entries: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        self._log_entries += len(entries)
+
+        if self._log_entries > 2 * max(len(self._docs), 1000):
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """Rewrite the log as one add entry per live document"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc_id, doc in self._docs.items():
+                f.write(json.dumps({"op": "add", "id": doc_id, "text": doc["text"], "metadata": doc["metadata"]}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._log_entries = len(self._docs)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Index documents, replacing any existing documents with the same IDs"""
+        with self._lock:
+            entries = [
+                {"op": "add", "id": doc_id, "text": text, "metadata": metadata}
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            ]
+            for entry in entries:
+                self._apply(entry)
+            self._append_log(entries)
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            entries = [{"op": "delete", "id": doc_id} for doc_id in ids]
+            for entry in entries:
+                self._apply(entry)
+            self._append_log(entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._log_entries = 0
+
+    def count(self) -> int:
+        return len(self._docs)
+
+    def search(self, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Return the top-k documents by BM25 score, restricted by a metadata where clause"""
+        with self._lock:
+            doc_count = len(self._docs)
+            if not doc_count or k <= 0:
+                return []
+
+            average_length = self._total_length / doc_count
+            scores: Dict[str, float] = {}
+            allowed: Dict[str, bool] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, term_frequency in postings.items():
+                    if where:
+                        if doc_id not in allowed:
+                            allowed[doc_id] = matches_where(self._docs[doc_id]["metadata"], where)
+                        if not allowed[doc_id]:
+                            continue
+                    length_norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * term_frequency * (self.k1 + 1) / (
+                        term_frequency + length_norm
+                    )
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                (Document(page_content=self._docs[doc_id]["text"], metadata=self._docs[doc_id]["metadata"]), score)
+                for doc_id, score in top
+            ]
@@ -0,0 +1,244 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import bisect
+import logging
+import math
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds: sub-millisecond cache hits up to slow LLM calls and large uploads
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+# (labels, value) pairs of one metric family, as returned by collectors
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    """A metric family with fixed label names; children are created per label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_child(self._labels(key), value))
+        return lines
+
+    def _render_child(self, labels: Dict[str, str], value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. requests in flight)"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        if "le" in self.labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                # Per-bucket (non-cumulative) counts, the +Inf overflow last, then sum
+                child = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            child[index] += 1
+            child[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            child = self._values.get(self._key(labels))
+            return sum(child[:-1]) if child else 0
+
+    def _render_child(self, labels: Dict[str, str], child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child[:-1]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(child[-1])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format.
+
+    Metrics updated in code are registered with counter/gauge/histogram.
+    Values that already live in services (cache hit counters, vector store
+    size) are read at scrape time by collectors, so the hot path pays nothing
+    for them.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Samples]]]) -> None:
+        """Add a scrape-time callback yielding (name, type, help, samples) per metric family"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "rag_http_requests_total", "HTTP requests by route, method and status code", ("path", "method", "status"))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "rag_http_request_duration_seconds", "HTTP request latency until the response starts", ("path", "method"))
+HTTP_IN_FLIGHT = registry.gauge(
+    "rag_http_requests_in_flight", "HTTP requests currently being processed", ("path",))
+
+CHAT_SECONDS = registry.histogram(
+    "rag_chat_duration_seconds", "Answer generation latency per pipeline run", ("mode",))
+CHAT_STAGE_SECONDS = registry.histogram(
+    "rag_chat_stage_duration_seconds", "Answer generation latency per stage", ("stage",))
+UPLOAD_SECONDS = registry.histogram(
+    "rag_upload_duration_seconds", "PDF ingest latency per upload", ("status",))
+UPLOAD_STAGE_SECONDS = registry.histogram(
+    "rag_upload_stage_duration_seconds", "PDF ingest latency per stage", ("stage",))
+
+LLM_CALLS = registry.counter(
+    "rag_llm_calls_total", "LLM calls by outcome (success, error)", ("outcome",))
+LLM_TOKENS = registry.counter(
+    "rag_llm_tokens_total", "LLM tokens by direction (input, output)", ("kind",))
+FALLBACK_RESPONSES = registry.counter(
+    "rag_fallback_responses_total", "Answers produced by the keyword fallback instead of the LLM")
+
+EMBEDDING_CALLS = registry.counter(
+    "rag_embedding_calls_total", "Embedding provider calls (after caching) by kind (documents, query)", ("kind",))
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "rag_embedding_batch_size", "Texts per embedding provider call", buckets=BATCH_SIZE_BUCKETS)
+
+
+def observe_stages(histogram: Histogram, timings: Dict[str, float]) -> None:
+    """Record a StageTimer breakdown into a per-stage histogram"""
+    for stage, seconds in timings.items():
+        histogram.observe(seconds, stage=stage)
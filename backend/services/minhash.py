@@ -0,0 +1,93 @@
+from typing import List, Optional
+from config import settings
+import base64
+import zlib
+import numpy as np
+
+# Mersenne prime 2^31 - 1: with 32-bit shingle hashes, a * h + b stays below 2^63
+_PRIME = np.uint64((1 << 31) - 1)
+_SEED = 20240601
+
+
+def _permutations(num_perm: int):
+    """Fixed (a, b) coefficients of the universal hash family, identical across processes"""
+    rng = np.random.RandomState(_SEED)
+    a = rng.randint(1, (1 << 31) - 1, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, (1 << 31) - 1, size=num_perm).astype(np.uint64)
+    return a, b
+
+
+_PERMUTATION_CACHE = {}
+
+
+def _normalize(text: str) -> str:
+    """Same normalization as the SequenceMatcher comparison: lowercase, collapsed whitespace"""
+    return ' '.join(text.lower().split())
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    normalized = _normalize(text)
+    if len(normalized) <= shingle_size:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + shingle_size] for i in range(len(normalized) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def compute_signature(text: str, num_perm: int = None, shingle_size: int = None) -> np.ndarray:
+    """MinHash signature over character shingles of the normalized text"""
+    num_perm = num_perm or settings.minhash_num_perm
+    shingle_size = shingle_size or settings.minhash_shingle_size
+    if num_perm not in _PERMUTATION_CACHE:
+        _PERMUTATION_CACHE[num_perm] = _permutations(num_perm)
+    a, b = _PERMUTATION_CACHE[num_perm]
+
+    hashes = _shingle_hashes(text, shingle_size)
+    # (num_perm, shingles) matrix of permuted hashes, min over shingles
+    return ((a[:, None] * hashes[None, :] + b[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def encode_signature(signature: np.ndarray) -> str:
+    """Compact string form for chunk metadata (Chroma metadata values must be scalars)"""
+    return base64.b64encode(signature.astype("<u4").tobytes()).decode("ascii")
+
+
+def decode_signature(encoded: Optional[str]) -> Optional[np.ndarray]:
+    if not encoded:
+        return None
+    try:
+        return np.frombuffer(base64.b64decode(encoded), dtype="<u4")
+    except (ValueError, TypeError):
+        return None
+
+
+def signature_for(text: str, encoded: Optional[str] = None) -> np.ndarray:
+    """Stored signature when it matches the configured size, otherwise computed from the text"""
+    signature = decode_signature(encoded)
+    if signature is None or len(signature) != settings.minhash_num_perm:
+        signature = compute_signature(text)
+    return signature
+
+
+def estimated_similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated similarity of one signature to each row of ``others``.
+
+    The fraction of matching MinHash values estimates the Jaccard index J of
+    the shingle sets; it is reported as the Dice coefficient 2J / (1 + J),
+    which like ``SequenceMatcher.ratio()`` is 2 * matches / total size, so
+    ``content_similarity_threshold`` keeps the same meaning.
+    """
+    jaccard = (np.atleast_2d(others) == signature).mean(axis=1)
+    return 2 * jaccard / (1 + jaccard)
+
+
+def find_duplicates(signatures: List[np.ndarray], threshold: float) -> List[bool]:
+    """Greedy pass: mark each signature that is too similar to an earlier kept one"""
+    kept: List[np.ndarray] = []
+    duplicates = []
+    for signature in signatures:
+        is_duplicate = bool(kept) and bool(estimated_similarity(signature, np.stack(kept)).max() >= threshold)
+        duplicates.append(is_duplicate)
+        if not is_duplicate:
+            kept.append(signature)
+    return duplicates
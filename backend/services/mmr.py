@@ -0,0 +1,41 @@
+from typing import List
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(query_embedding: List[float], candidate_embeddings: np.ndarray, k: int,
+               lambda_mult: float = 0.5) -> List[int]:
+    """Pick k candidate indices by maximal marginal relevance.
+
+    Each step takes the candidate maximizing
+    ``lambda * sim(query, c) - (1 - lambda) * max(sim(c, selected))``.
+    Cosine similarities to the query and between all candidates are computed
+    once as matrix products; each selection step is then a vectorized
+    argmax plus a running elementwise maximum.
+    """
+    candidates = _normalize(np.asarray(candidate_embeddings, dtype=np.float32))
+    if not len(candidates) or k <= 0:
+        return []
+
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, len(candidates)):
+        marginal = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        marginal[~available] = -np.inf
+        chosen = int(np.argmax(marginal))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(redundancy, pairwise[chosen], out=redundancy)
+
+    return selected
@@ -0,0 +1,382 @@
+from typing import List, Dict, Any, Optional, Tuple
+from langchain.schema import Document
+from services.vector_quantization import VectorCodec
+from services.retrieval_filters import matches_where
+from config import settings
+import json
+import logging
+import os
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "state.json"
+PROJECTION_FILE = "projection.npz"
+
+
+class NumpyVectorIndex:
+    """Exact cosine-similarity search over a memory-mapped float32 matrix.
+
+    Files under ``path``:
+
+    - ``vectors.<generation>.f32``: append-only segment of unit-normalized float32 rows
+    - ``records.<generation>.jsonl``: one ``{"id", "text", "metadata"}`` line per row, same order
+    - ``state.json``: ``{"generation", "dim", "rows", "tombstones"}``, replaced atomically
+      on every change; segment bytes past ``rows`` are a torn write and ignored
+    - ``projection.npz``: the fitted PCA projection, when PCA dimensions are configured
+
+    Re-adding or deleting an ID tombstones its old row, and the segment is
+    compacted into a new generation once tombstones reach
+    ``numpy_compaction_ratio`` of all rows.
+    The segment is opened read-only with ``np.memmap`` so several worker
+    processes share the same page cache; one writer process is assumed, and
+    readers re-map whenever ``state.json`` is replaced.
+
+    With a non-float32 storage dtype or PCA dimensions configured, search
+    first scores compact in-memory codes (see ``VectorCodec``) and then
+    re-scores the top ``k * rescore_factor`` candidates against the
+    full-precision rows, which are only paged in for those candidates.
+    The codes cut the bytes scanned per query, not the index footprint: the
+    float32 segment stays on disk for re-scoring and the codes are held in
+    memory next to it.
+    Codes are derived from the segment and rebuilt on load; the PCA projection
+    is persisted and only refitted when ``VectorCodec.needs_fit`` says so.
+    """
+
+    def __init__(self, path: str, compaction_ratio: float = None, codec: VectorCodec = None,
+                 rescore_factor: int = None):
+        self.path = path
+        self.compaction_ratio = (
+            compaction_ratio if compaction_ratio is not None else settings.numpy_compaction_ratio
+        )
+        self.codec = codec or VectorCodec(settings.vector_storage_dtype, settings.vector_pca_dims)
+        self.rescore_factor = max(1, rescore_factor or settings.vector_rescore_factor)
+        self._lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+        logger.info(f"NumpyVectorIndex loaded from {self.path}: {self.count()} vectors (dim={self.dim})")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _state_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._file(STATE_FILE))
+            return stat.st_mtime_ns, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> None:
+        """Load state, records and tombstones from disk and map the vector segment"""
+        with self._lock:
+            self._signature = self._state_signature()
+            state = self._read_state()
+            self.generation: int = state["generation"]
+            self.dim: Optional[int] = state["dim"]
+            self.rows: int = state["rows"]
+
+            self._ids: List[str] = []
+            self._records: List[Dict[str, Any]] = []
+            self._records_bytes = 0
+            if self.rows:
+                with open(self._records_file(), "rb") as f:
+                    for _ in range(self.rows):
+                        line = f.readline()
+                        self._records_bytes += len(line)
+                        record = json.loads(line)
+                        self._ids.append(record["id"])
+                        self._records.append(record)
+
+            self._tombstones = set(state["tombstones"])
+            self._alive = np.ones(self.rows, dtype=bool)
+            if self._tombstones:
+                self._alive[list(self._tombstones)] = False
+            self._id_to_row = {
+                doc_id: row for row, doc_id in enumerate(self._ids) if row not in self._tombstones
+            }
+            self._where_masks: Dict[str, np.ndarray] = {}
+            self._map_vectors()
+            self.codec.load_projection(self._file(PROJECTION_FILE), self.dim)
+            self._rebuild_codes()
+
+    def _rebuild_codes(self) -> None:
+        """Re-encode every row into the compact search representation"""
+        self._codes, self._scales = None, None
+        if self.codec.is_exact or not self.rows:
+            return
+
+        if self.codec.needs_fit(self.count()):
+            self.codec.fit(np.asarray(self._matrix[self._alive]))
+            self.codec.save_projection(self._file(PROJECTION_FILE))
+
+        # Encode block by block so the float32 segment is never fully copied into memory
+        blocks = [self.codec.encode(self._matrix[start:start + 65536]) for start in range(0, self.rows, 65536)]
+        self._codes = np.concatenate([codes for codes, _ in blocks])
+        if blocks[0][1] is not None:
+            self._scales = np.concatenate([scales for _, scales in blocks])
+
+    def _append_codes(self, vectors: np.ndarray) -> None:
+        """Encode newly appended rows, refitting the projection when the index has grown enough"""
+        if self.codec.is_exact:
+            return
+        if self._codes is None or self.codec.needs_fit(self.count()):
+            self._rebuild_codes()
+            return
+
+        codes, scales = self.codec.encode(vectors)
+        self._codes = np.concatenate([self._codes, codes])
+        if scales is not None:
+            self._scales = np.concatenate([self._scales, scales])
+
+    def storage_stats(self) -> Dict[str, int]:
+        """Bytes scanned per unfiltered query (codes, or the float32 segment) and bytes on disk"""
+        full_precision_bytes = self.rows * (self.dim or 0) * 4
+        code_bytes = VectorCodec.nbytes(self._codes, self._scales) if self._codes is not None else 0
+        disk_bytes = sum(
+            os.path.getsize(self._file(name)) for name in os.listdir(self.path)
+            if name in (STATE_FILE, PROJECTION_FILE) or name.startswith(("vectors.", "records."))
+        )
+        return {
+            "rows": self.rows,
+            "full_precision_bytes": full_precision_bytes,
+            "search_bytes": code_bytes or full_precision_bytes,
+            "code_bytes": code_bytes,
+            "disk_bytes": disk_bytes
+        }
+
+    def _map_vectors(self) -> None:
+        if self.rows:
+            self._matrix = np.memmap(self._vectors_file(), dtype=np.float32, mode="r",
+                                     shape=(self.rows, self.dim))
+        else:
+            self._matrix = None
+
+    def _refresh_if_changed(self) -> None:
+        """Re-load if another process rewrote the index"""
+        if self._state_signature() != self._signature:
+            self._load()
+
+    def _vectors_file(self, generation: int = None) -> str:
+        return self._file(f"vectors.{self.generation if generation is None else generation}.f32")
+
+    def _records_file(self, generation: int = None) -> str:
+        return self._file(f"records.{self.generation if generation is None else generation}.jsonl")
+
+    def _read_state(self) -> Dict[str, Any]:
+        try:
+            with open(self._file(STATE_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"generation": 0, "dim": None, "rows": 0, "tombstones": []}
+
+    def _commit(self) -> None:
+        """Atomically replace state.json, publishing new rows and tombstones to readers"""
+        tmp_path = self._file(f"{STATE_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "generation": self.generation,
+                "dim": self.dim,
+                "rows": self.rows,
+                "tombstones": sorted(self._tombstones)
+            }, f)
+        os.replace(tmp_path, self._file(STATE_FILE))
+        self._signature = self._state_signature()
+
+    def _tombstone(self, doc_id: str) -> None:
+        row = self._id_to_row.pop(doc_id, None)
+        if row is not None:
+            self._tombstones.add(row)
+            self._alive[row] = False
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def add(self, ids: List[str], embeddings: List[List[float]], texts: List[str],
+            metadatas: List[Dict[str, Any]]) -> None:
+        """Append vectors to the segment, superseding existing rows with the same ID"""
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per document ID")
+
+        with self._lock:
+            self._refresh_if_changed()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            # Truncate anything past the committed rows (a torn previous write), then append
+            vector_bytes = self.rows * self.dim * 4
+            with open(self._vectors_file(), "ab") as f:
+                f.truncate(vector_bytes)
+                f.write(vectors.tobytes())
+
+            with open(self._records_file(), "ab") as f:
+                f.truncate(self._records_bytes)
+                for doc_id, text, metadata in zip(ids, texts, metadatas):
+                    record = {"id": doc_id, "text": text, "metadata": metadata}
+                    line = (json.dumps(record) + "\n").encode("utf-8")
+                    f.write(line)
+                    self._records_bytes += len(line)
+                    self._records.append(record)
+
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            for offset, doc_id in enumerate(ids):
+                self._tombstone(doc_id)
+                self._id_to_row[doc_id] = self.rows + offset
+            self._ids.extend(ids)
+            self.rows += len(ids)
+            self._where_masks.clear()
+
+            # Codes (and any refitted projection) are ready before readers see the new rows
+            self._map_vectors()
+            self._append_codes(vectors)
+            self._commit()
+            self._maybe_compact()
+
+    def _where_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata matches a where clause, cached until rows are appended"""
+        key = json.dumps(where, sort_keys=True)
+        mask = self._where_masks.get(key)
+        if mask is None:
+            if len(self._where_masks) >= 64:
+                self._where_masks.clear()
+            mask = np.fromiter(
+                (matches_where(record["metadata"], where) for record in self._records),
+                dtype=bool, count=self.rows
+            )
+            self._where_masks[key] = mask
+        return mask
+
+    def _search(self, embedding: List[float], k: int,
+                where: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and cosine similarities of the k best live matches, best first"""
+        if not self.rows or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if where:
+            candidates = np.flatnonzero(self._alive & self._where_mask(where))
+        else:
+            candidates = np.flatnonzero(self._alive)
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.float32)
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        k = min(k, len(candidates))
+        # Mostly-dense selections are scored in one sequential pass rather than by gathering rows
+        dense = len(candidates) > self.rows // 2
+
+        if self._codes is not None:
+            # Approximate pass over compact codes, then exact re-scoring of the shortlist
+            if dense:
+                approximate = self.codec.scores(self._codes, self._scales, query)[candidates]
+            else:
+                approximate = self.codec.scores(
+                    self._codes[candidates], self._scales[candidates] if self._scales is not None else None, query
+                )
+            shortlist = min(len(candidates), k * self.rescore_factor)
+            candidates = np.sort(candidates[np.argpartition(-approximate, shortlist - 1)[:shortlist]])
+            dense = len(candidates) > self.rows // 2
+
+        if dense:
+            scores = (self._matrix @ query)[candidates]
+        else:
+            scores = self._matrix[candidates] @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
+
+    def _documents(self, rows: np.ndarray, scores: np.ndarray) -> List[Tuple[Document, float]]:
+        return [
+            (Document(page_content=self._records[row]["text"], metadata=self._records[row]["metadata"]), float(score))
+            for row, score in zip(rows, scores)
+        ]
+
+    def query(self, embedding: List[float], k: int,
+              where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Return the k most similar live documents with their cosine similarity.
+
+        A metadata where clause restricts the rows that are scored at all.
+        """
+        with self._lock:
+            self._refresh_if_changed()
+            return self._documents(*self._search(embedding, k, where))
+
+    def query_with_embeddings(self, embedding: List[float], k: int, where: Optional[Dict[str, Any]] = None
+                              ) -> Tuple[List[Tuple[Document, float]], np.ndarray]:
+        """Like query(), plus the unit-normalized stored vector of each result (one row per result)"""
+        with self._lock:
+            self._refresh_if_changed()
+            rows, scores = self._search(embedding, k, where)
+            vectors = np.asarray(self._matrix[rows]) if len(rows) else np.empty((0, self.dim or 0), np.float32)
+            return self._documents(rows, scores), vectors
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Stored (unit-normalized) vectors by document ID; unknown IDs are omitted"""
+        with self._lock:
+            self._refresh_if_changed()
+            rows = {doc_id: self._id_to_row[doc_id] for doc_id in ids if doc_id in self._id_to_row}
+            return {doc_id: np.asarray(self._matrix[row]) for doc_id, row in rows.items()}
+
+    def delete(self, ids: List[str]) -> None:
+        """Tombstone rows by document ID"""
+        with self._lock:
+            self._refresh_if_changed()
+            for doc_id in ids:
+                self._tombstone(doc_id)
+            self._commit()
+            self._maybe_compact()
+
+    def count(self) -> int:
+        return len(self._id_to_row)
+
+    def documents(self) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """All live (ids, texts, metadatas)"""
+        with self._lock:
+            self._refresh_if_changed()
+            records = [self._records[row] for row in sorted(self._id_to_row.values())]
+        return [r["id"] for r in records], [r["text"] for r in records], [r["metadata"] for r in records]
+
+    def clear(self) -> None:
+        """Remove every vector and record"""
+        with self._lock:
+            self._matrix = None
+            for name in os.listdir(self.path):
+                if name in (STATE_FILE, PROJECTION_FILE) or name.startswith(("vectors.", "records.")):
+                    os.remove(self._file(name))
+            self._load()
+
+    def _maybe_compact(self) -> None:
+        if self._tombstones and len(self._tombstones) >= self.compaction_ratio * self.rows:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite live rows into a new generation and drop the old segment"""
+        with self._lock:
+            live_rows = np.flatnonzero(self._alive)
+            old_generation = self.generation
+            new_generation = old_generation + 1
+            logger.info(f"Compacting numpy index: {self.rows} rows -> {len(live_rows)} rows")
+
+            with open(self._vectors_file(new_generation), "wb") as f:
+                if len(live_rows):
+                    f.write(np.ascontiguousarray(self._matrix[live_rows]).tobytes())
+
+            with open(self._records_file(new_generation), "wb") as f:
+                for row in live_rows:
+                    f.write((json.dumps(self._records[row]) + "\n").encode("utf-8"))
+
+            # Switching state.json is the commit point; until then readers keep the old generation
+            self.generation = new_generation
+            self.rows = len(live_rows)
+            self._tombstones = set()
+            self._commit()
+
+            self._matrix = None
+            for path in (self._vectors_file(old_generation), self._records_file(old_generation)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._load()
@@ -1,15 +1,84 @@
 import os
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, AbstractSet, Iterable, Iterator, Optional, Tuple
 import PyPDF2
 import pdfplumber
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
+from services.content_hash import hash_bytes, hash_text
+from services.retrieval_filters import extract_fiscal_years, fiscal_period_metadata
+from services.minhash import compute_signature, encode_signature
+from services.stage_timer import span, timed_iter
 from config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _build_page_entry(text: Optional[str], page_num: int, total_pages: int, source: str) -> Optional[Dict[str, Any]]:
+    """Build the page dict used throughout the pipeline, or None for empty pages"""
+    if not text or not text.strip():
+        return None
+
+    return {
+        "page_number": page_num,
+        "content": text.strip(),
+        "metadata": {
+            "source": source,
+            "page": page_num,
+            "total_pages": total_pages
+        }
+    }
+
+
+def _iter_page_range(file_path: str, start: int, end: int,
+                     skip_pages: AbstractSet[int] = frozenset()) -> Iterator[Dict[str, Any]]:
+    """Yield extracted pages [start, end) of a PDF one at a time.
+
+    Each page is extracted with pdfplumber and falls back to PyPDF2 on its own
+    if pdfplumber fails, so one malformed page does not discard the whole range.
+    Page numbers in ``skip_pages`` are not extracted at all.
+    """
+    source = os.path.basename(file_path)
+    fallback_reader = None
+
+    with pdfplumber.open(file_path) as pdf:
+        total_pages = len(pdf.pages)
+
+        for index in range(start, min(end, total_pages)):
+            page_num = index + 1
+            if page_num in skip_pages:
+                continue
+
+            page = pdf.pages[index]
+            try:
+                text = page.extract_text()
+            except Exception as e:
+                logger.warning(f"pdfplumber failed on page {page_num} of {file_path}: {str(e)}, trying PyPDF2")
+                try:
+                    if fallback_reader is None:
+                        fallback_reader = PyPDF2.PdfReader(file_path)
+                    text = fallback_reader.pages[index].extract_text()
+                except Exception as fallback_error:
+                    logger.error(f"PyPDF2 also failed on page {page_num} of {file_path}: {str(fallback_error)}")
+                    continue
+            finally:
+                # Drop pdfplumber's cached layout objects so memory does not grow with page count
+                page.flush_cache()
+
+            page_entry = _build_page_entry(text, page_num, total_pages, source)
+            if page_entry:
+                yield page_entry
+
+
+def _extract_page_range(file_path: str, start: int, end: int,
+                        skip_pages: AbstractSet[int] = frozenset()) -> List[Dict[str, Any]]:
+    """Extract pages [start, end) of a PDF; runs inside a worker process"""
+    return list(_iter_page_range(file_path, start, end, skip_pages))
+
+
 class PDFProcessor:
     def __init__(self):
         """Initialize PDF processor with text splitter"""
@@ -21,83 +90,179 @@ class PDFProcessor:
         )
         logger.info(f"PDFProcessor initialized with chunk_size={settings.chunk_size}, overlap={settings.chunk_overlap}")
 
-    def extract_text_from_pdf(self, file_path: str) -> List[Dict[str, Any]]:
-        """Extract text from PDF and return page-wise content"""
-        pages_content = []
+    def _resolve_extraction_workers(self) -> int:
+        """Number of worker processes to use for page extraction"""
+        if settings.pdf_extraction_workers > 0:
+            return settings.pdf_extraction_workers
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def _split_page_ranges(total_pages: int, workers: int) -> List[Tuple[int, int]]:
+        """Split [0, total_pages) into contiguous ranges, several per worker for load balancing"""
+        range_size = max(1, -(-total_pages // (workers * 4)))
+        return [(start, min(start + range_size, total_pages)) for start in range(0, total_pages, range_size)]
+
+    def _iter_pages_parallel(self, file_path: str, total_pages: int, workers: int,
+                             skip_pages: AbstractSet[int] = frozenset()) -> Iterator[Dict[str, Any]]:
+        """Extract pages across a process pool and yield them in page order"""
+        page_ranges = iter(self._split_page_ranges(total_pages, workers))
+
+        logger.info(f"Extracting {total_pages} pages from {file_path} with {workers} worker processes")
 
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a bounded window of ranges in flight so finished-but-unconsumed
+            # results cannot pile up when the consumer is slower than extraction
+            pending = deque(
+                executor.submit(_extract_page_range, file_path, start, end, skip_pages)
+                for start, end in islice(page_ranges, workers * 2)
+            )
+            while pending:
+                future = pending.popleft()
+                for start, end in islice(page_ranges, 1):
+                    pending.append(executor.submit(_extract_page_range, file_path, start, end, skip_pages))
+                # Futures are consumed in submission order, so pages stay ordered
+                yield from future.result()
+
+    def _extract_text_parallel(self, file_path: str, total_pages: int, workers: int) -> List[Dict[str, Any]]:
+        """Extract pages across a process pool and gather results in page order"""
+        pages_content = list(self._iter_pages_parallel(file_path, total_pages, workers))
+        logger.info(f"Extracted text from {len(pages_content)} pages from {file_path} (parallel)")
+        return pages_content
+
+    def _iter_pages_pypdf2(self, file_path: str,
+                           skip_pages: AbstractSet[int] = frozenset()) -> Iterator[Dict[str, Any]]:
+        """Yield pages using PyPDF2 when pdfplumber cannot open the file at all"""
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            total_pages = len(pdf_reader.pages)
+            for page_num, page in enumerate(pdf_reader.pages, 1):
+                if page_num in skip_pages:
+                    continue
+                page_entry = _build_page_entry(page.extract_text(), page_num, total_pages, os.path.basename(file_path))
+                if page_entry:
+                    yield page_entry
+
+    def iter_pages(self, file_path: str,
+                   skip_pages: AbstractSet[int] = frozenset()) -> Iterator[Dict[str, Any]]:
+        """Yield extracted pages one at a time, in page order, without materializing the PDF.
+
+        Page numbers in ``skip_pages`` (e.g. pages known to be unchanged) are not extracted.
+        """
+        skip_pages = frozenset(skip_pages)
         try:
-            # Use pdfplumber for better text extraction
             with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
-                    if text and text.strip():
-                        pages_content.append({
-                            "page_number": page_num,
-                            "content": text.strip(),
-                            "metadata": {
-                                "source": os.path.basename(file_path),
-                                "page": page_num,
-                                "total_pages": len(pdf.pages)
-                            }
-                        })
-
-            logger.info(f"Extracted text from {len(pages_content)} pages from {file_path}")
-            return pages_content
+                total_pages = len(pdf.pages)
+        except Exception as e:
+            logger.error(f"Error opening PDF {file_path} with pdfplumber: {str(e)}, streaming with PyPDF2")
+            yield from timed_iter("extract", self._iter_pages_pypdf2(file_path, skip_pages))
+            return
+
+        workers = self._resolve_extraction_workers()
+        pages_to_extract = total_pages - len(skip_pages)
+        if workers > 1 and pages_to_extract >= settings.parallel_extraction_min_pages:
+            yield from timed_iter("extract", self._iter_pages_parallel(file_path, total_pages, workers, skip_pages))
+        else:
+            yield from timed_iter("extract", _iter_page_range(file_path, 0, total_pages, skip_pages))
+
+    def hash_pages(self, file_path: str) -> Dict[int, str]:
+        """Hash each page's raw content stream without running text extraction.
+
+        Used to decide which pages of a re-uploaded PDF changed before paying for
+        pdfplumber's layout analysis. Returns an empty dict if hashing fails, in
+        which case every page is treated as changed.
+        """
+        try:
+            page_hashes = {}
+            with open(file_path, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                for page_num, page in enumerate(pdf_reader.pages, 1):
+                    contents = page.get_contents()
+                    page_hashes[page_num] = hash_bytes(contents.get_data() if contents is not None else b"")
+            return page_hashes
 
         except Exception as e:
-            logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
-            # Fallback to PyPDF2
+            logger.warning(f"Could not hash pages of {file_path}: {str(e)}, treating all pages as changed")
+            return {}
+
+    def extract_text_from_pdf(self, file_path: str) -> List[Dict[str, Any]]:
+        """Extract text from PDF and return page-wise content"""
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                total_pages = len(pdf.pages)
+        except Exception as e:
+            logger.error(f"Error opening PDF {file_path} with pdfplumber: {str(e)}, falling back to PyPDF2")
             try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page_num, page in enumerate(pdf_reader.pages, 1):
-                        text = page.extract_text()
-                        if text and text.strip():
-                            pages_content.append({
-                                "page_number": page_num,
-                                "content": text.strip(),
-                                "metadata": {
-                                    "source": os.path.basename(file_path),
-                                    "page": page_num,
-                                    "total_pages": len(pdf_reader.pages)
-                                }
-                            })
-                    logger.info(f"Fallback: Extracted text from {len(pages_content)} pages using PyPDF2")
-                    return pages_content
+                pages_content = list(self._iter_pages_pypdf2(file_path))
+                logger.info(f"Fallback: Extracted text from {len(pages_content)} pages using PyPDF2")
+                return pages_content
             except Exception as fallback_error:
                 logger.error(f"Fallback PDF extraction also failed: {str(fallback_error)}")
                 raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
+        workers = self._resolve_extraction_workers()
+        if workers > 1 and total_pages >= settings.parallel_extraction_min_pages:
+            try:
+                return self._extract_text_parallel(file_path, total_pages, workers)
+            except Exception as e:
+                logger.warning(f"Parallel extraction failed for {file_path}: {str(e)}, using sequential extraction")
+
+        # Same per-page path as the workers, including the per-page PyPDF2 fallback
+        pages_content = list(_iter_page_range(file_path, 0, total_pages))
+        logger.info(f"Extracted text from {len(pages_content)} pages from {file_path}")
+        return pages_content
+
+    def _split_page(self, page_data: Dict[str, Any]) -> List[Document]:
+        """Split a single page into chunk Documents"""
+        documents = []
+        page_content = page_data["content"]
+        page_metadata = page_data["metadata"]
+
+        # Split the page content into chunks
+        chunks = self.text_splitter.split_text(page_content)
+
+        # Chunks that mention no fiscal year (e.g. table rows) inherit the page's years
+        page_years = extract_fiscal_years(page_content)
+
+        for chunk_idx, chunk in enumerate(chunks):
+            if chunk.strip():  # Only add non-empty chunks
+                # Create metadata for this chunk
+                chunk_metadata = page_metadata.copy()
+                chunk_metadata.update({
+                    "chunk_index": chunk_idx,
+                    "chunk_id": f"{page_metadata['source']}_page_{page_metadata['page']}_chunk_{chunk_idx}",
+                    "content_hash": hash_text(chunk.strip()),
+                    # Signature for source deduplication at answer time
+                    "minhash": encode_signature(compute_signature(chunk.strip()))
+                })
+                chunk_metadata.update(fiscal_period_metadata(extract_fiscal_years(chunk) or page_years))
+
+                # Create Document object
+                doc = Document(
+                    page_content=chunk.strip(),
+                    metadata=chunk_metadata
+                )
+                documents.append(doc)
+
+        return documents
+
     def split_into_chunks(self, pages_content: List[Dict[str, Any]]) -> List[Document]:
         """Split page content into chunks"""
         documents = []
 
         for page_data in pages_content:
-            page_content = page_data["content"]
-            page_metadata = page_data["metadata"]
-
-            # Split the page content into chunks
-            chunks = self.text_splitter.split_text(page_content)
-
-            for chunk_idx, chunk in enumerate(chunks):
-                if chunk.strip():  # Only add non-empty chunks
-                    # Create metadata for this chunk
-                    chunk_metadata = page_metadata.copy()
-                    chunk_metadata.update({
-                        "chunk_index": chunk_idx,
-                        "chunk_id": f"{page_metadata['source']}_page_{page_metadata['page']}_chunk_{chunk_idx}"
-                    })
-
-                    # Create Document object
-                    doc = Document(
-                        page_content=chunk.strip(),
-                        metadata=chunk_metadata
-                    )
-                    documents.append(doc)
+            with span("split"):
+                documents.extend(self._split_page(page_data))
 
         logger.info(f"Split content into {len(documents)} chunks")
         return documents
 
+    def iter_chunks(self, pages: Iterable[Dict[str, Any]]) -> Iterator[Document]:
+        """Lazily split a stream of pages into chunk Documents"""
+        for page_data in pages:
+            with span("split"):
+                documents = self._split_page(page_data)
+            yield from documents
+
     def process_pdf(self, file_path: str) -> List[Document]:
         """Process PDF file and return list of Document objects"""
         try:
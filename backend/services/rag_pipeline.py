@@ -1,8 +1,17 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Hashable, Iterator, Optional, Tuple
 from langchain.schema import Document
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate, PromptTemplate
 from services.vector_store import VectorStoreService
+from services.minhash import signature_for, estimated_similarity
+from services.answer_cache import SemanticAnswerCache
+from services.content_hash import hash_text
+from services.context_packer import ContextPacker, estimate_tokens
+from services.context_compressor import ContextCompressor
+from services.fake_providers import FakeChatModel
+from services.stage_timer import StageTimer, record_tokens, span, use_timer
+from services.metrics import (CHAT_SECONDS, CHAT_STAGE_SECONDS, FALLBACK_RESPONSES, LLM_CALLS, LLM_TOKENS,
+                              observe_stages)
 from config import settings
 import logging
 import time
@@ -10,6 +19,8 @@ from difflib import SequenceMatcher
 
 logger = logging.getLogger(__name__)
 
+NO_RELEVANT_DOCUMENTS_ANSWER = "I couldn't find relevant information in the financial documents to answer your question. Please try rephrasing your question or ensure the document contains the information you're looking for."
+
 
 class RAGPipeline:
     def __init__(self, vector_store_service: VectorStoreService):
@@ -19,7 +30,17 @@ class RAGPipeline:
 
             # Try to initialize Google Gemini LLM first, fallback to local model
             try:
-                if settings.google_api_key and settings.google_api_key.strip():
+                if settings.llm_provider.lower() == "fake":
+                    self.llm = FakeChatModel(
+                        output_tokens=settings.fake_llm_output_tokens,
+                        first_token_ms=settings.fake_llm_first_token_ms,
+                        token_ms=settings.fake_llm_token_ms,
+                        jitter=settings.fake_llm_jitter,
+                        seed=settings.fake_llm_seed
+                    )
+                    self.use_chat_model = True
+                    logger.info("Using fake chat model (LLM_PROVIDER=fake)")
+                elif settings.google_api_key and settings.google_api_key.strip():
                     logger.info(f"Initializing Google Gemini model: {settings.llm_model}")
                     self.llm = ChatGoogleGenerativeAI(
                         model=settings.llm_model,
@@ -50,6 +71,28 @@ class RAGPipeline:
             # Initialize prompt templates
             self._setup_prompt_templates()
 
+            # Sources and chat history are packed into a fixed prompt token budget
+            self.context_packer = ContextPacker(
+                max_prompt_tokens=settings.prompt_token_budget,
+                history_share=settings.history_token_share,
+                max_history_turns=settings.max_history_turns,
+                max_turn_tokens=settings.history_turn_tokens,
+                min_source_tokens=settings.min_source_tokens
+            )
+
+            # Optional extractive compression of retrieved chunks before packing
+            self.context_compressor = ContextCompressor(
+                keep_ratio=settings.compression_keep_ratio,
+                neighbors=settings.compression_neighbors,
+                embedding_weight=settings.compression_embedding_weight,
+                min_chunk_chars=settings.compression_min_chunk_chars
+            ) if settings.enable_context_compression else None
+
+            # Answers to paraphrased questions over the same retrieved chunks are reused
+            self.answer_cache = SemanticAnswerCache(
+                settings.answer_cache_size, settings.answer_cache_ttl, settings.answer_cache_similarity
+            )
+
             logger.info("RAGPipeline initialized successfully")
 
         except Exception as e:
@@ -96,58 +139,298 @@ Please provide a comprehensive answer based on the financial document context pr
             HumanMessagePromptTemplate.from_template(human_template)
         ])
 
-    def generate_answer(self, question: str, chat_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
-        """Generate answer using RAG pipeline"""
+        # Tokens the templates take before context, history and question are filled in
+        self.prompt_overhead_tokens = sum(
+            estimate_tokens(message.content)
+            for message in self.prompt_template.format_messages(context="", chat_history="", question="")
+        )
+
+    def generate_answer(self, question: str, chat_history: List[Dict[str, str]] = None,
+                        filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Generate answer using RAG pipeline, optionally restricted by retrieval filters.
+
+        The result carries seconds per stage ("timings": embed, search, dedup,
+        context, llm, sources) and LLM token counts ("tokens": input, output).
+        """
+        timer = StageTimer()
+        with use_timer(timer):
+            result = self._generate_answer(question, chat_history, filters)
+        return self._add_timings(result, timer)
+
+    async def agenerate_answer(self, question: str, chat_history: List[Dict[str, str]] = None,
+                               filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Async generate_answer: retrieval and the LLM call are awaited, so the event loop stays free"""
+        timer = StageTimer()
+        with use_timer(timer):
+            result = await self._agenerate_answer(question, chat_history, filters)
+        return self._add_timings(result, timer)
+
+    @staticmethod
+    def _add_timings(result: Dict[str, Any], timer: StageTimer) -> Dict[str, Any]:
+        result["timings"] = timer.timings()
+        result["tokens"] = timer.token_counts()
+        CHAT_SECONDS.observe(result["processing_time"], mode="chat")
+        observe_stages(CHAT_STAGE_SECONDS, result["timings"])
+        logger.info(f"Stage timings: { {stage: round(seconds, 4) for stage, seconds in result['timings'].items()} }, "
+                    f"tokens: {result['tokens']}")
+        return result
+
+    def _generate_answer(self, question: str, chat_history: List[Dict[str, str]] = None,
+                         filters: Dict[str, Any] = None) -> Dict[str, Any]:
         start_time = time.time()
 
         try:
             logger.info(f"Generating answer for question: '{question[:100]}...'")
 
             # Step 1: Retrieve relevant documents
-            retrieved_docs = self._retrieve_documents(question)
+            retrieved_docs = self._retrieve_documents(question, filters)
+            if not retrieved_docs:
+                return self._no_documents_result(start_time)
+
+            # Step 2: Check the answer cache before compression, which may call the embedding provider
+            lookup = self._lookup_answer(retrieved_docs, chat_history, self._question_embedding(question))
+            if lookup["cached_answer"] is not None:
+                return self._answer_result(lookup["cached_answer"], retrieved_docs, lookup, start_time)
+
+            # Step 3-4: Pack the (optionally compressed) context into the prompt
+            prompt = self._prepare_prompt(
+                question, self._compress_documents(question, retrieved_docs), chat_history, lookup
+            )
+
+            # Step 5: Generate the answer using LLM
+            answer, from_llm = self._generate_llm_response(question, prompt["context"], prompt["chat_history"])
+            if from_llm:
+                self._cache_answer(prompt["question_embedding"], prompt["cache_scope"], answer)
+
+            return self._answer_result(answer, retrieved_docs, prompt, start_time)
+
+        except Exception as e:
+            return self._error_result(e, start_time)
+
+    async def _agenerate_answer(self, question: str, chat_history: List[Dict[str, str]] = None,
+                                filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Async _generate_answer: the same steps, awaiting retrieval, compression, embedding and the LLM"""
+        start_time = time.time()
+
+        try:
+            logger.info(f"Generating answer for question: '{question[:100]}...'")
 
+            retrieved_docs = await self._aretrieve_documents(question, filters)
             if not retrieved_docs:
-                return {
-                    "answer": "I couldn't find relevant information in the financial documents to answer your question. Please try rephrasing your question or ensure the document contains the information you're looking for.",
-                    "sources": [],
-                    "processing_time": time.time() - start_time
-                }
+                return self._no_documents_result(start_time)
 
-            # Step 2: Generate context from retrieved documents
-            context = self._generate_context(retrieved_docs)
+            lookup = self._lookup_answer(retrieved_docs, chat_history, await self._aquestion_embedding(question))
+            if lookup["cached_answer"] is not None:
+                return self._answer_result(lookup["cached_answer"], retrieved_docs, lookup, start_time)
 
-            # Step 3: Format chat history
-            chat_history_str = self._format_chat_history(chat_history)
+            prompt = self._prepare_prompt(
+                question, await self._acompress_documents(question, retrieved_docs), chat_history, lookup
+            )
 
-            # Step 4: Generate answer using LLM
-            answer = self._generate_llm_response(question, context, chat_history_str)
+            answer, from_llm = await self._agenerate_llm_response(question, prompt["context"], prompt["chat_history"])
+            if from_llm:
+                self._cache_answer(prompt["question_embedding"], prompt["cache_scope"], answer)
 
-            # Step 5: Prepare sources information
+            return self._answer_result(answer, retrieved_docs, prompt, start_time)
+
+        except Exception as e:
+            return self._error_result(e, start_time)
+
+    def _lookup_answer(self, retrieved_docs: List[Tuple[Document, float]],
+                       chat_history: Optional[List[Dict[str, str]]],
+                       question_embedding: Optional[List[float]]) -> Dict[str, Any]:
+        """Semantic answer cache lookup shared by every answer path, scoped by ``retrieved_docs``.
+
+        Runs right after retrieval, so a hit skips compression and prompt packing.
+        """
+        cache_scope = self._answer_cache_scope(retrieved_docs, chat_history)
+        return {
+            "question_embedding": question_embedding,
+            "cache_scope": cache_scope,
+            "cached_answer": self._get_cached_answer(question_embedding, cache_scope),
+            "prompt_tokens": None
+        }
+
+    def _prepare_prompt(self, question: str, prompt_docs: List[Tuple[Document, float]],
+                        chat_history: Optional[List[Dict[str, str]]], lookup: Dict[str, Any]) -> Dict[str, Any]:
+        """Pack ``prompt_docs`` and the chat history into the prompt token budget after a cache miss"""
+        context, chat_history_str, prompt_tokens = self._generate_context(question, prompt_docs, chat_history)
+        return {**lookup, "context": context, "chat_history": chat_history_str, "prompt_tokens": prompt_tokens}
+
+    def _answer_result(self, answer: str, retrieved_docs: List[Tuple[Document, float]],
+                       prompt: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        """Prepare sources information and the chat result"""
+        with span("sources"):
             sources = self._prepare_sources(retrieved_docs)
 
-            processing_time = time.time() - start_time
+        processing_time = time.time() - start_time
+        cached = prompt["cached_answer"] is not None
+        logger.info(f"Answer generated successfully in {processing_time:.2f} seconds (cached={cached})")
+
+        return {
+            "answer": answer,
+            "sources": sources,
+            "processing_time": processing_time,
+            "cached": cached,
+            "prompt_tokens": prompt["prompt_tokens"]
+        }
+
+    @staticmethod
+    def _no_documents_result(start_time: float) -> Dict[str, Any]:
+        return {
+            "answer": NO_RELEVANT_DOCUMENTS_ANSWER,
+            "sources": [],
+            "processing_time": time.time() - start_time
+        }
+
+    @staticmethod
+    def _error_result(error: Exception, start_time: float) -> Dict[str, Any]:
+        logger.error(f"Error generating answer: {str(error)}")
+        return {
+            "answer": f"I encountered an error while processing your question: {str(error)}",
+            "sources": [],
+            "processing_time": time.time() - start_time
+        }
+
+    def stream_answer(self, question: str, chat_history: List[Dict[str, str]] = None,
+                      filters: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """Generate an answer as a stream of events.
+
+        Yields ``{"event": "sources", ...}`` as soon as retrieval finishes, then
+        one ``{"event": "token", "text": ...}`` per LLM chunk (or fallback line),
+        and finally ``{"event": "done", ...}`` with processing time, coarse
+        timings, per-stage timings ("stages") and LLM token counts.
+        """
+        start_time = time.time()
+        timings = {}
+        # Only activated around blocks that do not yield: the consumer may resume us in another context
+        timer = StageTimer()
+        first_token_time = None
+        cached = False
+        prompt_tokens = None
+        outcome = {}
+
+        try:
+            logger.info(f"Streaming answer for question: '{question[:100]}...'")
 
-            logger.info(f"Answer generated successfully in {processing_time:.2f} seconds")
+            # Step 1: Retrieve relevant documents and send their sources right away
+            with use_timer(timer):
+                retrieved_docs = self._retrieve_documents(question, filters)
+                timings["retrieval"] = time.time() - start_time
+                with span("sources"):
+                    sources = self._prepare_sources(retrieved_docs)
+            yield {"event": "sources", "sources": sources}
 
-            return {
-                "answer": answer,
-                "sources": sources,
-                "processing_time": processing_time
+            if not retrieved_docs:
+                tokens = iter([NO_RELEVANT_DOCUMENTS_ANSWER])
+            else:
+                # Step 2-4: Check the answer cache, then pack the (optionally compressed) context on a miss
+                stage_start = time.time()
+                with use_timer(timer):
+                    prompt = self._lookup_answer(retrieved_docs, chat_history, self._question_embedding(question))
+                    cached = prompt["cached_answer"] is not None
+                    if not cached:
+                        prompt = self._prepare_prompt(
+                            question, self._compress_documents(question, retrieved_docs), chat_history, prompt
+                        )
+                timings["context"] = time.time() - stage_start
+                prompt_tokens = prompt["prompt_tokens"]
+
+                # Step 5: Send a cached answer in one piece, or stream it from the LLM or fallback method
+                if cached:
+                    tokens = iter([prompt["cached_answer"]])
+                else:
+                    tokens = self._stream_llm_response(question, prompt["context"], prompt["chat_history"], outcome)
+
+            stage_start = time.time()
+            streamed = []
+            for text in tokens:
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                streamed.append(text)
+                yield {"event": "token", "text": text}
+            timings["generation"] = time.time() - stage_start
+
+            if outcome.get("from_llm"):
+                answer = "".join(streamed).strip()
+                self._cache_answer(prompt["question_embedding"], prompt["cache_scope"], answer)
+                timer.add("llm", timings["generation"])
+                timer.add_tokens("input", prompt_tokens["total"])
+                timer.add_tokens("output", estimate_tokens(answer))
+                for kind, count in timer.token_counts().items():
+                    LLM_TOKENS.inc(count, kind=kind)
+
+            processing_time = time.time() - start_time
+            CHAT_SECONDS.observe(processing_time, mode="stream")
+            observe_stages(CHAT_STAGE_SECONDS, timer.timings())
+            logger.info(f"Answer streamed successfully in {processing_time:.2f} seconds "
+                        f"(first token after {first_token_time or 0:.2f}s)")
+
+            yield {
+                "event": "done",
+                "processing_time": processing_time,
+                "time_to_first_token": first_token_time,
+                "timings": timings,
+                "stages": timer.timings(),
+                "tokens": timer.token_counts(),
+                "cached": cached,
+                "prompt_tokens": prompt_tokens
             }
 
         except Exception as e:
-            logger.error(f"Error generating answer: {str(e)}")
-            return {
-                "answer": f"I encountered an error while processing your question: {str(e)}",
-                "sources": [],
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield {
+                "event": "error",
+                "message": f"I encountered an error while processing your question: {str(e)}",
                 "processing_time": time.time() - start_time
             }
 
-    def _retrieve_documents(self, query: str) -> List[Tuple[Document, float]]:
+    def _question_embedding(self, question: str) -> Optional[List[float]]:
+        """Question embedding for the answer cache (reuses the retrieval query embedding), or None"""
+        if not self.answer_cache.max_entries:
+            return None
+        try:
+            return self.vector_store.embed_query(question)
+        except Exception as e:
+            logger.debug(f"Answer cache skipped, question embedding unavailable: {str(e)}")
+            return None
+
+    async def _aquestion_embedding(self, question: str) -> Optional[List[float]]:
+        """Async _question_embedding"""
+        if not self.answer_cache.max_entries:
+            return None
+        try:
+            return await self.vector_store.aembed_query(question)
+        except Exception as e:
+            logger.debug(f"Answer cache skipped, question embedding unavailable: {str(e)}")
+            return None
+
+    def _answer_cache_scope(self, documents: List[Tuple[Document, float]],
+                            chat_history: Optional[List[Dict[str, str]]]) -> Hashable:
+        """Cached answers are only valid for the same retrieved chunks, index version and chat history"""
+        chunk_ids = tuple(sorted(
+            doc.metadata.get("chunk_id") or hash_text(doc.page_content) for doc, _ in documents
+        ))
+        history = "\n".join(self._format_chat_history(chat_history))
+        return chunk_ids, getattr(self.vector_store, "index_version", 0), hash_text(history)
+
+    def _get_cached_answer(self, question_embedding: Optional[List[float]], scope: Hashable) -> Optional[str]:
+        if question_embedding is None:
+            return None
+        answer = self.answer_cache.get(question_embedding, scope)
+        if answer is not None:
+            logger.info(f"Answer served from semantic cache ({self.answer_cache.stats()})")
+        return answer
+
+    def _cache_answer(self, question_embedding: Optional[List[float]], scope: Hashable, answer: str) -> None:
+        if question_embedding is not None and answer:
+            self.answer_cache.set(question_embedding, scope, answer)
+
+    def _retrieve_documents(self, query: str, filters: Dict[str, Any] = None) -> List[Tuple[Document, float]]:
         """Retrieve relevant documents for the query"""
         try:
             # Search vector store for similar documents
-            results = self.vector_store.similarity_search(query, k=settings.retrieval_k)
+            results = self.vector_store.similarity_search(query, k=settings.retrieval_k, filters=filters)
 
             logger.info(f"Retrieved {len(results)} relevant documents")
             return results
@@ -156,59 +439,178 @@ Please provide a comprehensive answer based on the financial document context pr
             logger.error(f"Error retrieving documents: {str(e)}")
             return []
 
-    def _generate_context(self, documents: List[Tuple[Document, float]]) -> str:
-        """Generate context from retrieved documents"""
-        if not documents:
-            return "No relevant context found."
+    async def _aretrieve_documents(self, query: str, filters: Dict[str, Any] = None) -> List[Tuple[Document, float]]:
+        """Async _retrieve_documents"""
+        try:
+            results = await self.vector_store.asimilarity_search(query, k=settings.retrieval_k, filters=filters)
+
+            logger.info(f"Retrieved {len(results)} relevant documents")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {str(e)}")
+            return []
+
+    def _compress_documents(self, question: str,
+                            documents: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Reduce retrieved chunks to their question-relevant lines for the prompt; sources stay whole"""
+        if self.context_compressor is None or not documents:
+            return documents
+
+        try:
+            with span("context"):
+                compressed, stats = self.context_compressor.compress(
+                    question, documents, self.vector_store.embed_query, self.vector_store.embed_segments
+                )
+            logger.info(f"Compressed context to {stats['ratio']:.0%} of {stats['chars_before']} characters "
+                        f"({stats['kept_segments']}/{stats['segments']} segments)")
+            return compressed
 
+        except Exception as e:
+            logger.error(f"Error compressing context: {str(e)}, using full chunks")
+            return documents
+
+    async def _acompress_documents(self, question: str,
+                                   documents: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Async _compress_documents: embedding calls run on the vector store executor"""
+        if self.context_compressor is None or not documents:
+            return documents
+        return await self.vector_store.run(self._compress_documents, question, documents)
+
+    def _generate_context(self, question: str, documents: List[Tuple[Document, float]],
+                          chat_history: List[Dict[str, str]] = None) -> Tuple[str, str, Dict[str, int]]:
+        """Generate context and chat history that fit the prompt token budget.
+
+        Returns (context, chat history, tokens used per prompt section).
+        """
+        # Sources keep their retrieval rank as number, so "Source i" matches the i-th returned source;
+        # the packer also fills the budget in this order
         context_parts = []
         for i, (doc, score) in enumerate(documents, 1):
             metadata = doc.metadata
-            source_info = f"Source {i} (Page {metadata.get('page', 'Unknown')}, Similarity: {score:.3f}):"
+            # Lexical-only retrieval scores are relative BM25 scores, not similarities
+            score_label = "Keyword score" if metadata.get("score_type") == "bm25" else "Similarity"
+            source_info = f"Source {i} (Page {metadata.get('page', 'Unknown')}, {score_label}: {score:.3f}):"
             content = doc.page_content
             context_parts.append(f"{source_info}\n{content}\n")
 
-        context = "\n".join(context_parts)
-        logger.info(f"Generated context from {len(documents)} documents")
-        return context
-
-    def _format_chat_history(self, chat_history: List[Dict[str, str]] = None) -> str:
-        """Format chat history for context"""
-        if not chat_history:
-            return "No previous conversation."
-
+        with span("context"):
+            context_parts, history_parts, prompt_tokens = self.context_packer.pack(
+                context_parts,
+                self._format_chat_history(chat_history),
+                fixed_tokens=self.prompt_overhead_tokens + estimate_tokens(question)
+            )
+
+        context = "\n".join(context_parts) if context_parts else "No relevant context found."
+        chat_history_str = "\n".join(history_parts) if history_parts else "No previous conversation."
+        logger.info(f"Generated context from {len(context_parts)} of {len(documents)} documents "
+                    f"(prompt tokens: {prompt_tokens})")
+        return context, chat_history_str, prompt_tokens
+
+    def _format_chat_history(self, chat_history: List[Dict[str, str]] = None) -> List[str]:
+        """Format chat history turns, oldest first"""
         formatted_history = []
-        for entry in chat_history[-5:]:  # Keep only last 5 exchanges
+        for entry in chat_history or []:
             role = entry.get('role', 'unknown')
             content = entry.get('content', '')
             formatted_history.append(f"{role.capitalize()}: {content}")
 
-        return "\n".join(formatted_history)
+        return formatted_history
 
-    def _generate_llm_response(self, question: str, context: str, chat_history: str) -> str:
-        """Generate response using LLM or fallback method"""
-        try:
-            if self.llm and self.use_chat_model:
-                # Create the prompt
-                messages = self.prompt_template.format_messages(
-                    context=context,
-                    chat_history=chat_history,
-                    question=question
-                )
+    def _generate_llm_response(self, question: str, context: str, chat_history: str) -> Tuple[str, bool]:
+        """Generate response using LLM or fallback method; returns (answer, generated by the LLM)"""
+        if not (self.llm and self.use_chat_model):
+            # Fallback: Generate a simple response based on context
+            return self._generate_fallback_response(question, context), False
 
-                # Generate response
+        try:
+            messages = self._format_messages(question, context, chat_history)
+            with span("llm"):
                 response = self.llm(messages)
-                return response.content.strip()
-            else:
-                # Fallback: Generate a simple response based on context
-                return self._generate_fallback_response(question, context)
+            return self._llm_answer(messages, response), True
+        except Exception as e:
+            return self._llm_error_fallback(e, question, context), False
+
+    async def _agenerate_llm_response(self, question: str, context: str, chat_history: str) -> Tuple[str, bool]:
+        """Async _generate_llm_response using the chat model's ainvoke"""
+        if not (self.llm and self.use_chat_model):
+            return self._generate_fallback_response(question, context), False
 
+        try:
+            messages = self._format_messages(question, context, chat_history)
+            with span("llm"):
+                response = await self.llm.ainvoke(messages)
+            return self._llm_answer(messages, response), True
         except Exception as e:
-            logger.error(f"Error generating LLM response: {str(e)}, using fallback")
-            return self._generate_fallback_response(question, context)
+            return self._llm_error_fallback(e, question, context), False
+
+    def _format_messages(self, question: str, context: str, chat_history: str) -> List[Any]:
+        """Fill the prompt template"""
+        return self.prompt_template.format_messages(
+            context=context,
+            chat_history=chat_history,
+            question=question
+        )
+
+    def _llm_answer(self, messages: List[Any], response: Any) -> str:
+        """Answer text of a successful LLM call, recording the call and its tokens"""
+        answer = response.content.strip()
+        LLM_CALLS.inc(outcome="success")
+        self._record_llm_tokens(messages, response, answer)
+        return answer
+
+    def _llm_error_fallback(self, error: Exception, question: str, context: str) -> str:
+        """Record a failed LLM call and answer with the fallback method instead"""
+        LLM_CALLS.inc(outcome="error")
+        logger.error(f"Error generating LLM response: {str(error)}, using fallback")
+        return self._generate_fallback_response(question, context)
+
+    @staticmethod
+    def _record_llm_tokens(messages: List[Any], response: Any, answer: str) -> None:
+        """LLM tokens in/out, from the provider's usage metadata when it reports any, else estimated"""
+        usage = getattr(response, "usage_metadata", None) or {}
+        tokens = {
+            "input": usage.get("input_tokens") or sum(estimate_tokens(m.content) for m in messages),
+            "output": usage.get("output_tokens") or estimate_tokens(answer)
+        }
+        for kind, count in tokens.items():
+            record_tokens(kind, count)
+            LLM_TOKENS.inc(count, kind=kind)
+
+    def _stream_llm_response(self, question: str, context: str, chat_history: str,
+                             outcome: Dict[str, Any] = None) -> Iterator[str]:
+        """Stream response chunks from the LLM, or the fallback response line by line.
+
+        ``outcome["from_llm"]`` is set once the LLM stream completed.
+        """
+        if self.llm and self.use_chat_model:
+            messages = self._format_messages(question, context, chat_history)
+            streamed_any = False
+            try:
+                for chunk in self.llm.stream(messages):
+                    if chunk.content:
+                        streamed_any = True
+                        yield chunk.content
+                LLM_CALLS.inc(outcome="success")
+                if outcome is not None:
+                    outcome["from_llm"] = True
+                return
+            except Exception as e:
+                LLM_CALLS.inc(outcome="error")
+                if streamed_any:
+                    # Part of the answer has been sent; it cannot be replaced any more
+                    raise
+                logger.error(f"Error streaming LLM response: {str(e)}, using fallback")
+
+        yield from self._stream_fallback_response(question, context)
+
+    def _stream_fallback_response(self, question: str, context: str) -> Iterator[str]:
+        """Stream the fallback response one line at a time"""
+        yield from self._generate_fallback_response(question, context).splitlines(keepends=True)
 
     def _generate_fallback_response(self, question: str, context: str) -> str:
         """Generate an enhanced fallback response when LLM is not available"""
+        FALLBACK_RESPONSES.inc()
         try:
             # Enhanced keyword-based response generation for financial questions
             context_lines = context.split('\n')
@@ -287,7 +689,8 @@ Please provide a comprehensive answer based on the financial document context pr
                     "score": round(score, 3),
                     "metadata": {
                         "source": metadata.get('source', 'Unknown'),
-                        "chunk_id": metadata.get('chunk_id', 'Unknown')
+                        "chunk_id": metadata.get('chunk_id', 'Unknown'),
+                        "score_type": metadata.get('score_type', 'cosine')
                     }
                 }
                 sources.append(source)
@@ -300,7 +703,7 @@ Please provide a comprehensive answer based on the financial document context pr
         """Deduplicate sources based on content similarity and page limits"""
         sources = []
         page_source_count = {}
-        processed_contents = []
+        processed_signatures = []
 
         for doc, score in documents:
             metadata = doc.metadata
@@ -312,14 +715,15 @@ Please provide a comprehensive answer based on the financial document context pr
                 logger.debug(f"Skipping source from page {page_num} - max sources per page reached")
                 continue
 
-            # Check content similarity with already processed sources
+            # Check content similarity with already processed sources, comparing the
+            # MinHash signatures stored at ingest (computed here for older chunks)
+            signature = signature_for(content, metadata.get('minhash'))
             is_duplicate = False
-            for processed_content in processed_contents:
-                similarity = self._calculate_content_similarity(content, processed_content)
+            if processed_signatures:
+                similarity = float(estimated_similarity(signature, processed_signatures).max())
                 if similarity >= settings.content_similarity_threshold:
                     logger.debug(f"Skipping duplicate source (similarity: {similarity:.3f})")
                     is_duplicate = True
-                    break
 
             if not is_duplicate:
                 source = {
@@ -328,18 +732,19 @@ Please provide a comprehensive answer based on the financial document context pr
                     "score": round(score, 3),
                     "metadata": {
                         "source": metadata.get('source', 'Unknown'),
-                        "chunk_id": metadata.get('chunk_id', 'Unknown')
+                        "chunk_id": metadata.get('chunk_id', 'Unknown'),
+                        "score_type": metadata.get('score_type', 'cosine')
                     }
                 }
                 sources.append(source)
-                processed_contents.append(content)
+                processed_signatures.append(signature)
                 page_source_count[page_num] = page_source_count.get(page_num, 0) + 1
 
         logger.info(f"Deduplicated sources: {len(documents)} -> {len(sources)}")
         return sources
 
     def _calculate_content_similarity(self, content1: str, content2: str) -> float:
-        """Calculate similarity between two content strings"""
+        """Calculate similarity between two content strings (exact SequenceMatcher ratio)"""
         try:
             # Normalize content for comparison
             content1_norm = ' '.join(content1.lower().split())
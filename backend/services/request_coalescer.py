@@ -0,0 +1,60 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from services.query_cache import normalize_question
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def chat_request_key(question: str, chat_history: Optional[List[Dict[str, str]]] = None,
+                     filters: Optional[Dict[str, Any]] = None) -> Hashable:
+    """Requests with equal keys would produce the same answer and can share one execution"""
+    return (
+        normalize_question(question),
+        json.dumps(chat_history or [], sort_keys=True),
+        json.dumps(filters or {}, sort_keys=True)
+    )
+
+
+class RequestCoalescer:
+    """Single-flight execution of identical concurrent async calls.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is in flight await the same task and receive its result (or
+    exception). The task is shielded, so a caller that disconnects does not
+    cancel it for the others. Nothing is kept once the call completes.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await call(), or the already running call for the same key"""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced request with an identical in-flight request ({self.coalesced} total)")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for logging and monitoring"""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
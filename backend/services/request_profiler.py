@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+import cProfile
+import json
+import logging
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sampling", "cprofile")
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread at a fixed interval from a background thread.
+
+    All threads are sampled so work handed to executors (index search,
+    embedding, PDF parsing) is seen; each stack is rooted at its thread name,
+    so idle workers and other concurrent requests stay in separate branches.
+    The result is collapsed stacks ("root;...;leaf count" lines), which flame
+    graph tools (flamegraph.pl, speedscope) read directly.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> bytes:
+        """Stop sampling and return the collapsed stacks, most frequent first"""
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common()).encode("utf-8")
+
+
+class DeterministicProfiler:
+    """cProfile of the calling thread; the result is a pstats file (``python -m pstats``, snakeviz).
+
+    Only the thread that started it is traced, i.e. the event loop for async
+    endpoints, so work run in executors shows up as time waiting on them.
+    """
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> bytes:
+        self._profile.disable()
+        self._profile.create_stats()
+        # Same format as Profile.dump_stats, without going through a temporary file
+        return marshal.dumps(self._profile.stats)
+
+
+def create_profiler(mode: str, interval_ms: float):
+    """Profiler for a PROFILE_MODES mode, not yet started"""
+    if mode == "sampling":
+        return SamplingProfiler(interval_ms / 1000)
+    if mode == "cprofile":
+        return DeterministicProfiler()
+    raise ValueError(f"Unknown profiling mode '{mode}', expected one of {PROFILE_MODES}")
+
+
+class ProfileStore:
+    """Bounded on-disk ring of recent request profiles.
+
+    Each profile is a data file (``<id>.collapsed`` or ``<id>.prof``) plus a
+    ``<id>.json`` metadata sidecar; saving beyond ``max_profiles`` deletes the
+    oldest ones.
+    """
+
+    EXTENSIONS = {"sampling": "collapsed", "cprofile": "prof"}
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max(1, max_profiles)
+        self._last_created = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def save(self, profile_id: str, data: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Write a profile and its metadata, then drop the oldest profiles over the bound"""
+        with self._lock:
+            # Strictly increasing, so ring order is well defined for profiles saved in the same instant
+            self._last_created = max(time.time(), self._last_created + 1e-6)
+            metadata = {**metadata, "id": profile_id, "file": f"{profile_id}.{self.EXTENSIONS[metadata['mode']]}",
+                        "size": len(data), "created": self._last_created}
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, metadata["file"]), "wb") as f:
+                f.write(data)
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+                json.dump(metadata, f)
+
+            for stale in self._list()[self.max_profiles:]:
+                self._remove(stale)
+        logger.info(f"Saved {metadata['mode']} profile {profile_id} of {metadata['method']} {metadata['path']} "
+                    f"({metadata['duration']:.3f}s)")
+        return metadata
+
+    def _list(self) -> List[Dict[str, Any]]:
+        """Metadata of stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable profile metadata {name}: {str(e)}")
+        return sorted(profiles, key=lambda profile: profile["created"], reverse=True)
+
+    def _remove(self, metadata: Dict[str, Any]) -> None:
+        for name in (metadata["file"], f"{metadata['id']}.json"):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._list()
+
+    def get(self, profile_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """(metadata, data file path) of a stored profile, or None"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        with self._lock:
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return metadata, os.path.join(self.directory, metadata["file"])
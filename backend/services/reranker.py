@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from langchain.schema import Document
+from services.content_hash import hash_text
+from services.query_cache import LRUCache, normalize_question
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Reorders retrieval candidates with a local CPU cross-encoder.
+
+    Uncached (question, chunk) pairs are scored in one batched forward pass on
+    a pool of ``workers`` threads, which also load the model on first use.
+    The ``budget_ms`` clock starts when a pass begins running, so requests
+    queued behind others are not charged for the wait; a pass that cannot
+    start within the budget is cancelled. If scoring takes longer than the
+    budget the candidates are returned in their original order; the pass still
+    finishes and caches its scores for the next identical request. A model
+    that fails to load disables reranking.
+
+    Results keep their retrieval score; the cross-encoder score is added to
+    the document metadata as ``rerank_score``.
+    """
+
+    def __init__(self, model_name: str, budget_ms: float, cache_size: int, cache_ttl: float,
+                 max_length: int = 512, model: Any = None, workers: int = 1):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.max_length = max_length
+        self.score_cache = LRUCache(cache_size, cache_ttl)
+        self.reranked = 0
+        self.timeouts = 0
+        self.failures = 0
+        self._model = model
+        self._model_error: Optional[Exception] = None
+        self._model_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="reranker")
+
+    def warm_up(self) -> Future:
+        """Load the model in the background so the first request is not spent on it"""
+        return self._executor.submit(self._load_model)
+
+    def _load_model(self) -> Any:
+        with self._model_lock:
+            if self._model is None and self._model_error is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    start = time.perf_counter()
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+                    logger.info(f"Cross-encoder {self.model_name} loaded in {time.perf_counter() - start:.2f}s")
+                except Exception as e:
+                    self._model_error = e
+                    logger.error(f"Cross-encoder {self.model_name} unavailable, reranking disabled: {str(e)}")
+            if self._model_error is not None:
+                raise self._model_error
+            return self._model
+
+    def _score_pairs(self, pairs: List[Tuple[str, str]], keys: List[Tuple[str, str]]) -> List[float]:
+        """One batched forward pass; scores are cached as soon as they exist"""
+        model = self._load_model()
+        scores = [float(score) for score in model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)]
+        for key, score in zip(keys, scores):
+            self.score_cache.set(key, score)
+        return scores
+
+    def _run_pass(self, started: Dict[str, float], pairs: List[Tuple[str, str]],
+                  keys: List[Tuple[str, str]]) -> List[float]:
+        """Worker side of a scoring pass: records when it started running"""
+        started["at"] = time.monotonic()
+        started["event"].set()
+        return self._score_pairs(pairs, keys)
+
+    def _wait_for_scores(self, pairs: List[Tuple[str, str]], keys: List[Tuple[str, str]]) -> List[float]:
+        """Scores of a pass, raising FutureTimeoutError once budget_ms has passed since it started running"""
+        budget = self.budget_ms / 1000
+        started = {"event": threading.Event()}
+        future = self._executor.submit(self._run_pass, started, pairs, keys)
+        if not started["event"].wait(budget) and future.cancel():
+            raise FutureTimeoutError("reranker workers busy")
+        started["event"].wait()
+        return future.result(timeout=max(0.0, budget - (time.monotonic() - started["at"])))
+
+    def rerank(self, question: str, candidates: List[Tuple[Document, float]],
+               k: int) -> Tuple[List[Tuple[Document, float]], bool]:
+        """Top k candidates by cross-encoder score (kept in metadata["rerank_score"]).
+
+        Returns (results, reranked); on timeout or error the first k candidates
+        are returned unchanged with reranked=False.
+        """
+        if not candidates:
+            return candidates, True
+
+        question_key = normalize_question(question)
+        keys = [(question_key, hash_text(doc.page_content)) for doc, _ in candidates]
+        scores: List[Optional[float]] = [self.score_cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            if self._model_error is not None:
+                return candidates[:k], False
+
+            try:
+                for i, score in zip(missing, self._wait_for_scores(
+                    [(question, candidates[i][0].page_content) for i in missing], [keys[i] for i in missing]
+                )):
+                    scores[i] = score
+            except FutureTimeoutError:
+                self.timeouts += 1
+                logger.warning(f"Reranking {len(missing)} candidates exceeded {self.budget_ms:.0f}ms, "
+                               f"keeping retrieval order")
+                return candidates[:k], False
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error reranking candidates: {str(e)}, keeping retrieval order")
+                return candidates[:k], False
+
+        self.reranked += 1
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:k]
+        # The retrieval score stays the result score, so it remains comparable with unreranked results
+        return [
+            (Document(page_content=candidates[i][0].page_content,
+                      metadata={**candidates[i][0].metadata, "rerank_score": scores[i]}), candidates[i][1])
+            for i in order
+        ], True
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for logging and monitoring"""
+        return {
+            "reranked": self.reranked,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "score_cache": self.score_cache.stats()
+        }
@@ -0,0 +1,90 @@
+from typing import List, Dict, Any, Optional
+from collections import Counter
+import re
+
+# "FY2024", "FY 2024", "FY'24", "fiscal 2024", "fiscal year 2024", or a bare year such as "December 31, 2024";
+# digits glued to other digits or amounts ("$2024", "12,2024") are not years
+_FISCAL_YEAR_PATTERN = re.compile(
+    r"(?i)\bFY\s?'?(\d{2})\b|(?<![\d$.,])((?:19[5-9]|20\d)\d)(?!\d|[.,]\d)"
+)
+
+
+def fiscal_year_key(year: int) -> str:
+    """Boolean metadata key marking that a chunk refers to a fiscal year"""
+    return f"fy_{year}"
+
+
+def extract_fiscal_years(text: str) -> List[int]:
+    """Fiscal years mentioned in text, most frequently mentioned first (ties: most recent first)"""
+    counts = Counter()
+    for short_year, year in _FISCAL_YEAR_PATTERN.findall(text):
+        counts[int(year) if year else 2000 + int(short_year)] += 1
+    return sorted(counts, key=lambda y: (-counts[y], -y))
+
+
+def fiscal_period_metadata(years: List[int]) -> Dict[str, Any]:
+    """Chunk metadata for fiscal years: the primary year plus one flag per year.
+
+    Chroma metadata values must be scalars, so each year gets its own
+    ``fy_<year>`` flag instead of a list.
+    """
+    if not years:
+        return {}
+    metadata = {"fiscal_year": years[0]}
+    metadata.update({fiscal_year_key(year): True for year in years})
+    return metadata
+
+
+def build_where(sources: Optional[List[str]] = None, page_from: Optional[int] = None,
+                page_to: Optional[int] = None, fiscal_years: Optional[List[int]] = None) -> Optional[Dict[str, Any]]:
+    """Build a Chroma-style where clause from retrieval filters, or None when unfiltered"""
+    conditions = []
+    if sources:
+        conditions.append({"source": {"$in": list(sources)}})
+    if page_from is not None:
+        conditions.append({"page": {"$gte": page_from}})
+    if page_to is not None:
+        conditions.append({"page": {"$lte": page_to}})
+    if fiscal_years:
+        year_conditions = [{fiscal_year_key(year): {"$eq": True}} for year in sorted(set(fiscal_years))]
+        conditions.append(year_conditions[0] if len(year_conditions) == 1 else {"$or": year_conditions})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style where clause against one metadata dict"""
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported where operator: {operator}")
+                if not _OPERATORS[operator](value, operand):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
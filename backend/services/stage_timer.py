@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+T = TypeVar("T")
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Wall-clock seconds and token counts per named stage for one request.
+
+    Services report into whichever timer is active in the current context via
+    ``span``/``record_tokens``, so nothing has to be threaded through call
+    signatures. Stages run in parallel threads (e.g. extraction overlapping
+    embedding during ingest) may add up to more than the request's wall time.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.tokens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_tokens(self, kind: str, count: int) -> None:
+        with self._lock:
+            self.tokens[kind] = self.tokens.get(kind, 0) + count
+
+    def timings(self) -> Dict[str, float]:
+        """Seconds per stage, in the order stages first ran"""
+        with self._lock:
+            return dict(self.stages)
+
+    def token_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.tokens)
+
+
+@contextmanager
+def use_timer(timer: StageTimer) -> Iterator[StageTimer]:
+    """Make timer the target of span() calls in this context (inherited by tasks and copied contexts)"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block into the active StageTimer; a no-op when none is active"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(stage, time.perf_counter() - start)
+
+
+def timed_iter(stage: str, iterable: Iterable[T]) -> Iterator[T]:
+    """Yield from iterable, timing only the work of producing each item (not the consumer's)"""
+    iterator = iter(iterable)
+    while True:
+        with span(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def record_tokens(kind: str, count: int) -> None:
+    """Add a token count (e.g. "input", "output") to the active StageTimer, if any"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add_tokens(kind, count)
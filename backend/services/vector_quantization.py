@@ -0,0 +1,117 @@
+from typing import Optional, Tuple
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# Rows scored per block so the float32 up-cast of compact codes stays bounded
+_SCORE_BLOCK_ROWS = 65536
+
+
+class VectorCodec:
+    """Compact search representation of unit-normalized embeddings.
+
+    Vectors are optionally projected onto their top ``pca_dims`` principal
+    components (fitted on the stored vectors) and then kept as float32,
+    float16, or int8 with one float32 scale per row (symmetric scalar
+    quantization). Scores from the codes are approximate cosine similarities
+    meant for a first pass that is re-scored with the full-precision vectors.
+    """
+
+    def __init__(self, dtype: str = "float32", pca_dims: int = 0):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector storage dtype: {dtype} (expected one of {SUPPORTED_DTYPES})")
+        self.dtype = dtype
+        self.pca_dims = max(0, pca_dims)
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.fitted_rows = 0
+
+    @property
+    def is_exact(self) -> bool:
+        """True when codes would just duplicate the full-precision matrix"""
+        return self.dtype == "float32" and not self.pca_dims
+
+    def needs_fit(self, rows: int) -> bool:
+        """Whether the projection should be (re)fitted: first time enough rows exist, then when rows double"""
+        return bool(self.pca_dims) and rows >= max(self.pca_dims, 2 * self.fitted_rows)
+
+    def fit(self, vectors: np.ndarray) -> None:
+        """Fit the PCA projection on full-precision vectors"""
+        if not self.pca_dims or vectors.shape[1] <= self.pca_dims or len(vectors) < self.pca_dims:
+            return
+
+        self.mean = vectors.mean(axis=0)
+        # Rows of vt are principal directions, ordered by explained variance
+        _, _, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:self.pca_dims], dtype=np.float32)
+        self.fitted_rows = len(vectors)
+        logger.info(f"Fitted PCA projection {vectors.shape[1]} -> {self.pca_dims} dims on {len(vectors)} vectors")
+
+    def save_projection(self, path: str) -> None:
+        """Atomically write the fitted PCA projection, so other loads reuse it instead of refitting"""
+        if self.components is None:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, mean=self.mean, components=self.components, fitted_rows=np.int64(self.fitted_rows))
+        os.replace(tmp_path, path)
+
+    def load_projection(self, path: str, dim: Optional[int]) -> bool:
+        """Restore a saved projection matching ``pca_dims`` and the input dimension ``dim``;
+        without one the codec is left unfitted"""
+        self.mean, self.components, self.fitted_rows = None, None, 0
+        if not self.pca_dims or dim is None:
+            return False
+        try:
+            with np.load(path) as saved:
+                components = saved["components"]
+                if components.shape != (self.pca_dims, dim):
+                    return False
+                self.mean, self.components = saved["mean"], np.ascontiguousarray(components, dtype=np.float32)
+                self.fitted_rows = int(saved["fitted_rows"])
+                return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Could not read PCA projection {path}: {str(e)}, refitting")
+            return False
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Project (if fitted) and re-normalize so dot products stay cosine similarities"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.components is not None:
+            vectors = (vectors - self.mean) @ self.components.T
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Encode full-precision vectors into (codes, per-row scales)"""
+        projected = self.project(vectors)
+        if self.dtype == "float16":
+            return projected.astype(np.float16), None
+        if self.dtype == "int8":
+            scales = np.abs(projected).max(axis=1) / 127.0
+            scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+            codes = np.round(projected / scales[:, None]).astype(np.int8)
+            return codes, scales
+        return projected, None
+
+    def scores(self, codes: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of every code row to a full-precision query"""
+        projected_query = self.project(query[None, :])[0]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _SCORE_BLOCK_ROWS):
+            block = codes[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ projected_query
+        if scales is not None:
+            scores *= scales
+        return scores
+
+    @staticmethod
+    def nbytes(codes: Optional[np.ndarray], scales: Optional[np.ndarray]) -> int:
+        """In-memory size of encoded vectors"""
+        return (codes.nbytes if codes is not None else 0) + (scales.nbytes if scales is not None else 0)
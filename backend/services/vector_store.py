@@ -1,69 +1,94 @@
-from typing import List, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional
 from langchain.schema import Document
-from langchain.vectorstores import Chroma
 from langchain.embeddings import HuggingFaceEmbeddings
+from langchain.embeddings.base import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from services.ingest_manifest import IngestManifest
+from services.embedding_cache import CachedEmbeddings
+from services.query_cache import LRUCache, normalize_question
+from services.embedding_scheduler import BatchEmbedder
+from services.chroma_index import ChromaVectorIndex
+from services.lexical_index import BM25Index
+from services.retrieval_filters import build_where
+from services.mmr import mmr_select
+from services.reranker import CrossEncoderReranker
+from services.fake_providers import HashEmbeddings
+from services.context_packer import estimate_tokens
+from services.stage_timer import record_tokens, span
 from config import settings
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import json
 import logging
 import os
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+import time
+import uuid
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
 class VectorStoreService:
-    def __init__(self):
-        """Initialize vector store with ChromaDB and embeddings"""
+    def __init__(self, embeddings: Optional[Embeddings] = None, embedding_model_name: str = None):
+        """Initialize vector store (ChromaDB or NumPy backend) and embeddings.
+
+        ``embeddings`` replaces the configured provider (e.g. a local model in
+        benchmarks); it is still batched and cached like the provider would be.
+        """
         try:
-            # Try to initialize Google Gemini embeddings first, fallback to local embeddings
-            try:
-                if settings.google_api_key and settings.google_api_key.strip():
-                    self.embeddings = GoogleGenerativeAIEmbeddings(
-                        model=settings.embedding_model,
-                        google_api_key=settings.google_api_key
-                    )
-                    logger.info("Using Google Gemini embeddings")
-                else:
-                    raise ValueError("No Google API key provided")
-            except Exception as e:
-                logger.warning(f"Google Gemini embeddings failed: {str(e)}, falling back to local embeddings")
-                # Fallback to local HuggingFace embeddings
-                self.embeddings = HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/all-MiniLM-L6-v2",
-                    model_kwargs={'device': 'cpu'}
-                )
-                logger.info("Using local HuggingFace embeddings (sentence-transformers/all-MiniLM-L6-v2)")
+            if embeddings is not None:
+                self.embeddings = embeddings
+                self.embedding_model_name = embedding_model_name or type(embeddings).__name__
+                logger.info(f"Using provided embeddings ({self.embedding_model_name})")
+            else:
+                self.embeddings, self.embedding_model_name = self._create_embeddings()
+            # Unwrapped provider for throwaway texts (context compression segments)
+            self.base_embeddings = self.embeddings
+
+            # Embed in concurrent, rate-limited batches
+            self.embeddings = BatchEmbedder(self.embeddings)
+
+            # Wrap the embeddings with the persistent cache so ingest and queries both reuse vectors,
+            # and only cache misses reach the batch embedder
+            if settings.embedding_cache_enabled:
+                self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_model_name)
+
+            # Initialize the vector index backend selected by VECTOR_DB_TYPE
+            self.collection_name = "financial_documents"
+            self.index = self._create_index(settings.vector_db_type)
 
-            # Ensure vector store directory exists
-            os.makedirs(settings.vector_db_path, exist_ok=True)
+            # BM25 inverted index kept alongside the vector index for exact-token matches
+            # ("EBITDA", "2024", note numbers) and for answering without embeddings
+            self.lexical_index = BM25Index(
+                os.path.join(settings.vector_db_path, "lexical_index.jsonl"),
+                k1=settings.bm25_k1, b=settings.bm25_b
+            )
+            self._backfill_lexical_index()
 
-            # Initialize ChromaDB client
-            self.chroma_client = chromadb.PersistentClient(
-                path=settings.vector_db_path,
-                settings=ChromaSettings(
-                    anonymized_telemetry=False,
-                    allow_reset=True
-                )
+            # In-memory caches for repeated questions; retrieval results are scoped by
+            # index_version, which every mutation of the collection bumps
+            self.index_version = 0
+            self.query_embedding_cache = LRUCache(
+                settings.query_embedding_cache_size, settings.query_embedding_cache_ttl
+            )
+            self.retrieval_cache = LRUCache(settings.retrieval_cache_size, settings.retrieval_cache_ttl)
+            self.segment_embedding_cache = LRUCache(
+                settings.compression_embedding_cache_size, settings.compression_embedding_cache_ttl
             )
 
-            # Initialize or get collection
-            self.collection_name = "financial_documents"
-            try:
-                self.collection = self.chroma_client.get_collection(self.collection_name)
-                logger.info(f"Loaded existing collection: {self.collection_name}")
-            except:
-                self.collection = self.chroma_client.create_collection(
-                    name=self.collection_name,
-                    metadata={"description": "Financial statement documents"}
+            # Optional cross-encoder rerank of over-fetched candidates; the model loads in the background
+            self.reranker = None
+            if settings.enable_reranking:
+                self.reranker = CrossEncoderReranker(
+                    settings.reranker_model, settings.rerank_budget_ms,
+                    settings.rerank_cache_size, settings.rerank_cache_ttl, workers=settings.rerank_workers
                 )
-                logger.info(f"Created new collection: {self.collection_name}")
+                self.reranker.warm_up()
 
-            # Initialize Langchain Chroma wrapper
-            self.vector_store = Chroma(
-                client=self.chroma_client,
-                collection_name=self.collection_name,
-                embedding_function=self.embeddings
+            # Blocking index calls made from async request handlers run here, off the event loop
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.vector_store_workers), thread_name_prefix="vector-store"
             )
 
             logger.info("VectorStoreService initialized successfully")
@@ -72,55 +97,379 @@ class VectorStoreService:
             logger.error(f"Error initializing VectorStoreService: {str(e)}")
             raise
 
-    def add_documents(self, documents: List[Document]) -> None:
-        """Add documents to the vector store"""
+    @staticmethod
+    def _create_embeddings() -> Tuple[Embeddings, str]:
+        """Google Gemini embeddings when an API key is set, local HuggingFace embeddings otherwise
+        (or hashed fake embeddings with EMBEDDING_PROVIDER=fake)"""
+        if settings.embedding_provider.lower() == "fake":
+            logger.info("Using fake hashed embeddings (EMBEDDING_PROVIDER=fake)")
+            return HashEmbeddings(settings.fake_embedding_dimensions), f"fake-hash-{settings.fake_embedding_dimensions}"
+
+        # Try to initialize Google Gemini embeddings first, fallback to local embeddings
+        try:
+            if settings.google_api_key and settings.google_api_key.strip():
+                embeddings = GoogleGenerativeAIEmbeddings(
+                    model=settings.embedding_model,
+                    google_api_key=settings.google_api_key
+                )
+                logger.info("Using Google Gemini embeddings")
+                return embeddings, settings.embedding_model
+            raise ValueError("No Google API key provided")
+        except Exception as e:
+            logger.warning(f"Google Gemini embeddings failed: {str(e)}, falling back to local embeddings")
+            # Fallback to local HuggingFace embeddings
+            embeddings = HuggingFaceEmbeddings(
+                model_name="sentence-transformers/all-MiniLM-L6-v2",
+                model_kwargs={'device': 'cpu'}
+            )
+            logger.info("Using local HuggingFace embeddings (sentence-transformers/all-MiniLM-L6-v2)")
+            return embeddings, "sentence-transformers/all-MiniLM-L6-v2"
+
+    def _create_index(self, db_type: str):
+        """Build the vector index backend for the configured database type"""
+        db_type = db_type.lower()
+        if db_type in ("chromadb", "chroma"):
+            logger.info("Using ChromaDB vector backend")
+            return ChromaVectorIndex(settings.vector_db_path, self.collection_name)
+        if db_type == "numpy":
+            # Imported lazily so the Chroma-only setup does not load the NumPy backend
+            from services.numpy_index import NumpyVectorIndex
+            logger.info("Using NumPy memory-mapped vector backend")
+            return NumpyVectorIndex(os.path.join(settings.vector_db_path, self.collection_name))
+        raise ValueError(f"Unsupported VECTOR_DB_TYPE: {db_type} (expected 'chromadb' or 'numpy')")
+
+    def _backfill_lexical_index(self) -> None:
+        """Build the lexical index from the vector index when it predates it"""
+        if self.lexical_index.count() or not self.index.count():
+            return
+
+        ids, texts, metadatas = self.index.documents()
+        self.lexical_index.add(ids, texts, metadatas)
+        logger.info(f"Backfilled lexical index with {len(ids)} documents from the vector store")
+
+    def add_documents(self, documents: List[Document]) -> Dict[str, float]:
+        """Add documents to the vector store and return throughput stats"""
         try:
             if not documents:
                 logger.warning("No documents to add")
-                return
+                return {}
 
             logger.info(f"Adding {len(documents)} documents to vector store")
-
-            # Add documents to the vector store
-            self.vector_store.add_documents(documents)
-
-            logger.info(f"Successfully added {len(documents)} documents to vector store")
+            start_time = time.time()
+
+            texts = [doc.page_content for doc in documents]
+            metadatas = [doc.metadata for doc in documents]
+            # Upsert by chunk_id when every document carries a unique one so
+            # re-ingesting a chunk replaces it
+            ids = self._document_ids(documents) or [str(uuid.uuid4()) for _ in documents]
+
+            # Indexed lexically first so chunks stay searchable even if embedding fails
+            with span("upsert"):
+                self.lexical_index.add(ids, texts, metadatas)
+
+            with span("embed"):
+                embeddings = self.embeddings.embed_documents(texts)
+            record_tokens("input", sum(estimate_tokens(text) for text in texts))
+            embed_time = time.time()
+
+            with span("upsert"):
+                self.index.add(ids, embeddings, texts, metadatas)
+                self._bump_index_version()
+
+            end_time = time.time()
+            stats = {
+                "chunks": len(documents),
+                "embed_seconds": embed_time - start_time,
+                "upsert_seconds": end_time - embed_time,
+                "chunks_per_second": len(documents) / max(end_time - start_time, 1e-9)
+            }
+
+            logger.info(
+                f"Successfully added {len(documents)} documents to vector store "
+                f"({stats['chunks_per_second']:.1f} chunks/sec, embed {stats['embed_seconds']:.2f}s, "
+                f"upsert {stats['upsert_seconds']:.2f}s)"
+            )
+            if isinstance(self.embeddings, CachedEmbeddings):
+                logger.info(f"Embedding cache stats: {self.embeddings.stats()}")
+            return stats
 
         except Exception as e:
             logger.error(f"Error adding documents to vector store: {str(e)}")
             raise
 
-    def similarity_search(self, query: str, k: int = None) -> List[Tuple[Document, float]]:
-        """Search for similar documents with optional deduplication"""
+    @staticmethod
+    def _document_ids(documents: List[Document]) -> Optional[List[str]]:
+        """Stable IDs from chunk_id metadata, or None to let the store generate them"""
+        ids = [doc.metadata.get("chunk_id") for doc in documents]
+        if all(ids) and len(set(ids)) == len(ids):
+            return ids
+        return None
+
+    def _bump_index_version(self) -> None:
+        """Mark the collection as changed, invalidating cached retrieval results"""
+        self.index_version += 1
+        self.retrieval_cache.clear()
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the embedding of previously seen (normalized) questions"""
+        cache_key = normalize_question(query)
+        with span("embed"):
+            embedding = self.query_embedding_cache.get(cache_key)
+            if embedding is None:
+                embedding = self.embeddings.embed_query(query)
+                self.query_embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    def embed_segments(self, texts: List[str]) -> List[List[float]]:
+        """Embed short throwaway texts (context compression segments) with the provider directly.
+
+        They skip the persistent embedding cache, which would fill up with
+        one-off sentence vectors, and the ingest rate limiter; repeats are
+        served from a bounded in-memory cache instead.
+        """
+        vectors = {text: self.segment_embedding_cache.get(text) for text in dict.fromkeys(texts)}
+        missing = [text for text, vector in vectors.items() if vector is None]
+        if missing:
+            for text, vector in zip(missing, self.base_embeddings.embed_documents(missing)):
+                vectors[text] = vector
+                self.segment_embedding_cache.set(text, vector)
+        return [vectors[text] for text in texts]
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Async embed_query: the provider call is awaited instead of blocking the event loop"""
+        cache_key = normalize_question(query)
+        with span("embed"):
+            embedding = self.query_embedding_cache.get(cache_key)
+            if embedding is None:
+                embedding = await self.embeddings.aembed_query(query)
+                self.query_embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    async def run(self, func, *args):
+        """Run a blocking vector store call on the dedicated executor, in a copy of the caller's context"""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, context.run, func, *args)
+
+    def _lexical_fallback(self, error: Exception) -> str:
+        """Search mode to use when the query embedding failed"""
+        if not self.lexical_index.count():
+            raise error
+        logger.warning(f"Query embedding failed: {str(error)}, falling back to lexical search")
+        return "lexical"
+
+    def similarity_search(self, query: str, k: int = None,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Search for similar documents (vector, BM25 or both fused) with optional deduplication.
+
+        ``filters`` (sources, page_from, page_to, fiscal_years) are pushed down
+        into the index as a metadata where clause, so only matching chunks are scored.
+        """
+        mode = settings.retrieval_mode.lower()
+        embedding = None
+        if mode != "lexical":
+            try:
+                embedding = self.embed_query(query)
+            except Exception as e:
+                mode = self._lexical_fallback(e)
+        return self._search(query, embedding, mode, k, filters)
+
+    async def asimilarity_search(self, query: str, k: int = None,
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Async similarity_search: awaits the query embedding, then searches on the dedicated executor"""
+        mode = settings.retrieval_mode.lower()
+        embedding = None
+        if mode != "lexical":
+            try:
+                embedding = await self.aembed_query(query)
+            except Exception as e:
+                mode = self._lexical_fallback(e)
+        return await self.run(self._search, query, embedding, mode, k, filters)
+
+    def _search(self, query: str, embedding: Optional[List[float]], mode: str, k: int = None,
+                filters: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Retrieve with an already computed query embedding (None for lexical-only search)"""
         try:
             if k is None:
                 k = settings.retrieval_k
+            where = build_where(**filters) if filters else None
 
-            logger.info(f"Searching for similar documents with query: '{query[:100]}...' (k={k})")
+            logger.info(f"Searching for similar documents with query: '{query[:100]}...' (k={k}, mode={mode})")
 
-            # Retrieve more documents initially to allow for deduplication
-            search_k = k * 2 if settings.enable_source_deduplication else k
+            cache_key = (
+                tuple(embedding) if embedding is not None else normalize_question(query), k, mode,
+                json.dumps(where, sort_keys=True), settings.similarity_threshold,
+                settings.enable_source_deduplication, settings.retrieval_diversification, settings.mmr_lambda,
+                self.reranker is not None, settings.rerank_fetch_factor, self.index_version
+            )
+            cached_results = self.retrieval_cache.get(cache_key)
+            if cached_results is not None:
+                logger.info(f"Returning {len(cached_results)} cached retrieval results")
+                return list(cached_results)
 
-            # Perform similarity search with scores
-            results = self.vector_store.similarity_search_with_score(query, k=search_k)
+            # With reranking, diversification yields a larger candidate pool for the cross-encoder
+            candidate_k = k * max(1, settings.rerank_fetch_factor) if self.reranker is not None else k
 
-            # Filter by similarity threshold
-            filtered_results = [
-                (doc, score) for doc, score in results
-                if score >= settings.similarity_threshold
-            ]
+            # Retrieve more documents initially to allow for deduplication
+            use_mmr = (
+                settings.enable_source_deduplication and embedding is not None
+                and settings.retrieval_diversification.lower() == "mmr"
+            )
+            if use_mmr:
+                search_k = candidate_k * max(1, settings.mmr_fetch_factor)
+            else:
+                search_k = candidate_k * 2 if settings.enable_source_deduplication else candidate_k
+
+            with span("search"):
+                vector_results = []
+                candidate_vectors = {}
+                if embedding is not None:
+                    if use_mmr:
+                        # Fetch stored embeddings with the results so MMR needs no extra lookups
+                        results, vectors = self.index.query_with_embeddings(embedding, k=search_k, where=where)
+                        candidate_vectors = {
+                            self._result_key(doc): vector for (doc, _), vector in zip(results, vectors)
+                        }
+                    else:
+                        results = self.index.query(embedding, k=search_k, where=where)
+                    # Filter by similarity threshold
+                    vector_results = [
+                        (doc, score) for doc, score in results
+                        if score >= settings.similarity_threshold
+                    ]
+
+                lexical_results = []
+                if mode in ("hybrid", "lexical"):
+                    lexical_results = self.lexical_index.search(query, search_k, where=where)
+                    if mode == "hybrid":
+                        lexical_results = self._score_keyword_hits(
+                            embedding, lexical_results, vector_results, candidate_vectors
+                        )
+                    else:
+                        lexical_results = self._normalize_lexical_scores(lexical_results)
+
+                if mode == "hybrid":
+                    filtered_results = self._reciprocal_rank_fusion(vector_results, lexical_results, search_k)
+                elif mode == "lexical":
+                    filtered_results = lexical_results
+                else:
+                    filtered_results = vector_results
 
             # Apply basic deduplication at retrieval level if enabled
-            if settings.enable_source_deduplication:
-                filtered_results = self._deduplicate_at_retrieval(filtered_results, k)
-
-            logger.info(f"Found {len(filtered_results)} documents above similarity threshold")
+            with span("dedup"):
+                if use_mmr:
+                    filtered_results = self._diversify_mmr(embedding, filtered_results, candidate_vectors, candidate_k)
+                elif settings.enable_source_deduplication:
+                    filtered_results = self._deduplicate_at_retrieval(filtered_results, candidate_k)
+
+            reranked = True
+            if self.reranker is not None:
+                with span("rerank"):
+                    filtered_results, reranked = self.reranker.rerank(query, filtered_results, k)
+            else:
+                filtered_results = filtered_results[:k]
+
+            logger.info(f"Found {len(filtered_results)} documents "
+                        f"({len(vector_results)} vector, {len(lexical_results)} lexical candidates)")
+            # Results that missed the rerank budget are not cached, so a later request can rerank them
+            if reranked:
+                self.retrieval_cache.set(cache_key, list(filtered_results))
             return filtered_results
 
         except Exception as e:
             logger.error(f"Error performing similarity search: {str(e)}")
             raise
 
+    def _score_keyword_hits(self, query_embedding: List[float], lexical_results: List[Tuple[Document, float]],
+                            vector_results: List[Tuple[Document, float]],
+                            candidate_vectors: Dict[str, np.ndarray]) -> List[Tuple[Document, float]]:
+        """Give BM25 hits their cosine similarity, dropping those under SIMILARITY_THRESHOLD.
+
+        Every hybrid result then carries a comparable cosine score. Hits the vector
+        search already kept stay in; hits without a stored vector are dropped. The
+        vectors looked up are added to ``candidate_vectors`` for MMR.
+        """
+        vector_keys = {self._result_key(doc) for doc, _ in vector_results}
+        keys = [self._result_key(doc) for doc, _ in lexical_results]
+        vectors = dict(candidate_vectors)
+        vectors.update(self.index.get_embeddings([key for key in keys if key not in vectors]))
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query)) or 1.0
+        scored = []
+        for (doc, _), key in zip(lexical_results, keys):
+            if key not in vectors:
+                continue
+            vector = np.asarray(vectors[key], dtype=np.float32)
+            similarity = float(np.dot(query, vector) / (query_norm * (float(np.linalg.norm(vector)) or 1.0)))
+            if key in vector_keys or similarity >= settings.similarity_threshold:
+                scored.append((doc, similarity))
+                candidate_vectors[key] = vectors[key]
+
+        logger.debug(f"Keyword hits above the similarity threshold: {len(lexical_results)} -> {len(scored)}")
+        return scored
+
+    @staticmethod
+    def _normalize_lexical_scores(results: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Scale BM25 scores to [0, 1] relative to the best match, marked with score_type "bm25"
+        so they are not presented as similarities"""
+        if not results:
+            return results
+        top_score = results[0][1] or 1.0
+        return [
+            (Document(page_content=doc.page_content, metadata={**doc.metadata, "score_type": "bm25"}),
+             score / top_score)
+            for doc, score in results
+        ]
+
+    @staticmethod
+    def _reciprocal_rank_fusion(vector_results: List[Tuple[Document, float]],
+                                lexical_results: List[Tuple[Document, float]],
+                                k: int) -> List[Tuple[Document, float]]:
+        """Merge ranked lists by reciprocal-rank fusion: sum of 1 / (RRF_K + rank).
+
+        Each document keeps the score of the list it was found in (the vector
+        score when it is in both), so downstream display is unchanged.
+        """
+        fused: Dict[str, float] = {}
+        entries: Dict[str, Tuple[Document, float]] = {}
+        # Lexical first so documents found by both keep their vector score
+        for results in (lexical_results, vector_results):
+            for rank, (doc, score) in enumerate(results, start=1):
+                key = VectorStoreService._result_key(doc)
+                fused[key] = fused.get(key, 0.0) + 1.0 / (settings.rrf_k + rank)
+                entries[key] = (doc, score)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [entries[key] for key in ranked]
+
+    @staticmethod
+    def _result_key(doc: Document) -> str:
+        """Identity of a retrieved chunk across result lists"""
+        return doc.metadata.get("chunk_id") or doc.page_content
+
+    def _diversify_mmr(self, query_embedding: List[float], results: List[Tuple[Document, float]],
+                       candidate_vectors: Dict[str, np.ndarray], target_k: int) -> List[Tuple[Document, float]]:
+        """Select target_k results by maximal marginal relevance (MMR_LAMBDA)"""
+        if len(results) <= 1:
+            return results[:target_k]
+
+        keys = [self._result_key(doc) for doc, _ in results]
+        missing = [(key, doc) for key, (doc, _) in zip(keys, results) if key not in candidate_vectors]
+        if missing:
+            # Lexical-only candidates: stored vectors by chunk ID, embedding the text as a last resort
+            candidate_vectors = dict(candidate_vectors)
+            candidate_vectors.update(self.index.get_embeddings([key for key, _ in missing]))
+            unresolved = [(key, doc) for key, doc in missing if key not in candidate_vectors]
+            if unresolved:
+                vectors = self.embeddings.embed_documents([doc.page_content for _, doc in unresolved])
+                candidate_vectors.update(zip((key for key, _ in unresolved), vectors))
+
+        selected = mmr_select(
+            query_embedding, np.array([candidate_vectors[key] for key in keys]), target_k, settings.mmr_lambda
+        )
+        logger.debug(f"MMR diversification: {len(results)} -> {len(selected)}")
+        return [results[i] for i in selected]
+
     def _deduplicate_at_retrieval(self, results: List[Tuple[Document, float]], target_k: int) -> List[Tuple[Document, float]]:
         """Basic deduplication at retrieval level to avoid obvious duplicates"""
         if not results:
@@ -157,7 +506,9 @@ class VectorStoreService:
             logger.info(f"Deleting {len(document_ids)} documents from vector store")
 
             # Delete documents by IDs
-            self.collection.delete(ids=document_ids)
+            self.index.delete(document_ids)
+            self.lexical_index.delete(document_ids)
+            self._bump_index_version()
 
             logger.info(f"Successfully deleted {len(document_ids)} documents")
 
@@ -168,8 +519,8 @@ class VectorStoreService:
     def get_document_count(self) -> int:
         """Get total number of documents in vector store"""
         try:
-            count = self.collection.count()
-            logger.info(f"Vector store contains {count} documents")
+            count = self.index.count()
+            logger.debug(f"Vector store contains {count} documents")
             return count
 
         except Exception as e:
@@ -180,17 +531,11 @@ class VectorStoreService:
         """Clear all documents from the collection"""
         try:
             logger.info("Clearing all documents from vector store")
-            self.chroma_client.delete_collection(self.collection_name)
-            self.collection = self.chroma_client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Financial statement documents"}
-            )
-            # Reinitialize the vector store
-            self.vector_store = Chroma(
-                client=self.chroma_client,
-                collection_name=self.collection_name,
-                embedding_function=self.embeddings
-            )
+            self.index.clear()
+            self.lexical_index.clear()
+            # The ingest manifest describes what is in the collection, so it goes too
+            IngestManifest().clear()
+            self._bump_index_version()
             logger.info("Successfully cleared vector store")
 
         except Exception as e:
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the semantic answer cache in RAGPipeline
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import AIMessage, Document
+from config import settings
+from services.answer_cache import SemanticAnswerCache
+from services.rag_pipeline import RAGPipeline
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Paraphrases map to nearly the same embedding, other questions to an orthogonal one
+QUESTION_EMBEDDINGS = {
+    "What is the total revenue?": [1.0, 0.0, 0.0],
+    "what's the total revenue": [0.99, 0.05, 0.0],
+    "How is the cash flow situation?": [0.0, 1.0, 0.0],
+}
+
+
+class MockVectorStore:
+    index_version = 0
+
+    def similarity_search(self, query, k=5, filters=None):
+        return [(Document(
+            page_content="Total revenue for 2024 was $1.2 billion.",
+            metadata={"page": 1, "source": "test.pdf", "chunk_id": "test_1_1"}
+        ), 0.95)]
+
+    def embed_query(self, query):
+        return QUESTION_EMBEDDINGS[query]
+
+
+class CountingChatModel:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"Total revenue was $1.2 billion (answer #{self.calls}).")
+
+
+def create_pipeline():
+    settings.google_api_key = ""
+    rag_pipeline = RAGPipeline(MockVectorStore())
+    rag_pipeline.llm = CountingChatModel()
+    rag_pipeline.use_chat_model = True
+    return rag_pipeline
+
+
+def test_cache_similarity_and_scope():
+    """Hits need a similar question in the same scope"""
+    cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.95)
+    cache.set([1.0, 0.0], "scope-a", "answer")
+
+    assert cache.get([0.99, 0.05], "scope-a") == "answer"
+    assert cache.get([0.99, 0.05], "scope-b") is None
+    assert cache.get([0.5, 0.5], "scope-a") is None
+    logger.info(f"✅ Cache stats: {cache.stats()}")
+
+
+def test_paraphrase_served_from_cache():
+    """A paraphrased question over the same chunks should reuse the first answer"""
+    rag_pipeline = create_pipeline()
+
+    first = rag_pipeline.generate_answer("What is the total revenue?")
+    second = rag_pipeline.generate_answer("what's the total revenue")
+    other = rag_pipeline.generate_answer("How is the cash flow situation?")
+
+    assert not first["cached"] and second["cached"] and not other["cached"]
+    assert second["answer"] == first["answer"]
+    assert rag_pipeline.llm.calls == 2
+    logger.info("✅ Paraphrase answered from cache, different question generated")
+
+
+def test_index_version_and_history_scope():
+    """Changing documents or chat history should bypass cached answers"""
+    rag_pipeline = create_pipeline()
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]
+
+    rag_pipeline.generate_answer("What is the total revenue?", chat_history=history)
+    same_history = rag_pipeline.generate_answer("What is the total revenue?", chat_history=list(history))
+    new_history = rag_pipeline.generate_answer("What is the total revenue?", chat_history=history[:1])
+    rag_pipeline.vector_store.index_version += 1
+    new_version = rag_pipeline.generate_answer("What is the total revenue?", chat_history=history)
+
+    assert same_history["cached"]
+    assert not new_history["cached"] and not new_version["cached"]
+    assert rag_pipeline.llm.calls == 3
+    logger.info("✅ Answer cache scoped by chat history and index version")
+
+
+if __name__ == "__main__":
+    test_cache_similarity_and_scope()
+    test_paraphrase_served_from_cache()
+    test_index_version_and_history_scope()
+    logger.info("🎉 All answer cache tests passed")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the async chat path: parallel chats should take about the
+slowest request's latency, not the sum of all of them
+"""
+
+import sys
+import os
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from langchain.schema import AIMessage, Document
+from config import settings
+import main
+from services.fake_providers import FakeChatModel
+from services.rag_pipeline import RAGPipeline
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARALLEL_CHATS = 8
+SEARCH_LATENCY = 0.2
+LLM_LATENCY = 0.5
+
+
+class SlowVectorStore:
+    """Vector store stand-in whose search blocks its thread like a Chroma query would"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=PARALLEL_CHATS)
+
+    def similarity_search(self, query, k=5, filters=None):
+        time.sleep(SEARCH_LATENCY)
+        return [(Document(
+            page_content="Total revenue for 2024 was $1.2 billion.",
+            metadata={"page": 1, "source": "test.pdf", "chunk_id": "test_1_1"}
+        ), 0.95)]
+
+    async def asimilarity_search(self, query, k=5, filters=None):
+        return await self.run(self.similarity_search, query, k, filters)
+
+    def get_document_count(self):
+        return 1
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+
+class SlowChatModel:
+    """Chat model stand-in with a fixed response latency"""
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(LLM_LATENCY)
+        return AIMessage(content="Total revenue was $1.2 billion (page 1).")
+
+
+def create_app_services():
+    settings.google_api_key = ""
+    main.vector_store = SlowVectorStore()
+    main.rag_pipeline = RAGPipeline(main.vector_store)
+    main.rag_pipeline.llm = SlowChatModel()
+    main.rag_pipeline.use_chat_model = True
+
+
+async def post_parallel_chats():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/chat", json={"question": f"What is the total revenue? ({i})"})
+            for i in range(PARALLEL_CHATS)
+        ])
+        return time.perf_counter() - start, responses
+
+
+def test_parallel_chats_overlap():
+    """N parallel /api/chat requests should finish in roughly max, not sum, latency"""
+    create_app_services()
+
+    elapsed, responses = asyncio.run(post_parallel_chats())
+
+    single_latency = SEARCH_LATENCY + LLM_LATENCY
+    assert all(response.status_code == 200 for response in responses)
+    assert all("1.2 billion" in response.json()["answer"] for response in responses)
+    assert elapsed < 2 * single_latency, f"{PARALLEL_CHATS} chats took {elapsed:.2f}s"
+    logger.info(f"✅ {PARALLEL_CHATS} parallel chats in {elapsed:.2f}s "
+                f"(one chat ~{single_latency:.1f}s, serial ~{PARALLEL_CHATS * single_latency:.1f}s)")
+
+
+def test_sync_and_async_paths_agree():
+    """generate_answer and agenerate_answer share their steps and return the same result"""
+    settings.google_api_key = ""
+    vector_store = SlowVectorStore()
+    rag_pipeline = RAGPipeline(vector_store)
+    rag_pipeline.llm = FakeChatModel(output_tokens=10, first_token_ms=1, token_ms=1)
+    rag_pipeline.use_chat_model = True
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]
+
+    sync_result = rag_pipeline.generate_answer("What was revenue?", history)
+    rag_pipeline.answer_cache.clear()
+    async_result = asyncio.run(rag_pipeline.agenerate_answer("What was revenue?", history))
+
+    for key in ("answer", "sources", "cached", "prompt_tokens", "tokens"):
+        assert sync_result[key] == async_result[key], key
+    assert sync_result["answer"].startswith("Simulated answer to 'What was revenue?'")
+    assert set(sync_result["timings"]) == set(async_result["timings"])
+    logger.info("✅ Sync and async answers match")
+
+
+if __name__ == "__main__":
+    test_parallel_chats_overlap()
+    test_sync_and_async_paths_agree()
+    logger.info("🎉 All async chat tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming answers (/api/chat/stream, Server-Sent Events)
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from langchain.schema import Document
+from langchain.schema.messages import AIMessageChunk
+from config import settings
+import main
+from services.rag_pipeline import RAGPipeline
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MockVectorStore:
+    def similarity_search(self, query, k=5, filters=None):
+        return [(Document(
+            page_content="Total revenue for 2024 was $1.2 billion, a 15% increase.",
+            metadata={"page": 1, "source": "test.pdf", "chunk_id": "test_1_1"}
+        ), 0.95)]
+
+    def get_document_count(self):
+        return 1
+
+    async def run(self, func, *args):
+        return func(*args)
+
+
+class FakeStreamingLLM:
+    """Chat model stand-in whose stream() yields a few chunks"""
+    def stream(self, messages):
+        for text in ["Total revenue ", "was $1.2 billion ", "(page 1)."]:
+            yield AIMessageChunk(content=text)
+
+
+def create_pipeline(llm=None):
+    settings.google_api_key = ""
+    rag_pipeline = RAGPipeline(MockVectorStore())
+    if llm is not None:
+        rag_pipeline.llm = llm
+        rag_pipeline.use_chat_model = True
+    return rag_pipeline
+
+
+def test_stream_answer_event_order():
+    """Sources come first, then tokens, then a done event with timings"""
+    events = list(create_pipeline(FakeStreamingLLM()).stream_answer("What is the total revenue?"))
+
+    assert [event["event"] for event in events] == ["sources", "token", "token", "token", "done"]
+    assert events[0]["sources"][0]["page"] == 1
+    assert "".join(event["text"] for event in events[1:4]) == "Total revenue was $1.2 billion (page 1)."
+    assert set(events[-1]["timings"]) == {"retrieval", "context", "generation"}
+    logger.info(f"✅ Event order and timings: {events[-1]}")
+
+
+def test_fallback_response_streams():
+    """Without an LLM the fallback response should arrive as several token events"""
+    events = list(create_pipeline().stream_answer("What is the total revenue?"))
+    tokens = [event["text"] for event in events if event["event"] == "token"]
+
+    assert len(tokens) > 1
+    assert "Financial Information Found" in "".join(tokens)
+    logger.info(f"✅ Fallback streamed in {len(tokens)} chunks")
+
+
+def test_sse_endpoint():
+    """The endpoint should emit well-formed Server-Sent Events"""
+    main.vector_store = MockVectorStore()
+    main.rag_pipeline = create_pipeline(FakeStreamingLLM())
+    client = TestClient(main.app)
+
+    response = client.post("/api/chat/stream", json={"question": "What is the total revenue?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = [block for block in response.text.split("\n\n") if block]
+    names = [block.split("\n")[0].removeprefix("event: ") for block in blocks]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert "processing_time" in json.loads(blocks[-1].split("\n")[1].removeprefix("data: "))
+    logger.info(f"✅ SSE events: {names}")
+
+
+if __name__ == "__main__":
+    test_stream_answer_event_order()
+    test_fallback_response_streams()
+    test_sse_endpoint()
+    logger.info("🎉 All chat streaming tests passed")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test script for extractive context compression
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import Document
+from config import settings
+from services.context_compressor import ContextCompressor, split_segments, GAP_MARKER
+from services.fake_providers import FakeChatModel, HashEmbeddings
+from services.rag_pipeline import RAGPipeline
+from services.vector_store import VectorStoreService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INCOME_STATEMENT = """INCOME STATEMENT - YEAR ENDED DECEMBER 31, 2024
+Total Revenue: $1,200,000,000 (15% increase from 2023)
+Product Sales: $900,000,000
+Service Revenue: $300,000,000
+Cost of Goods Sold (COGS): $600,000,000
+Gross Profit: $600,000,000
+Research and Development: $120,000,000
+Sales and Marketing: $80,000,000
+General and Administrative: $60,000,000
+Operating Income: $340,000,000
+Interest Expense: $15,000,000
+Income Tax Expense: $82,000,000
+Net Income: $250,000,000
+Net Profit Margin: 20.8%
+Earnings Per Share: $2.50
+Management expects growth to continue. Demand in 2025 is expected to remain strong."""
+
+
+def create_compressor(embedding_weight=0.0):
+    return ContextCompressor(keep_ratio=0.2, neighbors=1, embedding_weight=embedding_weight, min_chunk_chars=100)
+
+
+def fake_embed_query(text):
+    return [1.0, 0.0] if "profitable" in text.lower() or "margin" in text.lower() else [0.0, 1.0]
+
+
+def fake_embed_documents(texts):
+    return [fake_embed_query(text) for text in texts]
+
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self, dimensions):
+        super().__init__(dimensions)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+SERVICE_SETTINGS = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_cache_path",
+                    "embedding_requests_per_second", "enable_reranking", "similarity_threshold", "google_api_key",
+                    "llm_provider", "fake_llm_first_token_ms", "fake_llm_token_ms", "enable_context_compression",
+                    "compression_embedding_weight")
+
+
+def create_pipeline(embeddings, embedding_weight=0.5, embedding_cache=False):
+    """A real RAGPipeline with compression on, over a NumPy store holding the income statement.
+
+    Uses the fake chat model and a temp directory; callers save and restore SERVICE_SETTINGS.
+    """
+    settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+    settings.embedding_cache_enabled = embedding_cache
+    settings.embedding_cache_path = os.path.join(settings.vector_db_path, "embeddings.sqlite3")
+    settings.embedding_requests_per_second, settings.enable_reranking = 0, False
+    # Hashed bag-of-words vectors score far below a real model's similarities
+    settings.similarity_threshold = 0.0
+    settings.google_api_key, settings.llm_provider = "", "fake"
+    settings.fake_llm_first_token_ms, settings.fake_llm_token_ms = 0, 0
+    settings.enable_context_compression = True
+    settings.compression_embedding_weight = embedding_weight
+
+    vector_store = VectorStoreService(embeddings=embeddings, embedding_model_name="hash-test")
+    vector_store.add_documents([Document(page_content=INCOME_STATEMENT,
+                                         metadata={"page": 1, "chunk_id": "income", "source": "report.pdf"})])
+    return RAGPipeline(vector_store)
+
+
+def test_split_segments():
+    """Lines and sentences become segments; decimals and amounts stay intact"""
+    segments = split_segments(INCOME_STATEMENT)
+
+    assert "Net Profit Margin: 20.8%" in segments
+    assert segments[-2:] == ["Management expects growth to continue.", "Demand in 2025 is expected to remain strong."]
+    logger.info(f"✅ {len(segments)} segments")
+
+
+def test_lexical_compression_keeps_answer_line():
+    """The answer line and its neighbors survive; the rest is cut and marked"""
+    documents = [(Document(page_content=INCOME_STATEMENT, metadata={"page": 1}), 0.9)]
+
+    compressed, stats = create_compressor().compress("What is the net profit margin?", documents)
+    text = compressed[0][0].page_content
+
+    assert "Net Profit Margin: 20.8%" in text and "Net Income: $250,000,000" in text
+    assert "Product Sales" not in text and GAP_MARKER in text
+    assert compressed[0][0].metadata == {"page": 1} and stats["ratio"] < 0.5
+    logger.info(f"✅ Compressed to {stats['ratio']:.0%}:\n{text}")
+
+
+def test_embedding_scores_find_paraphrase():
+    """Embedding similarity should find lines a paraphrased question has no words in common with"""
+    documents = [(Document(page_content=INCOME_STATEMENT, metadata={"page": 1}), 0.9)]
+    question = "How profitable was the company?"
+
+    lexical, _ = create_compressor().compress(question, documents)
+    blended, _ = create_compressor(0.5).compress(question, documents, fake_embed_query, fake_embed_documents)
+
+    def failing_embed(texts):
+        raise RuntimeError("embedding service unavailable")
+    fallback, _ = create_compressor(0.5).compress(question, documents, fake_embed_query, failing_embed)
+
+    # No question term occurs in the chunk, so lexical scoring alone cannot tell what to cut
+    assert lexical[0][0].page_content == INCOME_STATEMENT
+    assert "Net Profit Margin" in blended[0][0].page_content and "Product Sales" not in blended[0][0].page_content
+    assert fallback[0][0].page_content == lexical[0][0].page_content
+    logger.info("✅ Embedding similarity blended in, lexical fallback on embedding errors")
+
+
+def test_pipeline_compresses_prompt_not_sources():
+    """With compression enabled, the LLM sees compressed chunks and the response cites full ones"""
+    prompts = []
+    generate = FakeChatModel._generate
+
+    def recording_generate(model, messages, *args, **kwargs):
+        prompts.append("\n".join(message.content for message in messages))
+        return generate(model, messages, *args, **kwargs)
+
+    saved = {name: getattr(settings, name) for name in SERVICE_SETTINGS}
+    FakeChatModel._generate = recording_generate
+    try:
+        rag_pipeline = create_pipeline(HashEmbeddings(dimensions=64), embedding_weight=0.0)
+        rag_pipeline.vector_store.add_documents([
+            Document(page_content="Short note on revenue.", metadata={"page": 2, "chunk_id": "note"})
+        ])
+        result = rag_pipeline.generate_answer("What is the net profit margin?")
+    finally:
+        FakeChatModel._generate = generate
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+    assert len(prompts) == 1 and "Net Profit Margin: 20.8%" in prompts[0]
+    assert "Product Sales" not in prompts[0] and "Short note on revenue." in prompts[0]
+    income = next(source for source in result["sources"] if source["page"] == 1)
+    assert "Product Sales" in income["content"]
+    logger.info("✅ Prompt compressed, sources returned whole")
+
+
+def test_segment_embeddings_bypass_persistent_cache():
+    """Segment vectors come from the provider, are memoized in memory and never reach the on-disk cache"""
+    saved = {name: getattr(settings, name) for name in SERVICE_SETTINGS}
+    try:
+        provider = CountingEmbeddings(dimensions=32)
+        vector_store = create_pipeline(provider, embedding_cache=True).vector_store
+        cache_path = settings.embedding_cache_path
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    provider.embedded = []
+
+    segments = ["Total Revenue: $1.2B", "Net Income: $150M", "Total Revenue: $1.2B"]
+    first = vector_store.embed_segments(segments)
+    second = vector_store.embed_segments(segments[:2])
+
+    assert first == HashEmbeddings(dimensions=32).embed_documents(segments)
+    assert second == first[:2]
+    assert provider.embedded == ["Total Revenue: $1.2B", "Net Income: $150M"]
+    with sqlite3.connect(cache_path) as conn:
+        # Only the ingested chunk is cached, none of the segments
+        assert conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 1
+    logger.info("✅ Segment embeddings kept out of the persistent cache")
+
+
+def test_cached_answer_skips_compression():
+    """An answer cache hit is found before compression, so no segment is embedded for it"""
+    saved = {name: getattr(settings, name) for name in SERVICE_SETTINGS}
+    try:
+        provider = CountingEmbeddings(dimensions=64)
+        rag_pipeline = create_pipeline(provider)
+
+        provider.embedded = []
+        first = rag_pipeline.generate_answer("What is the net profit margin?")
+        assert not first["cached"] and provider.embedded, "The first answer compresses with segment embeddings"
+
+        provider.embedded = []
+        second = rag_pipeline.generate_answer("What is the net profit margin?")
+        assert second["cached"] and second["answer"] == first["answer"]
+        assert provider.embedded == [] and second["prompt_tokens"] is None
+        logger.info("✅ Answer cache hit skipped compression")
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+if __name__ == "__main__":
+    test_split_segments()
+    test_lexical_compression_keeps_answer_line()
+    test_embedding_scores_find_paraphrase()
+    test_pipeline_compresses_prompt_not_sources()
+    test_segment_embeddings_bypass_persistent_cache()
+    test_cached_answer_skips_compression()
+    logger.info("🎉 All context compression tests passed")
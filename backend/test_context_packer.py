@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budget context packing
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import AIMessage, Document
+from config import settings
+from services.context_packer import ContextPacker, estimate_tokens, truncate_to_tokens
+from services.rag_pipeline import RAGPipeline
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LONG_TEXT = "Total revenue for fiscal 2024 was $1.2 billion, up 15% on strong cloud demand. " * 40
+
+
+def create_packer(budget=1000):
+    return ContextPacker(max_prompt_tokens=budget, history_share=0.25, max_history_turns=5,
+                         max_turn_tokens=60, min_source_tokens=50)
+
+
+def test_truncate_to_tokens():
+    """Truncated text should fit the limit, end at a word and be marked"""
+    truncated = truncate_to_tokens(LONG_TEXT, 100)
+
+    assert estimate_tokens(truncated) <= 100
+    assert truncated.endswith(" …") and LONG_TEXT.startswith(truncated[:-2])
+    assert truncate_to_tokens("short text", 100) == "short text"
+    logger.info(f"✅ {estimate_tokens(LONG_TEXT)} tokens truncated to {estimate_tokens(truncated)}")
+
+
+def test_sources_packed_in_rank_order():
+    """Sources fill the budget in retrieval order: the lowest-ranked are trimmed or dropped"""
+    sources = [f"Source {i}\n" + LONG_TEXT[:1200] for i in range(1, 6)]
+
+    packed, history, report = create_packer().pack(sources, [], fixed_tokens=200)
+
+    assert report["total"] <= 1000
+    assert [text.split("\n")[0] for text in packed] == ["Source 1", "Source 2", "Source 3"]
+    assert packed[2].endswith(" …") and not packed[1].endswith(" …")
+    assert report["sources_trimmed"] == 1 and report["sources_dropped"] == 2
+    logger.info(f"✅ Source packing report: {report}")
+
+
+def test_best_ranked_source_kept_whatever_the_scores():
+    """Distances (lower is better) or fused scores must not push the top-ranked chunk out of the prompt"""
+    class DistanceVectorStore:
+        def similarity_search(self, query, k=5, filters=None):
+            return [(Document(page_content=f"Chunk {rank}: " + LONG_TEXT[:1200],
+                              metadata={"page": rank, "chunk_id": f"c{rank}"}), distance)
+                    for rank, distance in enumerate([0.0, 0.4, 2.0], 1)]
+
+    settings.google_api_key = ""
+    rag_pipeline = RAGPipeline(DistanceVectorStore())
+    rag_pipeline.context_packer = create_packer(budget=900)
+    retrieved = rag_pipeline._retrieve_documents("What is the total revenue?")
+
+    context, _, report = rag_pipeline._generate_context("What is the total revenue?", retrieved)
+
+    assert "Chunk 1:" in context and "Chunk 3:" not in context
+    assert report["sources_dropped"] >= 1
+    logger.info(f"✅ Top-ranked chunk kept: {report}")
+
+
+def test_history_truncated_and_capped():
+    """Long turns are cut, the oldest turns go first, and history stays within its share"""
+    history = [f"User: question {i}" for i in range(8)] + ["Assistant: " + LONG_TEXT]
+
+    _, packed, report = create_packer().pack([], history, fixed_tokens=200)
+
+    assert packed[-1].startswith("Assistant:") and estimate_tokens(packed[-1]) <= 60
+    assert packed[0] == "User: question 4" and len(packed) == 5
+    assert report["history"] <= 0.25 * 800
+    logger.info(f"✅ History packing report: {report}")
+
+
+def test_pipeline_prompt_within_budget():
+    """Prompts sent to the LLM should stay within the configured budget"""
+    class ManyChunksVectorStore:
+        def similarity_search(self, query, k=5, filters=None):
+            return [(Document(page_content=LONG_TEXT, metadata={"page": i, "chunk_id": f"c{i}"}), 0.9 - i / 100)
+                    for i in range(10)]
+
+        def embed_query(self, query):
+            return [1.0, 0.0]
+
+    class RecordingChatModel:
+        def __call__(self, messages):
+            self.prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+            return AIMessage(content="Total revenue was $1.2 billion.")
+
+    settings.google_api_key = ""
+    rag_pipeline = RAGPipeline(ManyChunksVectorStore())
+    rag_pipeline.llm = RecordingChatModel()
+    rag_pipeline.use_chat_model = True
+    history = [{"role": "user", "content": LONG_TEXT}, {"role": "assistant", "content": LONG_TEXT}]
+
+    result = rag_pipeline.generate_answer("What is the total revenue?", chat_history=history)
+
+    # Joining sections adds a few newlines the per-section counts do not include
+    assert result["prompt_tokens"]["total"] <= settings.prompt_token_budget
+    assert rag_pipeline.llm.prompt_tokens <= settings.prompt_token_budget * 1.02
+    assert result["prompt_tokens"]["sources_dropped"] > 0
+    logger.info(f"✅ Prompt of ~{rag_pipeline.llm.prompt_tokens} tokens, report {result['prompt_tokens']}")
+
+
+if __name__ == "__main__":
+    test_truncate_to_tokens()
+    test_sources_packed_in_rank_order()
+    test_best_ranked_source_kept_whatever_the_scores()
+    test_history_truncated_and_capped()
+    test_pipeline_prompt_within_budget()
+    logger.info("🎉 All context packing tests passed")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent LRU embedding cache (CachedEmbeddings)
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.embedding_cache import CachedEmbeddings
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CountingEmbeddings:
+    """Embedding provider that records every text it is asked to embed"""
+
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [[float(len(text)), 0.5, -1.25] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 1.0, 2.0]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def create_cache(path, max_entries=100, model_name="test-model"):
+    provider = CountingEmbeddings()
+    return CachedEmbeddings(provider, model_name, path=path, max_entries=max_entries), provider
+
+
+def test_round_trip_across_instances():
+    """Vectors persist on disk, come back identical and are keyed by model and kind"""
+    path = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3")
+    cache, provider = create_cache(path)
+
+    vectors = cache.embed_documents(["revenue", "net income", "revenue"])
+    assert vectors[0] == vectors[2] == [7.0, 0.5, -1.25]
+    assert provider.documents == ["revenue", "net income"]
+    assert cache.stats()["batch_duplicates"] == 1
+
+    reopened, provider = create_cache(path)
+    assert reopened.embed_documents(["net income", "revenue"]) == [vectors[1], vectors[0]]
+    assert provider.documents == []
+    assert reopened.stats()["hits"] == 2 and reopened.stats()["misses"] == 0
+
+    # Queries and other models never reuse document vectors
+    assert reopened.embed_query("revenue") == [7.0, 1.0, 2.0]
+    assert provider.queries == ["revenue"]
+    assert asyncio.run(reopened.aembed_query("revenue")) == [7.0, 1.0, 2.0]
+    assert provider.queries == ["revenue"]
+
+    other_model, provider = create_cache(path, model_name="other-model")
+    other_model.embed_documents(["revenue"])
+    assert provider.documents == ["revenue"]
+    logger.info("✅ Embeddings round-trip through the on-disk cache")
+
+
+def test_least_recently_used_entries_are_evicted():
+    """Past max_entries the least recently used vectors are dropped, recently read ones kept"""
+    path = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3")
+    cache, provider = create_cache(path, max_entries=3)
+
+    for text in ("a", "b", "c"):
+        cache.embed_documents([text])
+        time.sleep(0.01)
+    cache.embed_documents(["a"])  # "a" becomes the most recently used
+    time.sleep(0.01)
+    cache.embed_documents(["d"])  # evicts "b"
+
+    count = cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert count == 3
+
+    provider.documents = []
+    cache.embed_documents(["a", "c", "d"])
+    assert provider.documents == []
+    cache.embed_documents(["b"])
+    assert provider.documents == ["b"]
+    logger.info("✅ Least recently used embeddings evicted")
+
+
+if __name__ == "__main__":
+    test_round_trip_across_instances()
+    test_least_recently_used_entries_are_evicted()
+    logger.info("🎉 All embedding cache tests passed")
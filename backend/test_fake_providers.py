@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the fake (offline) LLM and embedding providers
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from langchain.schema import HumanMessage
+from config import settings
+from benchmarks.synthetic_pdf import build_pdf
+from services.fake_providers import FakeChatModel, HashEmbeddings
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROVIDER_SETTINGS = ("llm_provider", "embedding_provider", "google_api_key", "vector_db_path",
+                     "pdf_upload_path", "embedding_cache_path", "embedding_requests_per_second",
+                     "fake_llm_first_token_ms", "fake_llm_token_ms", "similarity_threshold")
+
+
+def test_hash_embeddings_deterministic():
+    """Same text, same unit vector; shared words make texts closer than unrelated ones"""
+    embeddings = HashEmbeddings(dimensions=64)
+    revenue = embeddings.embed_query("total revenue for 2024")
+
+    assert len(revenue) == 64
+    assert revenue == HashEmbeddings(dimensions=64).embed_documents(["total revenue for 2024"])[0]
+    assert abs(sum(x * x for x in revenue) - 1.0) < 1e-6
+    assert asyncio.run(embeddings.aembed_query("total revenue for 2024")) == revenue
+
+    def similarity(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    related = embeddings.embed_query("revenue for 2023")
+    unrelated = embeddings.embed_query("cash at end of year")
+    assert similarity(revenue, related) > similarity(revenue, unrelated)
+    assert embeddings.embed_query("") == [0.0] * 64
+    logger.info("✅ Hash embeddings are deterministic")
+
+
+def test_fake_chat_model():
+    """Canned answers are deterministic, stream token by token and carry usage metadata"""
+    model = FakeChatModel(output_tokens=12, first_token_ms=30, token_ms=5, jitter=0.2, seed=1)
+    messages = [HumanMessage(content="Source 1: Total revenue was $1.2 billion.\n\nQuestion: What was revenue?")]
+
+    start = time.perf_counter()
+    response = model(messages)
+    elapsed = time.perf_counter() - start
+    assert response.content.startswith("Simulated answer to 'What was revenue?':")
+    assert "revenue" in response.content
+    assert response.usage_metadata["output_tokens"] == 12
+    assert response.usage_metadata["total_tokens"] > 12
+    # 30ms + 11 * 5ms = 85ms, within +/-20% jitter
+    assert 0.065 <= elapsed < 0.5
+    assert asyncio.run(model.ainvoke(messages)).content == response.content
+
+    chunks = list(model.stream(messages))
+    assert len(chunks) == 12
+    assert "".join(chunk.content for chunk in chunks).strip() == response.content
+
+    other = FakeChatModel(output_tokens=12, first_token_ms=30, token_ms=5, jitter=0.2, seed=2)
+    assert other._delays("prompt", 12) != model._delays("prompt", 12)
+    assert model._delays("prompt", 12) == model._delays("prompt", 12)
+    logger.info("✅ Fake chat model is deterministic and streams")
+
+
+def test_validate_settings_without_key():
+    """GOOGLE_API_KEY is only required while a Gemini provider is configured"""
+    saved = {name: getattr(settings, name) for name in PROVIDER_SETTINGS}
+    try:
+        settings.google_api_key = ""
+        settings.llm_provider, settings.embedding_provider = "fake", "fake"
+        settings.validate_settings()
+
+        settings.embedding_provider = "gemini"
+        try:
+            settings.validate_settings()
+            assert False, "Expected a missing key error"
+        except ValueError as e:
+            assert "GOOGLE_API_KEY" in str(e)
+
+        settings.embedding_provider = "openai"
+        try:
+            settings.validate_settings()
+            assert False, "Expected an unknown provider error"
+        except ValueError as e:
+            assert "EMBEDDING_PROVIDER" in str(e)
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    logger.info("✅ Settings validate without a key in fake mode")
+
+
+def test_end_to_end_with_fake_providers():
+    """Startup, upload and chat run offline with both providers set to fake"""
+    import main
+
+    saved = {name: getattr(settings, name) for name in PROVIDER_SETTINGS}
+    workdir = tempfile.mkdtemp()
+    try:
+        settings.llm_provider, settings.embedding_provider, settings.google_api_key = "fake", "fake", ""
+        settings.vector_db_path = os.path.join(workdir, "vector_store")
+        settings.pdf_upload_path = os.path.join(workdir, "uploads")
+        settings.embedding_cache_path = os.path.join(workdir, "embeddings.sqlite3")
+        settings.embedding_requests_per_second = 0
+        settings.fake_llm_first_token_ms, settings.fake_llm_token_ms = 5, 1
+        # Hashed bag-of-words vectors score far below a real model's similarities
+        settings.similarity_threshold = 0.0
+
+        with TestClient(main.app) as client:
+            assert main.vector_store.embedding_model_name.startswith("fake-hash-")
+            assert isinstance(main.rag_pipeline.llm, FakeChatModel)
+
+            response = client.post("/api/upload", files={
+                "file": ("statements.pdf", build_pdf(3, table_ratio=0.5), "application/pdf")
+            })
+            assert response.status_code == 200, response.text
+            assert os.listdir(settings.pdf_upload_path) == ["statements.pdf"]
+
+            response = client.post("/api/upload", files={
+                "file": ("statements-copy.pdf", build_pdf(3, table_ratio=0.5), "application/pdf")
+            })
+            assert response.status_code == 200, response.text
+            assert response.json()["status"] == "duplicate"
+            assert os.listdir(settings.pdf_upload_path) == ["statements.pdf"], "Duplicates are not saved"
+
+            response = client.post("/api/chat", json={"question": "What was the net income?"})
+            assert response.status_code == 200, response.text
+            data = response.json()
+            assert data["answer"].startswith("Simulated answer to 'What was the net income?'")
+            assert data["sources"]
+
+            response = client.post("/api/chat/stream", json={"question": "What was the gross profit?"})
+            assert response.status_code == 200
+            assert "Simulated" in response.text
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    logger.info("✅ Backend runs end to end on fake providers")
+
+
+if __name__ == "__main__":
+    test_hash_embeddings_deterministic()
+    test_fake_chat_model()
+    test_validate_settings_without_key()
+    test_end_to_end_with_fake_providers()
+    logger.info("🎉 All fake provider tests passed")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for the BM25 lexical index and hybrid (reciprocal-rank fusion) retrieval
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from config import settings
+from services.lexical_index import BM25Index, tokenize
+from services.vector_store import VectorStoreService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_CHUNKS = {
+    "income_1": "EBITDA for fiscal 2024 was $310 million, up from $275 million in 2023.",
+    "income_2": "Net income increased to $120 million driven by higher revenue.",
+    "notes_7": "Note 7: Long-term debt of $400 million matures in 2029.",
+}
+
+
+QUESTION = "What was EBITDA in 2024?"
+# Chosen so the EBITDA chunk is a strong keyword match but a weak vector match
+VECTORS = {
+    QUESTION: [1.0, 0.0, 0.0],
+    SAMPLE_CHUNKS["income_1"]: [0.1, 0.995, 0.0],
+    SAMPLE_CHUNKS["income_2"]: [0.9, 0.436, 0.0],
+    SAMPLE_CHUNKS["notes_7"]: [0.0, 0.0, 1.0],
+}
+
+
+class FixedEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [VECTORS[text] for text in texts]
+
+    def embed_query(self, text):
+        return VECTORS[text]
+
+
+def create_vector_store():
+    """A real VectorStoreService on the NumPy backend in a temp directory"""
+    settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+    settings.embedding_cache_enabled, settings.embedding_requests_per_second = False, 0
+    vector_store = VectorStoreService(embeddings=FixedEmbeddings(), embedding_model_name="fixed-3")
+    vector_store.add_documents([
+        Document(page_content=text, metadata={"chunk_id": chunk_id, "page": i + 1, "source": "report.pdf"})
+        for i, (chunk_id, text) in enumerate(SAMPLE_CHUNKS.items())
+    ])
+    return vector_store
+
+
+def create_index(path):
+    index = BM25Index(os.path.join(path, "lexical_index.jsonl"))
+    index.add(
+        list(SAMPLE_CHUNKS),
+        list(SAMPLE_CHUNKS.values()),
+        [{"chunk_id": chunk_id, "page": i + 1} for i, chunk_id in enumerate(SAMPLE_CHUNKS)]
+    )
+    return index
+
+
+def test_tokenizer_keeps_exact_tokens():
+    """Acronyms, years and formatted numbers should survive tokenization"""
+    tokens = tokenize("EBITDA in 2024 was $1,200,000 (28.3% margin)")
+
+    assert tokens == ["ebitda", "2024", "1200000", "28.3", "margin"]
+    logger.info(f"✅ Tokens: {tokens}")
+
+
+def test_bm25_ranks_exact_matches():
+    """Rare exact tokens should pick out the chunk that contains them"""
+    index = create_index(tempfile.mkdtemp())
+
+    results = index.search("What was EBITDA in 2024?", k=3)
+    assert results[0][0].metadata["chunk_id"] == "income_1"
+
+    results = index.search("note 7 debt", k=3)
+    assert results[0][0].metadata["chunk_id"] == "notes_7"
+    logger.info(f"✅ BM25 results: {[(doc.metadata['chunk_id'], round(score, 3)) for doc, score in results]}")
+
+
+def test_log_replay_after_delete():
+    """A reopened index should replay adds, upserts and deletes from its log"""
+    path = tempfile.mkdtemp()
+    index = create_index(path)
+    index.add(["income_2"], ["Net income restated to $118 million."], [{"chunk_id": "income_2", "page": 2}])
+    index.delete(["notes_7"])
+
+    reopened = BM25Index(os.path.join(path, "lexical_index.jsonl"))
+
+    assert reopened.count() == 2
+    assert reopened.search("note 7 debt", k=3) == []
+    assert "restated" in reopened.search("net income", k=1)[0][0].page_content
+    logger.info("✅ Lexical index log replayed correctly")
+
+
+def test_reciprocal_rank_fusion():
+    """Documents found by both retrievers should outrank single-list hits"""
+    def doc(chunk_id):
+        return Document(page_content=SAMPLE_CHUNKS[chunk_id], metadata={"chunk_id": chunk_id})
+
+    vector_results = [(doc("income_2"), 0.9), (doc("income_1"), 0.8)]
+    lexical_results = [(doc("income_1"), 1.0), (doc("notes_7"), 0.4)]
+
+    fused = VectorStoreService._reciprocal_rank_fusion(vector_results, lexical_results, k=3)
+
+    assert [d.metadata["chunk_id"] for d, _ in fused] == ["income_1", "income_2", "notes_7"]
+    assert fused[0][1] == 0.8, "Documents in both lists keep their vector score"
+    logger.info(f"✅ Fused order: {[(d.metadata['chunk_id'], score) for d, score in fused]}")
+
+
+def test_keyword_hits_need_similarity_and_keep_their_score_type():
+    """Hybrid keyword hits are scored by cosine and thresholded; lexical-only scores are marked bm25"""
+    names = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_requests_per_second",
+             "retrieval_mode", "similarity_threshold", "enable_source_deduplication")
+    saved = {name: getattr(settings, name) for name in names}
+    try:
+        vector_store = create_vector_store()
+        settings.similarity_threshold, settings.enable_source_deduplication = 0.3, False
+
+        settings.retrieval_mode = "hybrid"
+        results = vector_store.similarity_search(QUESTION)
+        assert [doc.metadata["chunk_id"] for doc, _ in results] == ["income_2"]
+        assert abs(results[0][1] - 0.9) < 1e-3 and "score_type" not in results[0][0].metadata
+
+        settings.similarity_threshold = 0.05
+        results = dict((doc.metadata["chunk_id"], score) for doc, score in vector_store.similarity_search(QUESTION))
+        assert abs(results["income_1"] - 0.1) < 1e-3, "Keyword-only hits carry their cosine similarity"
+        logger.info("✅ Hybrid keyword hits scored by cosine similarity")
+
+        settings.retrieval_mode = "lexical"
+        results = vector_store.similarity_search(QUESTION)
+        assert results[0][0].metadata["chunk_id"] == "income_1" and results[0][1] == 1.0
+        assert all(doc.metadata["score_type"] == "bm25" for doc, _ in results)
+        logger.info("✅ Lexical scores marked as bm25")
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+if __name__ == "__main__":
+    test_tokenizer_keeps_exact_tokens()
+    test_bm25_ranks_exact_matches()
+    test_log_replay_after_delete()
+    test_reciprocal_rank_fusion()
+    test_keyword_hits_need_similarity_and_keep_their_score_type()
+    logger.info("🎉 All hybrid search tests passed")
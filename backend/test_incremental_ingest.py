@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental re-ingest (ingest manifest: skip unchanged files, pages and chunks)
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.synthetic_pdf import write_pdf
+from services.ingest_manifest import INGEST_VERSION, IngestManifest
+from services.ingest_pipeline import IngestPipeline
+from services.pdf_processor import PDFProcessor
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RecordingVectorStore:
+    """Records the chunk IDs added and deleted by the pipeline"""
+
+    def __init__(self):
+        self.chunk_ids = set()
+        self.added = []
+        self.deleted = []
+
+    def add_documents(self, documents):
+        ids = [doc.metadata["chunk_id"] for doc in documents]
+        self.added.extend(ids)
+        self.chunk_ids.update(ids)
+
+    def delete_documents(self, ids):
+        self.deleted.extend(ids)
+        self.chunk_ids.difference_update(ids)
+
+    def reset_calls(self):
+        self.added, self.deleted = [], []
+
+
+def create_pipeline():
+    workdir = tempfile.mkdtemp()
+    vector_store = RecordingVectorStore()
+    pipeline = IngestPipeline(PDFProcessor(), vector_store)
+    pipeline.manifest = IngestManifest(os.path.join(workdir, "ingest_manifest.json"))
+    return pipeline, vector_store, workdir
+
+
+def pages_of(chunk_ids):
+    return {int(chunk_id.split("_page_")[1].split("_")[0]) for chunk_id in chunk_ids}
+
+
+def test_unchanged_and_duplicate_files_are_skipped():
+    """Re-uploading the same file, or a copy under another name, embeds nothing"""
+    pipeline, vector_store, workdir = create_pipeline()
+    path = write_pdf(os.path.join(workdir, "report.pdf"), 3)
+
+    summary = pipeline.run(path)
+    assert summary["status"] == "processed"
+    assert summary["new_chunks"] == summary["chunks_count"] == len(vector_store.chunk_ids) > 0
+    assert pages_of(vector_store.chunk_ids) == {1, 2, 3}
+    stored = set(vector_store.chunk_ids)
+
+    vector_store.reset_calls()
+    summary = pipeline.run(path)
+    assert summary["status"] == "unchanged"
+    assert summary["skipped_chunks"] == len(stored)
+    assert not vector_store.added and not vector_store.deleted
+    logger.info("✅ Same file skipped")
+
+    copy_path = os.path.join(workdir, "report_copy.pdf")
+    shutil.copy(path, copy_path)
+    summary = pipeline.run(copy_path)
+    assert summary["status"] == "duplicate"
+    assert summary["source"] == "report.pdf"
+    assert not vector_store.added and not vector_store.deleted
+    assert vector_store.chunk_ids == stored
+    logger.info("✅ Duplicate copy skipped")
+
+
+def test_added_and_removed_pages():
+    """Only an added page is embedded; a removed page's chunks are deleted"""
+    pipeline, vector_store, workdir = create_pipeline()
+    path = os.path.join(workdir, "report.pdf")
+
+    # The generator is seeded per document, so the first pages of both versions are identical
+    pipeline.run(write_pdf(path, 3))
+    three_pages = set(vector_store.chunk_ids)
+
+    vector_store.reset_calls()
+    summary = pipeline.run(write_pdf(path, 4))
+    assert summary["status"] == "updated"
+    assert pages_of(vector_store.added) == {4}
+    assert not vector_store.deleted
+    assert summary["skipped_chunks"] == len(three_pages)
+    assert summary["new_chunks"] == len(vector_store.added)
+    logger.info("✅ Added page embedded alone")
+
+    vector_store.reset_calls()
+    summary = pipeline.run(write_pdf(path, 3))
+    assert summary["status"] == "updated"
+    assert not vector_store.added
+    assert pages_of(vector_store.deleted) == {4}
+    assert vector_store.chunk_ids == three_pages
+    assert summary["deleted_chunks"] == len(vector_store.deleted)
+    logger.info("✅ Removed page deleted")
+
+
+def test_all_new_content_replaces_every_chunk():
+    """A new file under the same name re-embeds everything and drops chunks that no longer exist"""
+    pipeline, vector_store, workdir = create_pipeline()
+    path = os.path.join(workdir, "report.pdf")
+
+    pipeline.run(write_pdf(path, 4, seed=1))
+    vector_store.reset_calls()
+    summary = pipeline.run(write_pdf(path, 2, seed=2))
+
+    assert summary["status"] == "updated"
+    assert summary["skipped_chunks"] == 0
+    assert pages_of(vector_store.added) == {1, 2}
+    assert pages_of(vector_store.chunk_ids) == {1, 2}
+    # Also any page 1-2 chunk index the shorter new pages no longer have
+    assert pages_of(vector_store.deleted) >= {3, 4}
+    assert not set(vector_store.deleted) & vector_store.chunk_ids
+    assert IngestManifest.chunk_ids(pipeline.manifest.get("report.pdf")).keys() == vector_store.chunk_ids
+    logger.info("✅ All-new file replaced")
+
+
+def test_older_ingest_version_is_reprocessed():
+    """A file recorded before the current INGEST_VERSION is re-chunked and re-upserted, not reported unchanged"""
+    pipeline, vector_store, workdir = create_pipeline()
+    path = write_pdf(os.path.join(workdir, "report.pdf"), 3)
+    pipeline.run(path)
+    stored = set(vector_store.chunk_ids)
+
+    # A record written before versioning
+    legacy = dict(pipeline.manifest.get("report.pdf"))
+    del legacy["version"]
+    pipeline.manifest.set("report.pdf", legacy)
+    pipeline.manifest.save()
+
+    vector_store.reset_calls()
+    summary = pipeline.run(path)
+    assert summary["status"] == "updated" and summary["skipped_chunks"] == 0
+    assert set(vector_store.added) == stored and not vector_store.deleted
+    assert pipeline.manifest.get("report.pdf")["version"] == INGEST_VERSION
+
+    vector_store.reset_calls()
+    assert pipeline.run(path)["status"] == "unchanged" and not vector_store.added
+    logger.info("✅ Older ingest version re-processed once")
+
+
+def test_concurrent_ingests_keep_every_manifest_record():
+    """Uploads running at the same time neither lose each other's manifest records nor both ingest one file"""
+    pipeline, vector_store, workdir = create_pipeline()
+    paths = [write_pdf(os.path.join(workdir, f"report_{i}.pdf"), 2, seed=i) for i in range(4)]
+    paths.append(paths[0])
+    add_documents = vector_store.add_documents
+    lock = threading.Lock()
+
+    def slow_add_documents(documents):
+        # Widen the window between a run's load() and save()
+        threading.Event().wait(0.02)
+        with lock:
+            add_documents(documents)
+
+    vector_store.add_documents = slow_add_documents
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        summaries = list(pool.map(pipeline.run, paths))
+
+    assert sorted(summary["status"] for summary in summaries) == ["processed"] * 4 + ["unchanged"]
+    assert len(vector_store.added) == len(set(vector_store.added))
+    manifest = IngestManifest(pipeline.manifest.path)
+    assert all(manifest.get(f"report_{i}.pdf") for i in range(4))
+    logger.info("✅ Concurrent ingests serialized; every manifest record saved")
+
+
+if __name__ == "__main__":
+    test_unchanged_and_duplicate_files_are_skipped()
+    test_added_and_removed_pages()
+    test_all_new_content_replaces_every_chunk()
+    test_older_ingest_version_is_reprocessed()
+    test_concurrent_ingests_keep_every_manifest_record()
+    logger.info("🎉 All incremental ingest tests passed")
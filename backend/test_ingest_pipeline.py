@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming extract -> chunk -> embed/upsert ingest pipeline
+"""
+
+import sys
+import os
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import Document
+from config import settings
+from services.ingest_manifest import IngestManifest
+from services.ingest_pipeline import IngestPipeline
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOTAL_CHUNKS = 50
+
+
+class StreamingPDFProcessor:
+    """Yields one chunk per page and records how far extraction has run ahead"""
+
+    def __init__(self, fail_at_page=None):
+        self.fail_at_page = fail_at_page
+        self.produced = 0
+
+    def hash_pages(self, file_path):
+        return {page: f"page-{page}-hash" for page in range(1, TOTAL_CHUNKS + 1)}
+
+    def iter_pages(self, file_path, skip_pages=frozenset()):
+        for page in range(1, TOTAL_CHUNKS + 1):
+            if page == self.fail_at_page:
+                raise RuntimeError("corrupt page")
+            yield {"page": page, "content": f"Line item {page}: ${page * 10} million"}
+
+    def iter_chunks(self, pages):
+        for page in pages:
+            self.produced += 1
+            yield Document(page_content=page["content"], metadata={
+                "page": page["page"], "chunk_id": f"report.pdf_page_{page['page']}_chunk_0",
+                "content_hash": f"chunk-{page['page']}"
+            })
+
+
+class SlowVectorStore:
+    """Records batches and how many chunks the producer had made when each arrived"""
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.batches = []
+        self.produced_at_batch = []
+        self._release = threading.Event()
+
+    def add_documents(self, documents):
+        self.produced_at_batch.append(self.processor.produced)
+        self.batches.append([doc.metadata["page"] for doc in documents])
+        # Give the producer time to fill the queue, which back-pressure must bound
+        self._release.wait(0.05)
+
+    def delete_documents(self, ids):
+        pass
+
+
+def create_pipeline(processor, batch_size=8, queue_size=4):
+    saved = settings.ingest_batch_size, settings.ingest_queue_size
+    settings.ingest_batch_size, settings.ingest_queue_size = batch_size, queue_size
+    try:
+        vector_store = SlowVectorStore(processor)
+        pipeline = IngestPipeline(processor, vector_store)
+    finally:
+        settings.ingest_batch_size, settings.ingest_queue_size = saved
+    pipeline.manifest = IngestManifest(os.path.join(tempfile.mkdtemp(), "ingest_manifest.json"))
+    file_path = os.path.join(tempfile.mkdtemp(), "report.pdf")
+    with open(file_path, "wb") as f:
+        f.write(b"%PDF-1.4 streaming test")
+    return pipeline, vector_store, file_path
+
+
+def test_batches_stream_in_order_with_back_pressure():
+    """Chunks are upserted in page order, in batches of at most INGEST_BATCH_SIZE, while extraction is still running"""
+    processor = StreamingPDFProcessor()
+    pipeline, vector_store, file_path = create_pipeline(processor)
+
+    summary = pipeline.run(file_path)
+
+    assert summary["new_chunks"] == summary["chunks_count"] == TOTAL_CHUNKS
+    assert [page for batch in vector_store.batches for page in batch] == list(range(1, TOTAL_CHUNKS + 1))
+    assert all(len(batch) <= 8 for batch in vector_store.batches)
+    # The first batch is stored long before the last page is read; the producer never runs
+    # further ahead than the current batch, the queue and the chunk it is blocked on
+    assert vector_store.produced_at_batch[0] < TOTAL_CHUNKS
+    for stored, produced in zip(range(8, TOTAL_CHUNKS + 8, 8), vector_store.produced_at_batch):
+        assert produced <= stored + 4 + 1
+    logger.info(f"✅ {len(vector_store.batches)} batches streamed, producer lead {vector_store.produced_at_batch}")
+
+
+def test_producer_error_fails_the_ingest():
+    """An extraction error surfaces to the caller and nothing is recorded in the manifest"""
+    processor = StreamingPDFProcessor(fail_at_page=20)
+    pipeline, vector_store, file_path = create_pipeline(processor)
+
+    try:
+        pipeline.run(file_path)
+        assert False, "Expected the extraction error"
+    except RuntimeError as e:
+        assert "corrupt page" in str(e)
+
+    assert pipeline.manifest.get("report.pdf") is None
+    assert not os.path.exists(pipeline.manifest.path)
+    logger.info("✅ Producer error propagated")
+
+
+if __name__ == "__main__":
+    test_batches_stream_in_order_with_back_pressure()
+    test_producer_error_fails_the_ingest()
+    logger.info("🎉 All ingest pipeline tests passed")
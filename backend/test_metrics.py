@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process Prometheus metrics registry and /metrics endpoint
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from langchain.schema import AIMessage, Document
+from config import settings
+import main
+from services.metrics import (CHAT_SECONDS, FALLBACK_RESPONSES, HTTP_REQUESTS, LLM_CALLS, LLM_TOKENS,
+                              MetricsRegistry, registry)
+from benchmarks.synthetic_pdf import write_pdf
+from services.fake_providers import HashEmbeddings
+from services.ingest_pipeline import IngestPipeline
+from services.pdf_processor import PDFProcessor
+from services.query_cache import LRUCache
+from services.rag_pipeline import RAGPipeline
+from services.request_coalescer import RequestCoalescer
+from services.vector_store import VectorStoreService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STORE_SETTINGS = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_requests_per_second",
+                  "ingest_batch_size", "ingest_queue_size", "pdf_extraction_workers")
+
+
+def create_vector_store():
+    """A real numpy-backed store on hash embeddings in a temp directory; callers restore STORE_SETTINGS"""
+    settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+    settings.embedding_cache_enabled, settings.embedding_requests_per_second = False, 0
+    return VectorStoreService(embeddings=HashEmbeddings(dimensions=64), embedding_model_name="fake-hash-64")
+
+
+def test_render_text_format():
+    """Counters, gauges and cumulative histogram buckets render in the Prometheus text format"""
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ("path",))
+    in_flight = registry.gauge("test_in_flight", "In flight")
+    latency = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.register_collector(lambda: [("test_documents", "gauge", "Documents", [({}, 42)])])
+
+    requests.inc(path='/api/"chat"')
+    requests.inc(2, path='/api/"chat"')
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{path="/api/\\"chat\\""} 3' in text
+    assert "test_in_flight 0" in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_latency_seconds_sum 5.55" in text and "test_latency_seconds_count 3" in text
+    assert "test_documents 42" in text
+    assert registry.counter("test_requests_total", "Requests", ("path",)) is requests
+    logger.info("✅ Text format rendered correctly")
+
+
+def test_metrics_endpoint_after_chat():
+    """A chat request shows up in request, latency, LLM and service metrics"""
+    class MockVectorStore:
+        def __init__(self):
+            self.retrieval_cache = LRUCache(10, 60)
+            self.query_embedding_cache = LRUCache(10, 60)
+            self.embeddings = None
+            self.reranker = None
+
+        async def asimilarity_search(self, query, k=5, filters=None):
+            return [(Document(page_content="Total revenue for 2024 was $1.2 billion.",
+                              metadata={"page": 1, "chunk_id": "test_1_1"}), 0.95)]
+
+        def get_document_count(self):
+            return 7
+
+        async def run(self, func, *args):
+            return func(*args)
+
+    class ChatModel:
+        async def ainvoke(self, messages):
+            return AIMessage(content="Total revenue was $1.2 billion (page 1).",
+                             usage_metadata={"input_tokens": 120, "output_tokens": 12, "total_tokens": 132})
+
+    settings.google_api_key = ""
+    main.chat_coalescer = RequestCoalescer()
+    main.vector_store = MockVectorStore()
+    main.rag_pipeline = RAGPipeline(main.vector_store)
+    main.rag_pipeline.llm = ChatModel()
+    main.rag_pipeline.use_chat_model = True
+    client = TestClient(main.app)
+
+    chats = CHAT_SECONDS.count(mode="chat")
+    llm_calls = LLM_CALLS.value(outcome="success")
+    output_tokens = LLM_TOKENS.value(kind="output")
+    requests = HTTP_REQUESTS.value(path="/api/chat", method="POST", status="200")
+
+    assert client.post("/api/chat", json={"question": "What is the total revenue?"}).status_code == 200
+    response = client.get("/metrics")
+
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert CHAT_SECONDS.count(mode="chat") == chats + 1
+    assert LLM_CALLS.value(outcome="success") == llm_calls + 1
+    assert LLM_TOKENS.value(kind="output") == output_tokens + 12
+    assert HTTP_REQUESTS.value(path="/api/chat", method="POST", status="200") == requests + 1
+    assert 'rag_chat_stage_duration_seconds_count{stage="llm"}' in response.text
+    assert "rag_vector_store_documents 7" in response.text
+    assert 'rag_cache_misses_total{cache="answer"}' in response.text
+    assert 'rag_http_requests_in_flight{path="/api/chat"} 0' in response.text
+    logger.info("✅ /metrics reflects the chat request")
+
+    fallbacks = FALLBACK_RESPONSES.value()
+    main.rag_pipeline.use_chat_model = False
+    client.post("/api/chat", json={"question": "What was revenue in 2024?"})
+    assert FALLBACK_RESPONSES.value() == fallbacks + 1
+    logger.info("✅ Fallback activation counted")
+
+    settings.enable_metrics = False
+    try:
+        assert client.get("/metrics").status_code == 404
+    finally:
+        settings.enable_metrics = True
+    logger.info("✅ /metrics disabled by ENABLE_METRICS=False")
+
+
+def test_scrape_does_not_log_at_info():
+    """Reading the document count for a scrape stays out of the INFO log"""
+    saved_settings = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    try:
+        vector_store = create_vector_store()
+    finally:
+        for name, value in saved_settings.items():
+            setattr(settings, name, value)
+    vector_store.add_documents([Document(page_content="Total revenue: $1.2B", metadata={"page": 1, "chunk_id": "a"})])
+
+    records = []
+    handler = logging.Handler(level=logging.INFO)
+    handler.emit = records.append
+    service_logger = logging.getLogger("services.vector_store")
+    saved = main.vector_store, main.rag_pipeline, service_logger.level
+    main.vector_store, main.rag_pipeline = vector_store, None
+    service_logger.addHandler(handler)
+    service_logger.setLevel(logging.INFO)
+    try:
+        text = registry.render()
+    finally:
+        service_logger.removeHandler(handler)
+        main.vector_store, main.rag_pipeline, level = saved
+        service_logger.setLevel(level)
+
+    assert "rag_vector_store_documents 1" in text
+    assert records == [], [record.getMessage() for record in records]
+    logger.info("✅ Scrape read the document count without INFO logging")
+
+
+def test_ingest_queue_depth_is_exported():
+    """Chunks waiting in the bounded ingest queue show up on a scrape while an upload runs"""
+    saved = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    saved_services = main.vector_store, main.rag_pipeline, main.ingest_pipeline
+    try:
+        vector_store = create_vector_store()
+        settings.ingest_batch_size, settings.ingest_queue_size, settings.pdf_extraction_workers = 1, 4, 1
+        pipeline = IngestPipeline(PDFProcessor(), vector_store)
+        main.vector_store, main.rag_pipeline, main.ingest_pipeline = None, None, pipeline
+
+        depths = []
+        add_documents = vector_store.add_documents
+
+        def slow_add_documents(documents):
+            # Let the producer fill the queue, then scrape as a Prometheus server would
+            time.sleep(0.2)
+            depths.append(int(next(line for line in registry.render().splitlines()
+                                   if line.startswith("rag_ingest_queue_depth ")).split()[1]))
+            return add_documents(documents)
+
+        vector_store.add_documents = slow_add_documents
+        pipeline.run(write_pdf(os.path.join(tempfile.mkdtemp(), "statements.pdf"), 3))
+
+        assert depths and max(depths) > 0 and max(depths) <= 4, depths
+        assert "rag_ingest_queue_depth 0" in registry.render().splitlines()
+    finally:
+        main.vector_store, main.rag_pipeline, main.ingest_pipeline = saved_services
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    logger.info("✅ Ingest queue depth exported")
+
+
+def test_metrics_middleware_is_pure_asgi():
+    """Request metrics are not recorded through BaseHTTPMiddleware, which wraps every response"""
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    assert main.MetricsMiddleware in [middleware.cls for middleware in main.app.user_middleware]
+    assert BaseHTTPMiddleware not in [middleware.cls for middleware in main.app.user_middleware]
+
+    requests = HTTP_REQUESTS.value(path="other", method="GET", status="404")
+    assert TestClient(main.app).get("/no-such-route").status_code == 404
+    assert HTTP_REQUESTS.value(path="other", method="GET", status="404") == requests + 1
+    logger.info("✅ Metrics middleware is pure ASGI")
+
+
+if __name__ == "__main__":
+    test_render_text_format()
+    test_metrics_endpoint_after_chat()
+    test_scrape_does_not_log_at_info()
+    test_ingest_queue_depth_is_exported()
+    test_metrics_middleware_is_pure_asgi()
+    logger.info("🎉 All metrics tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for MinHash-signature source deduplication
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import Document
+from services.minhash import compute_signature, encode_signature, decode_signature, estimated_similarity
+from services.fake_providers import HashEmbeddings
+from services.rag_pipeline import RAGPipeline
+from services.vector_store import VectorStoreService
+from config import settings
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REVENUE_TEXT = (
+    "The company's total revenue for fiscal 2024 was $1.2 billion, representing a 15% increase from the "
+    "previous year driven by strong demand in the cloud segment. Operating expenses rose 8% to $800 million."
+)
+REVENUE_TEXT_EDITED = REVENUE_TEXT.replace("15%", "14%").replace("strong", "robust")
+CASH_TEXT = "Cash flow from operations was $400 million in 2024, up from $350 million, funding capital expenditure."
+
+
+def test_similarity_estimate_matches_threshold_semantics():
+    """Light edits should stay above the threshold and unrelated text far below it"""
+    signature = compute_signature(REVENUE_TEXT)
+
+    near_duplicate = estimated_similarity(signature, compute_signature(REVENUE_TEXT_EDITED))[0]
+    unrelated = estimated_similarity(signature, compute_signature(CASH_TEXT))[0]
+
+    assert near_duplicate >= settings.content_similarity_threshold
+    assert unrelated < 0.3
+    logger.info(f"✅ Estimated similarity: near duplicate {near_duplicate:.3f}, unrelated {unrelated:.3f}")
+
+
+def test_signature_roundtrip():
+    """Signatures stored as metadata strings should decode to the same values"""
+    signature = compute_signature(REVENUE_TEXT)
+
+    assert (decode_signature(encode_signature(signature)) == signature).all()
+    assert decode_signature(None) is None
+    logger.info("✅ Signature encodes to a metadata string and back")
+
+
+def test_deduplicate_sources_uses_signatures():
+    """_deduplicate_sources should drop the near-duplicate, with or without stored signatures"""
+    names = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_requests_per_second",
+             "enable_reranking", "llm_provider")
+    saved = {name: getattr(settings, name) for name in names}
+    try:
+        settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+        settings.embedding_cache_enabled, settings.embedding_requests_per_second = False, 0
+        settings.enable_reranking, settings.llm_provider = False, "fake"
+        rag_pipeline = RAGPipeline(VectorStoreService(embeddings=HashEmbeddings(dimensions=64),
+                                                      embedding_model_name="fake-hash-64"))
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    documents = [
+        (Document(page_content=REVENUE_TEXT,
+                  metadata={"page": 1, "chunk_id": "a", "minhash": encode_signature(compute_signature(REVENUE_TEXT))}),
+         0.9),
+        (Document(page_content=REVENUE_TEXT_EDITED, metadata={"page": 2, "chunk_id": "b"}), 0.85),
+        (Document(page_content=CASH_TEXT, metadata={"page": 3, "chunk_id": "c"}), 0.8),
+    ]
+
+    sources = rag_pipeline._deduplicate_sources(documents)
+
+    assert [source["metadata"]["chunk_id"] for source in sources] == ["a", "c"]
+    logger.info(f"✅ Deduplicated to {[source['metadata']['chunk_id'] for source in sources]}")
+
+
+if __name__ == "__main__":
+    test_similarity_estimate_matches_threshold_semantics()
+    test_signature_roundtrip()
+    test_deduplicate_sources_uses_signatures()
+    logger.info("🎉 All MinHash deduplication tests passed")
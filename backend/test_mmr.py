@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for maximal marginal relevance (MMR) diversification at retrieval
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.mmr import mmr_select
+import numpy as np
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERY = [1.0, 0.0, 0.0]
+# Two near-identical chunks (e.g. the same table on adjacent pages), then two distinct ones
+CANDIDATES = np.array([
+    [0.95, 0.30, 0.0],
+    [0.94, 0.32, 0.0],
+    [0.80, 0.0, 0.60],
+    [0.50, -0.5, 0.70],
+])
+
+
+def test_mmr_skips_near_duplicates():
+    """The second near-duplicate should lose to a less relevant but novel chunk"""
+    selected = mmr_select(QUERY, CANDIDATES, k=3, lambda_mult=0.5)
+
+    assert selected[0] == 0
+    assert 1 not in selected, "Near-duplicate of the top chunk should not be selected"
+    logger.info(f"✅ MMR selection: {selected}")
+
+
+def test_lambda_one_is_pure_relevance():
+    """With lambda=1 MMR reduces to ranking by similarity to the query"""
+    selected = mmr_select(QUERY, CANDIDATES, k=4, lambda_mult=1.0)
+
+    assert selected == [0, 1, 2, 3]
+    logger.info(f"✅ Relevance-only order: {selected}")
+
+
+def test_k_larger_than_candidates():
+    """Asking for more results than candidates returns every candidate once"""
+    selected = mmr_select(QUERY, CANDIDATES[:2], k=5)
+
+    assert sorted(selected) == [0, 1]
+    assert mmr_select(QUERY, np.empty((0, 3)), k=5) == []
+    logger.info("✅ Small candidate sets handled")
+
+
+if __name__ == "__main__":
+    test_mmr_skips_near_duplicates()
+    test_lambda_one_is_pure_relevance()
+    test_k_larger_than_candidates()
+    logger.info("🎉 All MMR tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the NumPy memory-mapped vector backend (VECTOR_DB_TYPE=numpy)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from services.numpy_index import NumpyVectorIndex
+from services.vector_quantization import VectorCodec
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_index(path, compaction_ratio=0.5):
+    """Create an index with three orthogonal-ish sample vectors"""
+    index = NumpyVectorIndex(path, compaction_ratio=compaction_ratio)
+    index.add(
+        ids=["revenue", "cash", "debt"],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.2, 1.0]],
+        texts=["Total Revenue: $1.2B", "Operating Cash Flow: $350M", "Long-term Debt: $400M"],
+        metadatas=[{"page": 1}, {"page": 4}, {"page": 7}]
+    )
+    return index
+
+
+def test_exact_search_ranks_by_cosine():
+    """Query results should be ordered by cosine similarity"""
+    index = create_index(tempfile.mkdtemp())
+
+    results = index.query([0.1, 1.0, 0.3], k=2)
+
+    assert [doc.metadata["page"] for doc, _ in results] == [4, 7]
+    assert results[0][1] > results[1][1]
+    logger.info(f"✅ Exact search order: {[(doc.page_content, round(score, 3)) for doc, score in results]}")
+
+
+def test_upsert_and_delete_use_tombstones():
+    """Re-adding an ID supersedes its row and deletes are hidden from search and count"""
+    index = create_index(tempfile.mkdtemp(), compaction_ratio=0.9)
+
+    index.add(["revenue"], [[0.0, 1.0, 0.0]], ["Total Revenue: $1.3B (restated)"], [{"page": 1}])
+    index.delete(["debt"])
+
+    assert index.count() == 2
+    assert index.rows == 4, "Superseded rows stay in the segment until compaction"
+    texts = [doc.page_content for doc, _ in index.query([0.0, 1.0, 0.0], k=5)]
+    assert "Total Revenue: $1.2B" not in texts and "Long-term Debt: $400M" not in texts
+    logger.info(f"✅ Tombstoned rows excluded, live documents: {texts}")
+
+
+def test_compaction_and_reload():
+    """Compaction should drop dead rows and a second instance should see the same data"""
+    path = tempfile.mkdtemp()
+    index = create_index(path, compaction_ratio=0.5)
+
+    index.delete(["cash", "debt"])
+
+    assert index.rows == 1 and index.count() == 1, "Index should have compacted to the live row"
+    reopened = NumpyVectorIndex(path)
+    assert [doc.page_content for doc, _ in reopened.query([1.0, 0.0, 0.0], k=3)] == ["Total Revenue: $1.2B"]
+    logger.info(f"✅ Compacted to generation {index.generation}, files: {sorted(os.listdir(path))}")
+
+
+def test_quantized_codes_match_exact_search():
+    """int8 and PCA-reduced codes shrink the search matrix and, after re-scoring, rank like exact search"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 64)).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    texts = [f"text {i}" for i in range(len(vectors))]
+    metadatas = [{"page": i} for i in range(len(vectors))]
+
+    exact = NumpyVectorIndex(tempfile.mkdtemp(), codec=VectorCodec("float32"))
+    exact.add(ids, vectors.tolist(), texts, metadatas)
+
+    for codec in (VectorCodec("int8"), VectorCodec("float16", pca_dims=32)):
+        index = NumpyVectorIndex(tempfile.mkdtemp(), codec=codec, rescore_factor=4)
+        index.add(ids, vectors.tolist(), texts, metadatas)
+        stats = index.storage_stats()
+        assert stats["search_bytes"] == stats["code_bytes"] <= stats["full_precision_bytes"] // 2
+        # The float32 segment is kept for re-scoring, so the footprint on disk does not shrink
+        assert stats["disk_bytes"] >= stats["full_precision_bytes"]
+
+        for query in vectors[:10] + rng.normal(scale=0.1, size=(10, 64)).astype(np.float32):
+            expected = exact.query(query.tolist(), k=5)
+            results = index.query(query.tolist(), k=5)
+            assert results[0][0].page_content == expected[0][0].page_content
+            # Re-scored results carry the exact cosine similarity
+            assert abs(results[0][1] - expected[0][1]) < 1e-5
+        logger.info(f"✅ {codec.dtype} codes (pca_dims={codec.pca_dims}): {stats}")
+
+
+def test_pca_projection_is_persisted_not_refit_on_load():
+    """Reopening, refreshing and compacting reuse the saved projection instead of running another SVD"""
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(200, 64)).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    path = tempfile.mkdtemp()
+    index = NumpyVectorIndex(path, compaction_ratio=0.25, codec=VectorCodec("int8", pca_dims=16))
+    index.add(ids, vectors.tolist(), [f"text {i}" for i in ids], [{"page": i} for i in range(len(ids))])
+    assert os.path.exists(os.path.join(path, "projection.npz"))
+
+    svd = np.linalg.svd
+    fits = []
+
+    def counting_svd(*args, **kwargs):
+        fits.append(1)
+        return svd(*args, **kwargs)
+
+    np.linalg.svd = counting_svd
+    try:
+        reopened = NumpyVectorIndex(path, codec=VectorCodec("int8", pca_dims=16))
+        assert np.array_equal(reopened.codec.components, index.codec.components)
+        assert reopened.query(vectors[3].tolist(), k=1)[0][0].metadata["page"] == 3
+
+        index.delete(ids[:60])  # Past the compaction ratio
+        assert index.generation == 1 and index.count() == 140
+        assert reopened.query(vectors[100].tolist(), k=1)[0][0].metadata["page"] == 100  # Reader refresh
+    finally:
+        np.linalg.svd = svd
+
+    assert fits == []
+    logger.info("✅ PCA projection reused across reload, refresh and compaction")
+
+
+if __name__ == "__main__":
+    test_exact_search_ranks_by_cosine()
+    test_upsert_and_delete_use_tombstones()
+    test_compaction_and_reload()
+    test_quantized_codes_match_exact_search()
+    test_pca_projection_is_persisted_not_refit_on_load()
+    logger.info("🎉 All NumPy vector backend tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel PDF page extraction across a process pool
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from benchmarks.synthetic_pdf import write_pdf
+from services.pdf_processor import PDFProcessor
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def extract(path, workers, skip_pages=frozenset()):
+    saved = settings.pdf_extraction_workers, settings.parallel_extraction_min_pages
+    settings.pdf_extraction_workers, settings.parallel_extraction_min_pages = workers, 1
+    try:
+        processor = PDFProcessor()
+        return processor.extract_text_from_pdf(path), list(processor.iter_pages(path, skip_pages=skip_pages))
+    finally:
+        settings.pdf_extraction_workers, settings.parallel_extraction_min_pages = saved
+
+
+def test_parallel_matches_sequential():
+    """Worker processes return the same pages, in page order, as sequential extraction"""
+    path = write_pdf(os.path.join(tempfile.mkdtemp(), "statements.pdf"), 12)
+
+    sequential, sequential_stream = extract(path, workers=1)
+    parallel, parallel_stream = extract(path, workers=3)
+
+    assert [page["page_number"] for page in sequential] == list(range(1, 13))
+    assert parallel == sequential
+    assert parallel_stream == sequential_stream == sequential
+    logger.info(f"✅ Parallel extraction matches sequential for {len(parallel)} pages")
+
+    _, skipped = extract(path, workers=3, skip_pages={2, 5, 12})
+    assert [page["page_number"] for page in skipped] == [1, 3, 4, 6, 7, 8, 9, 10, 11]
+    logger.info("✅ Skipped pages are not extracted")
+
+
+def test_page_ranges_cover_every_page():
+    """Page ranges are contiguous, non-overlapping and cover the document"""
+    for total_pages, workers in ((1, 4), (10, 3), (97, 8), (200, 2)):
+        ranges = PDFProcessor._split_page_ranges(total_pages, workers)
+        assert ranges[0][0] == 0 and ranges[-1][1] == total_pages
+        assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    logger.info("✅ Page ranges cover every page")
+
+
+def test_sequential_falls_back_per_page():
+    """A page pdfplumber cannot read falls back to PyPDF2 without discarding the other pages"""
+    import pdfplumber.page
+
+    path = write_pdf(os.path.join(tempfile.mkdtemp(), "statements.pdf"), 4)
+    original = pdfplumber.page.Page.extract_text
+
+    def failing_extract_text(page, *args, **kwargs):
+        if page.page_number == 2:
+            raise ValueError("malformed page")
+        return original(page, *args, **kwargs)
+
+    pdfplumber.page.Page.extract_text = failing_extract_text
+    try:
+        pages, _ = extract(path, workers=1)
+    finally:
+        pdfplumber.page.Page.extract_text = original
+
+    assert [page["page_number"] for page in pages] == [1, 2, 3, 4]
+    assert pages[0] == extract(path, workers=1)[0][0], "Pages pdfplumber can read still use pdfplumber"
+    logger.info("✅ Sequential extraction falls back page by page")
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_page_ranges_cover_every_page()
+    test_sequential_falls_back_per_page()
+    logger.info("🎉 All parallel extraction tests passed")
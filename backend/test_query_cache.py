@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory query embedding and retrieval result caches
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import Document
+from config import settings
+from services.fake_providers import HashEmbeddings
+from services.query_cache import LRUCache, normalize_question
+from services.vector_store import VectorStoreService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.query_calls = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+STORE_SETTINGS = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_requests_per_second",
+                  "enable_reranking")
+
+
+def create_vector_store():
+    """A real VectorStoreService on the NumPy backend with hashed embeddings in a temp directory"""
+    saved = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    try:
+        settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+        settings.embedding_cache_enabled, settings.embedding_requests_per_second = False, 0
+        settings.enable_reranking = False
+        return VectorStoreService(embeddings=CountingEmbeddings(), embedding_model_name="counting-64")
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def test_lru_eviction_and_ttl():
+    """Least recently used entries go first, expired entries miss, size 0 disables the cache"""
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes the most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+    expiring = LRUCache(max_entries=2, ttl_seconds=0.05)
+    expiring.set("a", None)
+    assert expiring.get("a", "missing") is None  # a cached None is a hit
+    time.sleep(0.06)
+    assert expiring.get("a", "missing") == "missing"
+    assert len(expiring) == 0
+
+    disabled = LRUCache(max_entries=0, ttl_seconds=60)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None and len(disabled) == 0
+    logger.info("✅ LRU eviction, TTL and disabling work")
+
+
+def test_repeated_questions_hit_the_caches():
+    """Paraphrases differing in case and spacing reuse the query embedding and the retrieval results"""
+    vector_store = create_vector_store()
+    vector_store.add_documents([
+        Document(page_content="Total revenue for 2024 was $1.2 billion.", metadata={"chunk_id": "a", "page": 1}),
+        Document(page_content="Net income for 2024 was $150 million.", metadata={"chunk_id": "b", "page": 2}),
+    ])
+    assert normalize_question("  What was  REVENUE? ") == "what was revenue?"
+
+    first = vector_store.similarity_search("What was revenue in 2024?", k=2)
+    second = vector_store.similarity_search("  what was REVENUE in 2024? ", k=2)
+    assert vector_store.base_embeddings.query_calls == 1
+    assert vector_store.retrieval_cache.stats()["hits"] == 1
+    assert [doc.metadata["chunk_id"] for doc, _ in first] == [doc.metadata["chunk_id"] for doc, _ in second]
+    logger.info("✅ Repeated question served from the caches")
+
+    # A change to the collection invalidates cached results but not the query embedding
+    vector_store.add_documents([
+        Document(page_content="Revenue grew 20% in 2024.", metadata={"chunk_id": "c", "page": 3})
+    ])
+    assert len(vector_store.retrieval_cache) == 0
+    third = vector_store.similarity_search("What was revenue in 2024?", k=3)
+    assert "c" in [doc.metadata["chunk_id"] for doc, _ in third]
+    assert vector_store.base_embeddings.query_calls == 1
+    logger.info("✅ Index changes invalidate cached retrieval results")
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_repeated_questions_hit_the_caches()
+    logger.info("🎉 All query cache tests passed")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical in-flight chat requests
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from langchain.schema import AIMessage, Document
+from config import settings
+import main
+from services.rag_pipeline import RAGPipeline
+from services.request_coalescer import RequestCoalescer, chat_request_key
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONCURRENT_REQUESTS = 6
+
+
+class MockVectorStore:
+    index_version = 0
+
+    def similarity_search(self, query, k=5, filters=None):
+        return [(Document(
+            page_content="Total revenue for 2024 was $1.2 billion.",
+            metadata={"page": 1, "source": "test.pdf", "chunk_id": "test_1_1"}
+        ), 0.95)]
+
+    async def asimilarity_search(self, query, k=5, filters=None):
+        return self.similarity_search(query, k, filters)
+
+    def get_document_count(self):
+        return 1
+
+    async def run(self, func, *args):
+        return func(*args)
+
+
+class CountingChatModel:
+    """Slow chat model stand-in that counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(0.3)
+        return AIMessage(content="Total revenue was $1.2 billion (page 1).")
+
+
+def test_request_key_normalization():
+    """Case and whitespace differences should map to the same key"""
+    assert chat_request_key("What is the total revenue?") == chat_request_key("  what is the TOTAL  revenue? ")
+    assert chat_request_key("What is the total revenue?", filters={"sources": ["a.pdf"]}) != \
+        chat_request_key("What is the total revenue?")
+    assert chat_request_key("What is the total revenue?", [{"role": "user", "content": "Hi"}]) != \
+        chat_request_key("What is the total revenue?")
+    logger.info("✅ Keys cover normalized question, history and filters")
+
+
+def test_shared_result_and_errors():
+    """Waiters share one execution's result or exception; nothing is kept afterwards"""
+    async def scenario():
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"answer": "ok"}
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("LLM unavailable")
+
+        results = await asyncio.gather(*[coalescer.run("q", work) for _ in range(4)])
+        errors = await asyncio.gather(*[coalescer.run("bad", fail) for _ in range(3)], return_exceptions=True)
+        await coalescer.run("q", work)
+        return coalescer, calls, results, errors
+
+    coalescer, calls, results, errors = asyncio.run(scenario())
+
+    assert len(calls) == 2 and all(result is results[0] for result in results)
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert coalescer.stats() == {"executed": 3, "coalesced": 5, "in_flight": 0}
+    logger.info(f"✅ Coalescer stats: {coalescer.stats()}")
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    """A disconnecting first caller should not cancel the execution the others await"""
+    async def scenario():
+        coalescer = RequestCoalescer()
+
+        async def work():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        first = asyncio.ensure_future(coalescer.run("q", work))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coalescer.run("q", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+    logger.info("✅ Shared execution survives a cancelled caller")
+
+
+def test_concurrent_chats_coalesced():
+    """Identical concurrent /api/chat requests should trigger a single LLM call"""
+    settings.google_api_key = ""
+    main.chat_coalescer = RequestCoalescer()
+    main.vector_store = MockVectorStore()
+    main.rag_pipeline = RAGPipeline(main.vector_store)
+    main.rag_pipeline.llm = CountingChatModel()
+    main.rag_pipeline.use_chat_model = True
+
+    async def post_concurrent_chats():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/api/chat", json={"question": "What is the total revenue?" if i % 2 else
+                                                "what is the  total revenue?"})
+                for i in range(CONCURRENT_REQUESTS)
+            ])
+
+    responses = asyncio.run(post_concurrent_chats())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.json()["answer"] for response in responses}) == 1
+    assert main.rag_pipeline.llm.calls == 1
+    assert main.chat_coalescer.coalesced == CONCURRENT_REQUESTS - 1
+    logger.info(f"✅ {CONCURRENT_REQUESTS} concurrent chats, 1 LLM call, stats {main.chat_coalescer.stats()}")
+
+
+if __name__ == "__main__":
+    test_request_key_normalization()
+    test_shared_result_and_errors()
+    test_cancelled_caller_does_not_cancel_others()
+    test_concurrent_chats_coalesced()
+    logger.info("🎉 All request coalescing tests passed")
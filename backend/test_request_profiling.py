@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test script for header-triggered request profiling and the profile admin endpoints
+"""
+
+import sys
+import os
+import asyncio
+import pstats
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from langchain.schema import AIMessage, Document
+from config import settings
+import main
+from services.rag_pipeline import RAGPipeline
+from services.request_coalescer import RequestCoalescer
+from services.request_profiler import ProfileStore, SamplingProfiler
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def create_client():
+    class MockVectorStore:
+        async def asimilarity_search(self, query, k=5, filters=None):
+            await asyncio.sleep(0.05)
+            return [(Document(page_content="Total revenue for 2024 was $1.2 billion.",
+                              metadata={"page": 1, "chunk_id": "test_1_1"}), 0.95)]
+
+        def get_document_count(self):
+            return 1
+
+        async def run(self, func, *args):
+            return func(*args)
+
+    class ChatModel:
+        async def ainvoke(self, messages):
+            return AIMessage(content="Total revenue was $1.2 billion (page 1).")
+
+    settings.google_api_key = ""
+    settings.profiling_admin_token = "secret"
+    main.profile_store = ProfileStore(tempfile.mkdtemp(), max_profiles=5)
+    main.chat_coalescer = RequestCoalescer()
+    main.vector_store = MockVectorStore()
+    main.rag_pipeline = RAGPipeline(main.vector_store)
+    main.rag_pipeline.llm = ChatModel()
+    main.rag_pipeline.use_chat_model = True
+    return TestClient(main.app)
+
+
+def test_sampling_profiler_sees_other_threads():
+    """Stacks of worker threads are sampled, rooted at the thread name"""
+    profiler = SamplingProfiler(0.002)
+    worker = threading.Thread(target=busy_wait, args=(0.1,), name="worker")
+    profiler.start()
+    worker.start()
+    worker.join()
+    collapsed = profiler.stop().decode("utf-8")
+
+    assert profiler.samples > 0
+    assert any(line.startswith("worker;") and "busy_wait" in line for line in collapsed.splitlines())
+    logger.info(f"✅ {profiler.samples} samples, worker thread stacks recorded")
+
+
+def test_profile_ring_is_bounded():
+    """Saving past max_profiles drops the oldest profile and its metadata"""
+    store = ProfileStore(tempfile.mkdtemp(), max_profiles=2)
+    ids = [store.new_id() for _ in range(3)]
+    for profile_id in ids:
+        store.save(profile_id, b"main;handler 1\n", {"mode": "sampling", "method": "GET", "path": "/",
+                                                      "status": 200, "duration": 0.01})
+
+    assert [profile["id"] for profile in store.list()] == [ids[2], ids[1]]
+    assert store.get(ids[0]) is None and store.get("../config") is None
+    assert sorted(os.listdir(store.directory)) == sorted(f"{i}.{ext}" for i in ids[1:] for ext in ("collapsed", "json"))
+    logger.info("✅ Profile ring kept the 2 newest profiles")
+
+
+def test_profiled_chat_request():
+    """A chat request with the header and admin token is profiled and downloadable"""
+    client = create_client()
+    try:
+        response = client.post("/api/chat", json={"question": "What is the total revenue?"},
+                               headers={"X-Profile": "sampling", **ADMIN})
+        assert response.status_code == 200 and response.json()["answer"]
+        profile_id = response.headers["X-Profile-Id"]
+
+        profiles = client.get("/admin/profiles", headers=ADMIN).json()["profiles"]
+        assert profiles[0]["id"] == profile_id and profiles[0]["path"] == "/api/chat"
+        assert profiles[0]["samples"] > 0
+
+        collapsed = client.get(f"/admin/profiles/{profile_id}", headers=ADMIN)
+        assert collapsed.status_code == 200 and "MainThread;" in collapsed.text
+        logger.info(f"✅ Sampling profile of /api/chat: {profiles[0]['samples']} samples")
+
+        response = client.post("/api/chat", json={"question": "What was revenue in 2024?"},
+                               headers={"X-Profile": "cprofile", **ADMIN})
+        profile_id = response.headers["X-Profile-Id"]
+        download = client.get(f"/admin/profiles/{profile_id}", headers=ADMIN)
+        path = os.path.join(tempfile.mkdtemp(), "chat.prof")
+        with open(path, "wb") as f:
+            f.write(download.content)
+        assert pstats.Stats(path).total_calls > 0
+        logger.info("✅ cProfile profile of /api/chat loads with pstats")
+    finally:
+        settings.profiling_admin_token = ""
+
+
+def test_profiling_requires_admin_token():
+    """Unprofiled requests are untouched; wrong tokens are rejected; no token disables profiling"""
+    client = create_client()
+    try:
+        plain = client.get("/")
+        assert plain.status_code == 200 and "X-Profile-Id" not in plain.headers
+        assert client.get("/", headers={"X-Profile": "1", "X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/admin/profiles/0123", headers=ADMIN).status_code == 404
+    finally:
+        settings.profiling_admin_token = ""
+
+    assert "X-Profile-Id" not in client.get("/", headers={"X-Profile": "1", **ADMIN}).headers
+    assert client.get("/admin/profiles", headers=ADMIN).status_code == 404
+    logger.info("✅ Profiling gated by the admin token")
+
+
+def test_profile_saved_off_the_event_loop():
+    """The profile is written from a worker thread; a request arriving mid-profile is marked busy"""
+    client = create_client()
+    saved_on_loop = []
+    save = main.profile_store.save
+
+    def recording_save(profile_id, data, metadata):
+        try:
+            asyncio.get_running_loop()
+            saved_on_loop.append(True)
+        except RuntimeError:
+            saved_on_loop.append(False)
+        return save(profile_id, data, metadata)
+
+    main.profile_store.save = recording_save
+    try:
+        response = client.get("/", headers={"X-Profile": "sampling", **ADMIN})
+        assert response.status_code == 200 and "X-Profile-Id" in response.headers
+        assert saved_on_loop == [False]
+        assert main.profile_store.list()[0]["status"] == 200
+
+        with main._profiling_lock:
+            busy = client.get("/", headers={"X-Profile": "sampling", **ADMIN})
+        assert busy.headers["X-Profile-Status"] == "busy" and "X-Profile-Id" not in busy.headers
+        logger.info("✅ Profile saved off the event loop; concurrent profile request marked busy")
+    finally:
+        settings.profiling_admin_token = ""
+
+
+if __name__ == "__main__":
+    test_sampling_profiler_sees_other_threads()
+    test_profile_ring_is_bounded()
+    test_profiled_chat_request()
+    test_profiling_requires_admin_token()
+    test_profile_saved_off_the_event_loop()
+    logger.info("🎉 All request profiling tests passed")
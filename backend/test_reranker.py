@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the cross-encoder reranking stage
+"""
+
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.schema import Document
+from services.reranker import CrossEncoderReranker
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CANDIDATES = [
+    (Document(page_content="Cash at end of year was $320 million.", metadata={"chunk_id": "cash"}), 0.82),
+    (Document(page_content="Total revenue grew on strong cloud demand.", metadata={"chunk_id": "demand"}), 0.80),
+    (Document(page_content="Total revenue for 2024 was $1.2 billion.", metadata={"chunk_id": "revenue"}), 0.78),
+]
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many question words the passage contains"""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append((len(pairs), batch_size))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [
+            len(set(question.lower().rstrip("?").split()) & set(passage.lower().rstrip(".").split())) / 10
+            for question, passage in pairs
+        ]
+
+
+def create_reranker(model, budget_ms=1000, workers=1):
+    return CrossEncoderReranker("fake-cross-encoder", budget_ms=budget_ms, cache_size=100, cache_ttl=60,
+                                model=model, workers=workers)
+
+
+def chunk_ids(results):
+    return [doc.metadata["chunk_id"] for doc, _ in results]
+
+
+def test_rerank_single_batch_and_cache():
+    """Candidates are scored in one batch, reordered and cut to k; repeats hit the score cache"""
+    model = FakeCrossEncoder()
+    reranker = create_reranker(model)
+
+    results, reranked = reranker.rerank("What was total revenue for 2024?", CANDIDATES, k=2)
+    again, _ = reranker.rerank("what was total revenue for 2024?", CANDIDATES, k=2)
+
+    assert reranked and chunk_ids(results) == ["revenue", "demand"]
+    # The retrieval score is kept; the cross-encoder score goes in the metadata
+    assert results[0][1] == 0.78 and results[0][0].metadata["rerank_score"] == 0.5
+    assert "rerank_score" not in CANDIDATES[2][0].metadata
+    assert again == results and model.batches == [(3, 3)]
+    logger.info(f"✅ Reranked to {chunk_ids(results)}, stats {reranker.stats()}")
+
+
+def test_budget_exceeded_keeps_retrieval_order():
+    """A slow rerank returns retrieval order, and its scores serve the next request"""
+    model = FakeCrossEncoder(delay=0.3)
+    reranker = create_reranker(model, budget_ms=50)
+
+    results, reranked = reranker.rerank("What was total revenue for 2024?", CANDIDATES, k=2)
+    assert not reranked and chunk_ids(results) == ["cash", "demand"]
+    assert reranker.timeouts == 1
+
+    time.sleep(0.4)
+    results, reranked = reranker.rerank("What was total revenue for 2024?", CANDIDATES, k=2)
+    assert reranked and chunk_ids(results) == ["revenue", "demand"] and len(model.batches) == 1
+    logger.info("✅ Budget overrun kept retrieval order; finished scores were cached")
+
+
+def test_budget_starts_when_scoring_starts():
+    """A request queued behind another still gets its full budget once its pass runs"""
+    model = FakeCrossEncoder(delay=0.1)
+    reranker = create_reranker(model, budget_ms=250)
+    questions = ["What was total revenue for 2024?", "What was cash at end of year?"]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        outcomes = list(pool.map(lambda question: reranker.rerank(question, CANDIDATES, k=2), questions))
+
+    # The second pass waits ~0.1s in the queue and runs ~0.1s, inside 250ms measured from its start
+    assert all(reranked for _, reranked in outcomes) and reranker.timeouts == 0
+    assert chunk_ids(outcomes[1][0])[0] == "cash"
+    logger.info("✅ Queued rerank kept its full budget")
+
+
+def test_pass_that_cannot_start_is_cancelled():
+    """A pass still queued when its budget runs out is dropped instead of piling up"""
+    model = FakeCrossEncoder(delay=0.3)
+    reranker = create_reranker(model, budget_ms=50)
+    questions = ["What was total revenue for 2024?", "What was cash at end of year?"]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        outcomes = list(pool.map(lambda question: reranker.rerank(question, CANDIDATES, k=2), questions))
+
+    assert not any(reranked for _, reranked in outcomes) and reranker.timeouts == 2
+    time.sleep(0.4)
+    assert len(model.batches) == 1
+    logger.info("✅ Queued rerank cancelled once its budget ran out")
+
+
+def test_model_error_keeps_retrieval_order():
+    """Scoring errors should degrade to retrieval order rather than fail the search"""
+    reranker = create_reranker(FakeCrossEncoder(error=RuntimeError("out of memory")))
+
+    results, reranked = reranker.rerank("What was total revenue for 2024?", CANDIDATES, k=2)
+
+    assert not reranked and chunk_ids(results) == ["cash", "demand"] and reranker.failures == 1
+    logger.info("✅ Model error kept retrieval order")
+
+
+if __name__ == "__main__":
+    test_rerank_single_batch_and_cache()
+    test_budget_exceeded_keeps_retrieval_order()
+    test_budget_starts_when_scoring_starts()
+    test_pass_that_cannot_start_is_cancelled()
+    test_model_error_keeps_retrieval_order()
+    logger.info("🎉 All reranker tests passed")
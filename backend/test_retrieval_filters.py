@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for retrieval filter pushdown (source, page range, fiscal year)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.retrieval_filters import extract_fiscal_years, fiscal_period_metadata, build_where, matches_where
+from services.numpy_index import NumpyVectorIndex
+from services.lexical_index import BM25Index
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_METADATAS = [
+    {"source": "report_2024.pdf", "page": 3, **fiscal_period_metadata([2024, 2023])},
+    {"source": "report_2024.pdf", "page": 12, **fiscal_period_metadata([2024])},
+    {"source": "report_2022.pdf", "page": 3, **fiscal_period_metadata([2022])},
+]
+SAMPLE_TEXTS = [
+    "Total revenue for 2024 was $1.2B compared to $1.1B in 2023.",
+    "Total revenue by segment for FY2024.",
+    "Total revenue for 2022 was $0.9B.",
+]
+
+
+def test_extract_fiscal_years():
+    """Years, FY labels and fiscal-year phrases should be tagged; amounts should not"""
+    years = extract_fiscal_years("For the year ended December 31, 2024 (FY23: restated). Revenue $2015 million.")
+
+    assert years == [2024, 2023]
+    assert fiscal_period_metadata(years) == {"fiscal_year": 2024, "fy_2024": True, "fy_2023": True}
+    logger.info(f"✅ Extracted fiscal years: {years}")
+
+
+def test_build_where_and_evaluate():
+    """The where clause should combine every filter and evaluate like Chroma does"""
+    where = build_where(sources=["report_2024.pdf"], page_from=1, page_to=10, fiscal_years=[2023, 2022])
+
+    assert [matches_where(metadata, where) for metadata in SAMPLE_METADATAS] == [True, False, False]
+    assert build_where() is None
+    logger.info(f"✅ Where clause: {where}")
+
+
+def test_filters_pushed_into_indexes():
+    """Both NumPy and BM25 backends should only return chunks matching the filter"""
+    where = build_where(fiscal_years=[2022])
+
+    vector_index = NumpyVectorIndex(tempfile.mkdtemp())
+    vector_index.add(["a", "b", "c"], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]], SAMPLE_TEXTS, SAMPLE_METADATAS)
+    vector_results = vector_index.query([1.0, 0.0], k=3, where=where)
+
+    lexical_index = BM25Index(os.path.join(tempfile.mkdtemp(), "lexical_index.jsonl"))
+    lexical_index.add(["a", "b", "c"], SAMPLE_TEXTS, SAMPLE_METADATAS)
+    lexical_results = lexical_index.search("total revenue", k=3, where=where)
+
+    assert [doc.metadata["source"] for doc, _ in vector_results] == ["report_2022.pdf"]
+    assert [doc.metadata["source"] for doc, _ in lexical_results] == ["report_2022.pdf"]
+    logger.info("✅ Filters applied inside both indexes")
+
+
+if __name__ == "__main__":
+    test_extract_fiscal_years()
+    test_build_where_and_evaluate()
+    test_filters_pushed_into_indexes()
+    logger.info("🎉 All retrieval filter tests passed")
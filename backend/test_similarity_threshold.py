@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the similarity threshold on both vector backends (scores are "higher is better")
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.embeddings import HuggingFaceEmbeddings
+from langchain.schema import Document
+from langchain.embeddings.base import Embeddings
+from config import settings
+from reset_vector_store import SAMPLE_QUESTIONS, create_comprehensive_financial_documents
+from services.chroma_index import ChromaVectorIndex
+from services.vector_store import VectorStoreService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IDS = ["close", "related", "far"]
+EMBEDDINGS = [[1.0, 0.0, 0.0], [0.6, 0.8, 0.0], [-0.6, 0.0, 0.8]]
+TEXTS = ["Total Revenue: $1.2B", "Revenue growth: 12%", "Long-term Debt: $400M"]
+METADATAS = [{"page": 1, "chunk_id": "close"}, {"page": 2, "chunk_id": "related"}, {"page": 3, "chunk_id": "far"}]
+
+
+class FixedEmbeddings(Embeddings):
+    """Maps the sample texts, and the query "revenue", to fixed 3-d vectors"""
+
+    def embed_documents(self, texts):
+        return [EMBEDDINGS[TEXTS.index(text)] for text in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+STORE_SETTINGS = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_requests_per_second",
+                  "enable_reranking")
+
+
+def create_vector_store(db_type, legacy_l2=False):
+    """A real VectorStoreService holding the three sample chunks, in a temp directory"""
+    saved = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    try:
+        settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), db_type
+        settings.embedding_cache_enabled, settings.embedding_requests_per_second = False, 0
+        settings.enable_reranking = False
+        if legacy_l2:
+            # A collection created before the cosine space (default squared L2)
+            ChromaVectorIndex(settings.vector_db_path, "bootstrap").chroma_client.create_collection(
+                "financial_documents")
+        vector_store = VectorStoreService(embeddings=FixedEmbeddings(), embedding_model_name="fixed-3")
+        if legacy_l2:
+            assert "hnsw:space" not in (vector_store.index.collection.metadata or {})
+        vector_store.add_documents([Document(page_content=text, metadata=metadata)
+                                    for text, metadata in zip(TEXTS, METADATAS)])
+        return vector_store
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def test_threshold_keeps_closest_matches_on_both_backends():
+    """Both backends return cosine similarities, so the threshold drops the far chunk and keeps the close ones"""
+    saved = settings.similarity_threshold, settings.enable_source_deduplication
+    settings.similarity_threshold, settings.enable_source_deduplication = 0.5, False
+    try:
+        for db_type, legacy_l2 in (("numpy", False), ("chroma", False), ("chroma", True)):
+            vector_store = create_vector_store(db_type, legacy_l2)
+            results = vector_store.similarity_search("revenue", k=3)
+            name = type(vector_store.index).__name__ + (" (legacy L2)" if legacy_l2 else "")
+
+            assert [doc.metadata["chunk_id"] for doc, _ in results] == ["close", "related"], name
+            scores = [score for _, score in results]
+            assert abs(scores[0] - 1.0) < 1e-4 and abs(scores[1] - 0.6) < 1e-4, scores
+            logger.info(f"✅ {name} threshold results: {scores}")
+    finally:
+        settings.similarity_threshold, settings.enable_source_deduplication = saved
+
+
+def test_default_threshold_keeps_real_matches():
+    """With real MiniLM embeddings, the default threshold keeps matches for every sample question"""
+    try:
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2",
+                                           model_kwargs={"device": "cpu"})
+    except Exception as e:
+        logger.warning(f"⚠️ MiniLM embeddings unavailable, real-score threshold check not run: {e}")
+        return
+
+    names = ("vector_db_path", "vector_db_type", "retrieval_mode", "embedding_cache_enabled",
+             "embedding_requests_per_second")
+    saved = {name: getattr(settings, name) for name in names}
+    try:
+        settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+        settings.retrieval_mode, settings.embedding_cache_enabled = "vector", False
+        settings.embedding_requests_per_second = 0
+        vector_store = VectorStoreService(embeddings=embeddings,
+                                          embedding_model_name="sentence-transformers/all-MiniLM-L6-v2")
+        vector_store.add_documents(create_comprehensive_financial_documents())
+
+        for question in SAMPLE_QUESTIONS:
+            results = vector_store.similarity_search(question)
+            assert results, f"No match above {settings.similarity_threshold} for {question!r}"
+            assert all(0 < score <= 1 for _, score in results)
+            logger.info(f"✅ {question!r}: top similarity {results[0][1]:.3f}")
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+if __name__ == "__main__":
+    test_threshold_keeps_closest_matches_on_both_backends()
+    test_default_threshold_keeps_real_matches()
+    logger.info("🎉 All similarity threshold tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for per-stage timings and token counts (StageTimer spans)
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from langchain.schema import Document
+from config import settings
+import main
+from services.fake_providers import HashEmbeddings
+from services.ingest_pipeline import IngestPipeline
+from services.rag_pipeline import RAGPipeline
+from services.request_coalescer import RequestCoalescer
+from services.stage_timer import StageTimer, span, timed_iter, use_timer
+from services.vector_store import VectorStoreService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+STORE_SETTINGS = ("vector_db_path", "vector_db_type", "embedding_cache_enabled", "embedding_requests_per_second",
+                  "enable_reranking", "similarity_threshold", "google_api_key", "llm_provider",
+                  "fake_llm_first_token_ms", "fake_llm_token_ms")
+
+
+def create_vector_store():
+    """A real VectorStoreService on the NumPy backend with hashed embeddings in a temp directory.
+
+    Callers save and restore STORE_SETTINGS; the ingest manifest also follows vector_db_path.
+    """
+    settings.vector_db_path, settings.vector_db_type = tempfile.mkdtemp(), "numpy"
+    settings.embedding_cache_enabled, settings.embedding_requests_per_second = False, 0
+    settings.enable_reranking = False
+    return VectorStoreService(embeddings=HashEmbeddings(dimensions=64), embedding_model_name="fake-hash-64")
+
+
+def test_spans_accumulate_only_with_active_timer():
+    """Spans add up per stage inside use_timer and do nothing outside it"""
+    with span("embed"):
+        pass
+
+    timer = StageTimer()
+    with use_timer(timer):
+        for _ in range(2):
+            with span("search"):
+                time.sleep(0.01)
+        items = []
+        for item in timed_iter("extract", iter([1, 2])):
+            time.sleep(0.05)  # consumer work, not extraction
+            items.append(item)
+
+    assert list(timer.timings()) == ["search", "extract"]
+    assert timer.timings()["search"] >= 0.02 and timer.timings()["extract"] < 0.05
+    logger.info(f"✅ Timings: {timer.timings()}")
+
+
+def test_executor_calls_report_to_caller_timer():
+    """Blocking calls run through VectorStoreService.run should report into the request's timer"""
+    saved = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    try:
+        vector_store = create_vector_store()
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+    def blocking_search():
+        with span("search"):
+            time.sleep(0.01)
+
+    async def request():
+        timer = StageTimer()
+        with use_timer(timer):
+            await vector_store.run(blocking_search)
+        return timer
+
+    assert "search" in asyncio.run(request()).timings()
+    logger.info("✅ Executor call timed into the caller's timer")
+
+
+def test_ingest_timings():
+    """Producer-thread extract/split and consumer embed/upsert spans all reach the ingest summary"""
+    class FakePDFProcessor:
+        def hash_pages(self, file_path):
+            return {1: "page-1-hash"}
+
+        def iter_pages(self, file_path, skip_pages=frozenset()):
+            return timed_iter("extract", iter([{"page": 1, "content": "Total revenue was $1.2 billion."}]))
+
+        def iter_chunks(self, pages):
+            for page in pages:
+                with span("split"):
+                    document = Document(page_content=page["content"], metadata={
+                        "page": page["page"], "chunk_id": "doc_1_0", "content_hash": "chunk-hash"
+                    })
+                yield document
+
+    saved = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    try:
+        vector_store = create_vector_store()
+        file_path = os.path.join(settings.vector_db_path, "report.pdf")
+        with open(file_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake")
+
+        result = IngestPipeline(FakePDFProcessor(), vector_store).run(file_path)
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+    assert set(result["timings"]) == {"hash", "extract", "split", "embed", "upsert"}
+    assert result["tokens"]["input"] > 0
+    logger.info(f"✅ Ingest timings: {result['timings']}, tokens: {result['tokens']}")
+
+
+def test_chat_response_timings_behind_flag():
+    """/api/chat returns stage timings and token counts only when enabled"""
+    saved = {name: getattr(settings, name) for name in STORE_SETTINGS}
+    saved_services = main.vector_store, main.rag_pipeline, main.chat_coalescer
+    try:
+        settings.google_api_key, settings.llm_provider = "", "fake"
+        settings.fake_llm_first_token_ms, settings.fake_llm_token_ms = 0, 0
+        # Hashed bag-of-words vectors score far below a real model's similarities
+        settings.similarity_threshold = 0.0
+        main.vector_store = create_vector_store()
+        main.vector_store.add_documents([Document(page_content="Total revenue for 2024 was $1.2 billion.",
+                                                  metadata={"page": 1, "chunk_id": "test_1_1"})])
+        main.rag_pipeline = RAGPipeline(main.vector_store)
+        main.chat_coalescer = RequestCoalescer()
+        client = TestClient(main.app)
+
+        settings.enable_stage_timings = True
+        try:
+            enabled = client.post("/api/chat", json={"question": "What is the total revenue?"}).json()
+        finally:
+            settings.enable_stage_timings = False
+        disabled = client.post("/api/chat", json={"question": "What was revenue in 2024?"}).json()
+    finally:
+        main.vector_store, main.rag_pipeline, main.chat_coalescer = saved_services
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+    assert {"search", "context", "llm", "sources"} <= set(enabled["timings"])
+    assert enabled["tokens"]["input"] > enabled["tokens"]["output"] > 0
+    assert disabled["timings"] is None and disabled["tokens"] is None
+    logger.info(f"✅ Chat timings: {enabled['timings']}, tokens: {enabled['tokens']}")
+
+
+if __name__ == "__main__":
+    test_spans_accumulate_only_with_active_timer()
+    test_executor_calls_report_to_caller_timer()
+    test_ingest_timings()
+    test_chat_response_timings_behind_flag()
+    logger.info("🎉 All stage timing tests passed")